@@ -39,6 +39,11 @@ echo "🔧 准备部署..."
 echo "📦 用户名: $GITHUB_USER"
 echo ""
 
+# 0. 实测页面字节数并写入 mutation metrics，随下面的提交一起发布
+#    index/ 与 dist/ 不进仓库，由 .github/workflows/deploy.yml 以 --no-metrics 重新生成
+echo "🏗️ 记录资源体积..."
+python3 scripts/build_assets.py --root . --out dist
+
 # 1. 初始化/更新 Git
 echo "📝 初始化 Git 仓库..."
 if [ ! -d ".git" ]; then
@@ -97,9 +102,8 @@ CMDS
     echo ""
     echo "3️⃣  启用 GitHub Pages:"
     echo "   - 进入仓库 Settings → Pages"
-    echo "   - Source 选择 'Deploy from a branch'"
-    echo "   - Branch 选择 'main' /(root)"
-    echo "   - 点击 Save"
+    echo "   - Source 选择 'GitHub Actions'"
+    echo "   - 之后每次 push 由 .github/workflows/deploy.yml 构建索引与 dist/ 并发布"
     echo ""
     exit 0
 fi
@@ -111,9 +115,8 @@ echo "🎉 下一步:"
 echo ""
 echo "1️⃣  启用 GitHub Pages:"
 echo "   访问 https://github.com/$GITHUB_USER/ThreeJSEvolution/settings/pages"
-echo "   - Source: Deploy from a branch"
-echo "   - Branch: main / (root)"
-echo "   - 点击 Save"
+echo "   - Source: GitHub Actions"
+echo "   - 之后每次 push 由 .github/workflows/deploy.yml 构建索引与 dist/ 并发布"
 echo ""
 echo "2️⃣  访问你的网站:"
 echo "   https://$GITHUB_USER.github.io/ThreeJSEvolution/"
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+🏗️ ThreeJSEvolution 资源构建
+部署前压缩技能页面：精简内联 JS/CSS，生成预压缩 (.gz / .br) 版本
+
+核心功能：
+1. 精简 HTML 及内联 <script>/<style> (保留字符串、正则与换行，避免 ASI 问题)
+2. 生成 .gz 以及 (安装 brotli 时) .br 预压缩文件
+3. 多进程并行处理，输入未变化时跳过
+4. 将压缩前后字节数写入对应 mutation 的 metrics
+5. 内容指纹：技能页面的内联脚本/样式抽成 index-1.<hash>.js 等文件，页面另存为
+   index.<hash>.html，入口页面 (根 index.html 等) 中的链接改写为带指纹的地址；
+   对应关系写入 dist/asset-manifest.json，dist/_headers 把带指纹的文件标记为 immutable
+   (GitHub Pages 不读取 _headers，Netlify / Cloudflare Pages 等会读取)
+
+Usage:
+    python3 scripts/build_assets.py [--root .] [--out dist] [--jobs N] [--force]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+from evolution_tracker import EvolutionTracker, default_registry
+
+# 修改精简规则时递增，使旧的构建缓存失效
+MINIFIER_VERSION = 1
+
+# 需要发布的站点文件
+SITE_GLOBS = [
+    "index.html",
+    "mutation-schema.json",
+    "skills/**/*",
+    "mutations/*.json",
+    "patches/*.patch",
+    "index/*.json",
+]
+
+COMPRESSIBLE = {".html", ".js", ".css", ".json", ".md", ".patch", ".svg", ".txt"}
+MINIFIABLE = {".html", ".js", ".css"}
+
+# 带指纹发布的页面 (技能的各代页面)；其余 HTML 是入口，地址不变，只改写其中的链接
+FINGERPRINT_PAGES = ["skills/*/*/*.html"]
+FINGERPRINT_LENGTH = 10
+ASSET_MANIFEST = "asset-manifest.json"
+HEADERS_FILE = "_headers"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_WORD = re.compile(r"[A-Za-z0-9_$\u0080-\uffff]")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new",
+                   "delete", "void", "throw", "yield", "await", "instanceof"}
+_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+
+
+def _is_word(c: str) -> bool:
+    return bool(c) and bool(_WORD.match(c))
+
+
+def _skip_string(src: str, i: int) -> int:
+    """跳过从 i 开始的字符串/模板字面量，返回结束位置"""
+    quote = src[i]
+    i += 1
+    n = len(src)
+    while i < n:
+        c = src[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if quote == "`" and c == "$" and src.startswith("${", i):
+            i = _skip_braces(src, i + 2)
+            continue
+        if quote != "`" and c == "\n":
+            return i
+        i += 1
+    return n
+
+
+def _skip_braces(src: str, i: int) -> int:
+    """跳过模板字面量 ${...} 中的表达式"""
+    depth = 1
+    n = len(src)
+    while i < n and depth:
+        c = src[i]
+        if c in "'\"`":
+            i = _skip_string(src, i)
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+        i += 1
+    return i
+
+
+def _skip_regex(src: str, i: int) -> int:
+    """跳过正则字面量 (含字符类与 flags)"""
+    i += 1
+    n = len(src)
+    in_class = False
+    while i < n:
+        c = src[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "\n":
+            return i
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            while i < n and _is_word(src[i]):
+                i += 1
+            return i
+        i += 1
+    return n
+
+
+def _keep_space(prev: str, nxt: str) -> bool:
+    """删除空白后两侧字符是否会粘连成别的记号"""
+    if _is_word(prev) and _is_word(nxt):
+        return True
+    if prev + nxt in ("++", "--", "+-", "-+", "//", "/*", "*/", "<!"):
+        return True
+    return prev.isdigit() and nxt == "."
+
+
+def minify_js(src: str) -> str:
+    """保守的 JS 精简：去注释、缩进与多余空白，保留语义相关的换行"""
+    out: List[str] = []
+    n = len(src)
+    i = 0
+    last_token = ""      # 最近的有效记号 (用于判断 / 是否为正则)
+    pending = ""         # 待定的空白: "" / " " / "\n"
+
+    def emit(text: str):
+        nonlocal pending
+        if pending and out:
+            prev = out[-1][-1]
+            if pending == "\n":
+                if prev not in "{;,([" and text[0] not in "})],;.":
+                    out.append("\n")
+            elif _keep_space(prev, text[0]):
+                out.append(" ")
+        pending = ""
+        out.append(text)
+
+    while i < n:
+        c = src[i]
+        if c in "'\"`":
+            j = _skip_string(src, i)
+            emit(src[i:j])
+            last_token = c
+            i = j
+        elif c == "/" and src.startswith("//", i):
+            j = src.find("\n", i)
+            i = n if j == -1 else j
+        elif c == "/" and src.startswith("/*", i):
+            j = src.find("*/", i + 2)
+            j = n if j == -1 else j + 2
+            if "\n" in src[i:j]:
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            i = j
+        elif c == "/" and (not last_token or last_token in _REGEX_AFTER
+                           or last_token in _REGEX_KEYWORDS):
+            j = _skip_regex(src, i)
+            emit(src[i:j])
+            last_token = "/re/"
+            i = j
+        elif c in " \t\r\f\v":
+            if not pending:
+                pending = " "
+            i += 1
+        elif c == "\n":
+            pending = "\n"
+            i += 1
+        elif _is_word(c):
+            j = i
+            while j < n and _is_word(src[j]):
+                j += 1
+            emit(src[i:j])
+            last_token = src[i:j]
+            i = j
+        else:
+            emit(c)
+            last_token = c
+            i += 1
+
+    return "".join(out).strip()
+
+
+def minify_css(src: str) -> str:
+    """CSS 精简：去注释，压缩空白，去掉分隔符两侧空格"""
+    out: List[str] = []
+    n = len(src)
+    i = 0
+    pending = False
+    while i < n:
+        c = src[i]
+        if c in "'\"":
+            j = _skip_string(src, i)
+            if pending and out and out[-1][-1] not in "{};:,>":
+                out.append(" ")
+            pending = False
+            out.append(src[i:j])
+            i = j
+        elif src.startswith("/*", i):
+            j = src.find("*/", i + 2)
+            i = n if j == -1 else j + 2
+            pending = True
+        elif c.isspace():
+            pending = True
+            i += 1
+        else:
+            if pending and out and c not in "{};,>" and out[-1][-1] not in "{};:,>":
+                out.append(" ")
+            pending = False
+            if c == "}" and out and out[-1] == ";":
+                out.pop()
+            out.append(c)
+            i += 1
+    return "".join(out).strip()
+
+
+_JS_TYPES = {"", "text/javascript", "application/javascript", "module"}
+
+
+def _script_type(open_tag: str) -> str:
+    m = re.search(r"\btype\s*=\s*[\"']?([^\"'\s>]*)", open_tag, re.I)
+    return m.group(1).lower() if m else ""
+
+
+_RAW_BLOCK = re.compile(r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)", re.I | re.S)
+
+
+def _minify_markup(text: str) -> str:
+    text = re.sub(r"<!--(?!\[if).*?-->", "", text, flags=re.S)
+    return re.sub(r"\s+", " ", text)
+
+
+def minify_html(html: str) -> str:
+    """精简 HTML：内联脚本/样式分别处理，<pre>/<textarea> 原样保留"""
+    parts: List[str] = []
+    pos = 0
+    for m in _RAW_BLOCK.finditer(html):
+        parts.append(_minify_markup(html[pos:m.start()]))
+        open_tag, tag, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if tag == "script" and _script_type(open_tag) in _JS_TYPES:
+            body = minify_js(body)
+        elif tag == "style":
+            body = minify_css(body)
+        parts.append(_minify_markup(open_tag) + body + close_tag)
+        pos = m.end()
+    parts.append(_minify_markup(html[pos:]))
+    return "".join(parts).strip() + "\n"
+
+
+def minify(path: Path, data: bytes) -> bytes:
+    suffix = path.suffix.lower()
+    if suffix not in MINIFIABLE:
+        return data
+    text = data.decode("utf-8")
+    if suffix == ".html":
+        text = minify_html(text)
+    elif suffix == ".js":
+        text = minify_js(text)
+    else:
+        text = minify_css(text)
+    return text.encode("utf-8")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_output(dest: Path, output: bytes) -> Dict[str, int]:
+    """写入输出文件及其预压缩版本，返回各版本字节数"""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_bytes(output)
+    sizes = {"minified": len(output)}
+    if dest.suffix.lower() in COMPRESSIBLE:
+        gz = gzip.compress(output, 9, mtime=0)
+        Path(str(dest) + ".gz").write_bytes(gz)
+        sizes["gzip"] = len(gz)
+        if brotli is not None:
+            br = brotli.compress(output, quality=11)
+            Path(str(dest) + ".br").write_bytes(br)
+            sizes["br"] = len(br)
+    return sizes
+
+
+def build_file(args: Tuple[str, str, str]) -> Tuple[str, Dict]:
+    """处理单个文件 (在工作进程中执行)"""
+    root, out_dir, rel = args
+    src = Path(root) / rel
+    data = src.read_bytes()
+    output = minify(src, data)
+    sizes = {"raw": len(data), **write_output(Path(out_dir) / rel, output)}
+    return rel, {"sha256": _sha256(data), "sizes": sizes}
+
+
+def fingerprinted(rel: str, data: bytes) -> str:
+    """dir/name.ext → dir/name.<内容哈希>.ext"""
+    stem, ext = posixpath.splitext(rel)
+    return f"{stem}.{_sha256(data)[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def _is_fingerprint_page(rel: str) -> bool:
+    return any(Path(rel).match(pattern) for pattern in FINGERPRINT_PAGES)
+
+
+_REF = re.compile(r"""(\b(?:href|src)\s*=\s*)(["'])([^"'#?]*)([^"']*)\2""", re.I)
+
+
+def rewrite_refs(html: str, page: str, mapping: Dict[str, str]) -> str:
+    """把页面中指向 mapping 里文件的相对链接改写为带指纹的地址 (保留 ?query 与 #hash)"""
+    base = posixpath.dirname(page)
+
+    def replace(m):
+        url = m.group(3)
+        if not url or url.startswith("/") or ":" in url:
+            return m.group(0)
+        target = posixpath.normpath(posixpath.join(base, url))
+        if url.endswith("/"):
+            target = posixpath.join(target, "index.html")
+        if target not in mapping:
+            return m.group(0)
+        new = posixpath.relpath(mapping[target], base or ".")
+        return f"{m.group(1)}{m.group(2)}{new}{m.group(4)}{m.group(2)}"
+
+    return _REF.sub(replace, html)
+
+
+def extract_inline(html: str, page: str) -> Tuple[str, Dict[str, bytes]]:
+    """把内联 JS/CSS 抽成带指纹的独立文件，返回 (改写后的页面, {路径: 内容})
+
+    脚本按原顺序换成同步的 <script src>，执行顺序不变；JSON、importmap、着色器等非 JS 内容留在页面里。
+    """
+    base, stem = posixpath.split(posixpath.splitext(page)[0])
+    assets: Dict[str, bytes] = {}
+    parts: List[str] = []
+    pos = 0
+    for m in _RAW_BLOCK.finditer(html):
+        open_tag, tag, body = m.group(1), m.group(2).lower(), m.group(3)
+        if tag == "script" and _script_type(open_tag) in _JS_TYPES and body.strip() \
+                and not re.search(r"\bsrc\s*=", open_tag, re.I):
+            ext = ".js"
+        elif tag == "style" and body.strip() and re.fullmatch(r"<style\s*>", open_tag, re.I):
+            ext = ".css"
+        else:
+            continue
+        data = body.strip().encode("utf-8")
+        rel = fingerprinted(posixpath.join(base, f"{stem}-{len(assets) + 1}{ext}"), data)
+        assets[rel] = data
+        name = posixpath.basename(rel)
+        parts.append(html[pos:m.start()])
+        if ext == ".js":
+            parts.append(f'{open_tag[:-1].rstrip()} src="{name}"></script>')
+        else:
+            parts.append(f'<link rel="stylesheet" href="{name}">')
+        pos = m.end()
+    parts.append(html[pos:])
+    return "".join(parts), assets
+
+
+def fingerprint_site(pages: Dict[str, str]) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+    """为精简后的全部 HTML 生成带指纹的输出
+
+    pages 为 {路径: 精简后的 HTML}。返回 (要写入的文件 {路径: 内容}, manifest {逻辑路径: 指纹路径})。
+    技能页面的内联资源先抽出，页面内容 (含资源指纹) 决定页面指纹，任何脚本变化都会换一个页面地址；
+    原路径也写一份同样内容的页面，旧链接仍可访问。入口页面只改写链接。
+    """
+    outputs: Dict[str, bytes] = {}
+    mapping: Dict[str, str] = {}
+    for rel in sorted(p for p in pages if _is_fingerprint_page(p)):
+        html, assets = extract_inline(pages[rel], rel)
+        for n, (asset, data) in enumerate(assets.items(), 1):
+            outputs[asset] = data
+            mapping[f"{rel}#{posixpath.splitext(asset)[1][1:]}-{n}"] = asset
+        data = html.encode("utf-8")
+        mapping[rel] = fingerprinted(rel, data)
+        outputs[rel] = outputs[mapping[rel]] = data
+    for rel in sorted(p for p in pages if not _is_fingerprint_page(p)):
+        outputs[rel] = rewrite_refs(pages[rel], rel, mapping).encode("utf-8")
+    return outputs, mapping
+
+
+def headers_file(mapping: Dict[str, str]) -> str:
+    """_headers：带指纹的文件永久缓存，其余文件每次向服务器确认"""
+    lines = ["/*", "  Cache-Control: no-cache"]
+    for path in sorted(set(mapping.values())):
+        lines += [f"/{path}", f"  Cache-Control: {IMMUTABLE}"]
+    return "\n".join(lines) + "\n"
+
+
+def collect_files(root: Path, out_dir: Path) -> List[str]:
+    files = set()
+    out_dir = out_dir.resolve()
+    for pattern in SITE_GLOBS:
+        for path in root.glob(pattern):
+            if path.is_file() and out_dir not in path.resolve().parents and path.suffix not in (".gz", ".br"):
+                files.add(path.relative_to(root).as_posix())
+    return sorted(files)
+
+
+class AssetBuilder:
+    """站点构建器，manifest 记录输入哈希以跳过未变化文件"""
+
+    def __init__(self, root: str = ".", out_dir: str = "dist", jobs: Optional[int] = None,
+                 fingerprint: bool = True):
+        self.root = Path(root)
+        self.out_dir = Path(out_dir)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.fingerprint_pages = fingerprint
+        self.manifest_file = self.out_dir / ".build-manifest.json"
+        self.asset_manifest_file = self.out_dir / ASSET_MANIFEST
+        self.assets: Dict[str, str] = {}
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MINIFIER_VERSION:
+                return manifest
+        return {"version": MINIFIER_VERSION, "files": {}}
+
+    def _is_fresh(self, rel: str, entry: Optional[Dict]) -> bool:
+        if not entry or not (self.out_dir / rel).exists():
+            return False
+        return _sha256((self.root / rel).read_bytes()) == entry["sha256"]
+
+    def build(self, force: bool = False) -> Dict[str, Dict]:
+        manifest = self._load_manifest()
+        files = collect_files(self.root, self.out_dir)
+        todo = [rel for rel in files if force or not self._is_fresh(rel, manifest["files"].get(rel))]
+
+        results = {}
+        tasks = [(str(self.root), str(self.out_dir), rel) for rel in todo]
+        if self.jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                results = dict(pool.map(build_file, tasks, chunksize=4))
+        else:
+            results = dict(map(build_file, tasks))
+
+        # 删除已不存在的源文件的输出
+        for rel in set(manifest["files"]) - set(files):
+            for suffix in ("", ".gz", ".br"):
+                stale = self.out_dir / (rel + suffix)
+                if stale.exists():
+                    stale.unlink()
+            del manifest["files"][rel]
+
+        manifest["files"].update(results)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+        self.skipped = len(files) - len(todo)
+        self.rebuilt = sorted(results)
+        if self.fingerprint_pages:
+            self.assets = self.fingerprint(files)
+        return manifest["files"]
+
+    def fingerprint(self, files: List[str]) -> Dict[str, str]:
+        """重写全部 HTML 的带指纹版本 (页面很少，每次从源文件重新生成)，删除上次遗留的指纹文件"""
+        pages = {rel: minify_html((self.root / rel).read_text(encoding="utf-8"))
+                 for rel in files if rel.endswith(".html")}
+        outputs, mapping = fingerprint_site(pages)
+        for rel, data in outputs.items():
+            dest = self.out_dir / rel
+            if not dest.exists() or dest.read_bytes() != data:
+                write_output(dest, data)
+
+        previous = {}
+        if self.asset_manifest_file.exists():
+            with open(self.asset_manifest_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f).get("files", {})
+        for stale in set(previous.values()) - set(mapping.values()):
+            for suffix in ("", ".gz", ".br"):
+                path = self.out_dir / (stale + suffix)
+                if path.exists():
+                    path.unlink()
+
+        with open(self.asset_manifest_file, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "files": mapping}, f, indent=2, sort_keys=True)
+        (self.out_dir / HEADERS_FILE).write_text(headers_file(mapping), encoding="utf-8")
+        return mapping
+
+
+def record_sizes(tracker: EvolutionTracker, files: Dict[str, Dict]) -> Dict[str, str]:
+    """把页面字节数写入谱系上最后一次修改该页面的 mutation (子代优先于祖先)"""
+    latest: Dict[str, Dict] = {}
+    for mutation in tracker.lineage_order(tracker.get_evolution_tree()):
+        page = tracker.page_for(mutation)
+        if page is None:
+            continue
+        rel = page.relative_to(tracker.registry).as_posix()
+        if rel in files:
+            latest[rel] = mutation
+
+    updated = {}
+    for rel, mutation in latest.items():
+        sizes = files[rel]["sizes"]
+        if mutation.get("metrics", {}).get("asset_bytes") != sizes:
+            tracker.update_metrics(mutation["mutation_id"], {"asset_bytes": sizes})
+        updated[rel] = mutation["mutation_id"]
+    return updated
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 资源构建")
+    parser.add_argument("--root", default=default_registry(),
+                        help="站点根目录 (默认 EVOLUTION_REGISTRY 或仓库根目录)")
+    parser.add_argument("--out", default="dist", help="输出目录 (相对 root)")
+    parser.add_argument("--registry", help="mutation 所在 registry (默认同 root)")
+    parser.add_argument("--jobs", type=int, help="并行进程数")
+    parser.add_argument("--force", action="store_true", help="忽略缓存全部重建")
+    parser.add_argument("--no-metrics", action="store_true", help="不写回 mutation metrics")
+    parser.add_argument("--no-fingerprint", action="store_true", help="不生成带内容指纹的文件名")
+    args = parser.parse_args(argv)
+
+    root = Path(args.root)
+    builder = AssetBuilder(str(root), str(root / args.out), args.jobs, fingerprint=not args.no_fingerprint)
+    files = builder.build(force=args.force)
+
+    print(f"🏗️ 构建完成: {len(builder.rebuilt)} 个文件已处理, {builder.skipped} 个未变化已跳过")
+    if builder.assets:
+        pages = [rel for rel in builder.assets if rel.endswith(".html")]
+        print(f"🔖 内容指纹: {len(pages)} 个页面, {len(builder.assets) - len(pages)} 个脚本/样式 → {ASSET_MANIFEST}")
+    if brotli is None:
+        print("⚠️ 未安装 brotli，仅生成 .gz")
+
+    pages = sorted(rel for rel in files if rel.endswith(".html"))
+    total_raw = total_gz = 0
+    for rel in pages:
+        sizes = files[rel]["sizes"]
+        total_raw += sizes["raw"]
+        total_gz += sizes.get("gzip", sizes["minified"])
+        print(f"   📄 {rel}: {sizes['raw']:,} → {sizes['minified']:,} B (gzip {sizes.get('gzip', 0):,} B)")
+    print(f"📦 页面合计: 原始 {total_raw:,} B → gzip {total_gz:,} B")
+
+    if not args.no_metrics:
+        tracker = EvolutionTracker(args.registry or args.root)
+        for rel, mutation_id in record_sizes(tracker, files).items():
+            print(f"📊 {mutation_id} ← {rel}")
+        # metrics 写回改动了 mutations/*.json，再构建一次让 dist/ 中的副本保持最新
+        builder.build()
+        if builder.rebuilt:
+            print(f"🔁 已同步 {len(builder.rebuilt)} 个更新后的记录")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
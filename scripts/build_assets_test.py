@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+🏗️ ThreeJSEvolution 资源构建自检
+minify_js / minify_css / minify_html 的边界情况，内容指纹与链接改写
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from build_assets import AssetBuilder, fingerprint_site, minify_css, minify_html, minify_js
+from instrument import run_tests
+
+
+def test_minify_js_tokens():
+    src = ('// 注释\nlet a = 1; /* 块注释 */\n'
+           'const s = "a // 不是注释";\n'
+           'const r = x / 2 / y;\n'
+           'const re = /ab+c\\/d/g.test(s);\n')
+    assert minify_js(src) == 'let a=1;const s="a // 不是注释";const r=x/2/y;const re=/ab+c\\/d/g.test(s);'
+
+
+def test_minify_js_asi():
+    # 换行可能终止语句，不能删除
+    assert minify_js("return a\n++b\n") == "return a\n++b"
+    assert minify_js("let x = a\n(b)") == "let x=a\n(b)"
+    # 相邻的 + + / - - 不能合并成 ++ / --
+    assert minify_js("var x = a + +b;\nvar y = a - -b;") == "var x=a+ +b;var y=a- -b;"
+    # 模板字符串原样保留
+    assert minify_js("const t = `x ${ {a: 1}.a }  y`;") == "const t=`x ${ {a: 1}.a }  y`;"
+
+
+def test_minify_css():
+    src = "a  >  b , c { color: red ; /* x */ margin : 0 0 ; }\n@media (min-width: 10px) { .x{ top: calc(1px + 2px) } }"
+    assert minify_css(src) == "a>b,c{color:red;margin :0 0}@media (min-width:10px){.x{top:calc(1px + 2px)}}"
+
+
+def test_minify_html_raw_blocks():
+    html = minify_html('<p>  a   b </p>\n<pre>  x\n  y</pre>'
+                       '<script>\n// c\nlet a = 1;\n</script>'
+                       '<script type="x-shader/x-vertex">  void main() { } </script>')
+    assert "<p> a b </p>" in html
+    assert "<pre>  x\n  y</pre>" in html
+    assert "<script>let a=1;</script>" in html
+    assert '<script type="x-shader/x-vertex">  void main() { } </script>' in html
+
+
+PAGE = ('<html><head><style>body{margin:0}</style></head><body>'
+        '<script src="https://cdn.example/three.min.js"></script>'
+        '<script type="application/json">{"a":1}</script>'
+        '<script type="module">init();</script></body></html>\n')
+
+
+def test_fingerprint_site():
+    pages = {"skills/t/v1/index.html": PAGE,
+             "index.html": '<a href="skills/t/v1/index.html#demo">v1</a><a href="skills/t/v1/">v1</a>',
+             "skills/t/index.html": '<a href="v1/index.html?x=1">v1</a><a href="../">back</a>'}
+    outputs, mapping = fingerprint_site(pages)
+    page = mapping["skills/t/v1/index.html"]
+    assert page.startswith("skills/t/v1/index.") and page.endswith(".html")
+    html = outputs[page].decode()
+    # 内联 JS/CSS 抽出，CDN、JSON 数据块保持原样，原路径保留同样内容
+    js = mapping["skills/t/v1/index.html#js-2"]
+    assert outputs[js] == b"init();"
+    assert f'<script type="module" src="{js.split("/")[-1]}"></script>' in html
+    assert '<link rel="stylesheet" href="index-1.' in html and "<style>" not in html
+    assert '<script type="application/json">{"a":1}</script>' in html
+    assert outputs["skills/t/v1/index.html"] == outputs[page]
+    name = page.split("/")[-1]
+    assert outputs["index.html"].decode() == (f'<a href="skills/t/v1/{name}#demo">v1</a>'
+                                              f'<a href="skills/t/v1/{name}">v1</a>')
+    assert outputs["skills/t/index.html"].decode() == f'<a href="v1/{name}?x=1">v1</a><a href="../">back</a>'
+    # 脚本内容变化 → 资源与页面的指纹都变化
+    changed, mapping2 = fingerprint_site({"skills/t/v1/index.html": PAGE.replace("init", "start")})
+    assert mapping2["skills/t/v1/index.html"] != page and mapping2["skills/t/v1/index.html#js-2"] != js
+
+
+def test_builder_prunes_stale_fingerprints():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        src = root / "skills/t/v1/index.html"
+        src.parent.mkdir(parents=True)
+        src.write_text(PAGE, encoding="utf-8")
+        builder = AssetBuilder(tmp, str(root / "dist"), jobs=1)
+        builder.build()
+        first = dict(builder.assets)
+        src.write_text(PAGE.replace("init", "start"), encoding="utf-8")
+        builder.build()
+        for old in set(first.values()) - set(builder.assets.values()):
+            assert not (root / "dist" / old).exists() and not (root / "dist" / (old + ".gz")).exists()
+        for new in builder.assets.values():
+            assert (root / "dist" / new).exists()
+        manifest = json.loads((root / "dist/asset-manifest.json").read_text(encoding="utf-8"))
+        assert manifest["files"] == builder.assets
+        headers = (root / "dist/_headers").read_text(encoding="utf-8")
+        assert f"/{builder.assets['skills/t/v1/index.html']}\n  Cache-Control: public" in headers
+
+
+def main():
+    tests = [test_minify_js_tokens, test_minify_js_asi, test_minify_css, test_minify_html_raw_blocks,
+             test_fingerprint_site, test_builder_prunes_stale_fingerprints]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
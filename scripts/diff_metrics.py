@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+📐 ThreeJSEvolution diff 统计
+流式解析 unified diff：边读边统计，不保存 patch 内容
+
+每个文件记录新增/删除/上下文行数、hunk 数与涉及的函数：
+    函数名取自 @@ 头后的上下文 (git 给出的所在函数) 与增删行中的定义
+    (function foo / foo = function / foo = () => / 方法 foo() { / def foo)
+内存只随文件数与函数名增长，两者都有上限；patch 行数与 @@ 头不符时照常统计并标记 malformed。
+
+Usage:
+    git diff | python3 scripts/diff_metrics.py
+"""
+
+import json
+import re
+import sys
+from typing import Dict, Iterable, Optional, TextIO, Union
+
+_HUNK = re.compile(r"^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@ ?(.*)$")
+_DEFINITIONS = [
+    re.compile(r"\bfunction\s*\*?\s*([A-Za-z_$][\w$]*)\s*\("),
+    re.compile(r"([A-Za-z_$][\w$]*)\s*[:=]\s*(?:async\s+)?function\b"),
+    re.compile(r"([A-Za-z_$][\w$]*)\s*[:=]\s*(?:async\s+)?(?:\([^()]*\)|[A-Za-z_$][\w$]*)\s*=>"),
+    re.compile(r"^\s*(?:static\s+|async\s+|get\s+|set\s+)*([A-Za-z_$][\w$]*)\s*\([^()]*\)\s*\{"),
+    re.compile(r"^\s*(?:async\s+)?def\s+([A-Za-z_]\w*)\s*\("),
+]
+_KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return", "with", "else"}
+
+MAX_FILES = 200
+MAX_FUNCTIONS = 50
+CHUNK_SIZE = 64 * 1024
+
+
+def touched_functions(line: str) -> Iterable[str]:
+    """一行代码中定义的函数名"""
+    for pattern in _DEFINITIONS:
+        for name in pattern.findall(line):
+            if name not in _KEYWORDS:
+                yield name
+
+
+def _path(header: str) -> str:
+    path = header.split("\t", 1)[0].strip()
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+class DiffStatsParser:
+    """增量解析器：feed() 任意切分的文本块，close() 返回统计"""
+
+    def __init__(self, max_files: int = MAX_FILES, max_functions: int = MAX_FUNCTIONS):
+        self.max_files = max_files
+        self.max_functions = max_functions
+        self.totals = {"files": 0, "added": 0, "removed": 0, "context": 0, "hunks": 0}
+        self.per_file: Dict[str, Dict] = {}
+        self.functions = set()
+        self.malformed = False
+        self._buffer = ""
+        self._file: Optional[Dict] = None
+        self._old_path: Optional[str] = None
+        self._git_path: Optional[str] = None
+        self._old_left = self._new_left = 0
+
+    # 输入
+
+    def feed(self, chunk: str):
+        lines = (self._buffer + chunk).split("\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self.feed_line(line)
+
+    def feed_line(self, line: str):
+        line = line.rstrip("\r")
+        if self._old_left > 0 or self._new_left > 0:
+            self._body(line)
+        elif line.startswith("diff --git "):
+            parts = line.split(" b/", 1)
+            self._git_path = parts[1] if len(parts) == 2 else None
+            self._start(self._git_path)
+        elif line.startswith("--- "):
+            self._old_path = _path(line[4:])
+        elif line.startswith("+++ "):
+            path = _path(line[4:])
+            if path == "/dev/null":
+                path = self._old_path
+            if self._git_path is None or path != self._git_path:
+                self._start(path)
+            self._git_path = None
+        elif line.startswith("@@"):
+            self._hunk(line)
+        elif line[:1] in ("+", "-") and self._file is not None:
+            # @@ 头声明的行数用完后仍有增删行：patch 不完整，照常计入
+            self.malformed = True
+            self._body(line)
+
+    def close(self) -> Dict:
+        if self._buffer:
+            self.feed_line(self._buffer)
+            self._buffer = ""
+        if self._old_left > 0 or self._new_left > 0:
+            self.malformed = True
+        return self.result()
+
+    # 状态
+
+    def _start(self, path: Optional[str]):
+        self.totals["files"] += 1
+        self._file = {"added": 0, "removed": 0, "context": 0, "hunks": 0, "functions": set()}
+        if path is not None and len(self.per_file) < self.max_files:
+            self.per_file[path] = self._file
+
+    def _hunk(self, line: str):
+        m = _HUNK.match(line)
+        if m is None:
+            self.malformed = True
+            return
+        if self._file is None:
+            self._start("?")
+        self._old_left = int(m.group(1) or 1)
+        self._new_left = int(m.group(2) or 1)
+        self._file["hunks"] += 1
+        self.totals["hunks"] += 1
+        self._functions(m.group(3))
+
+    def _body(self, line: str):
+        op = line[:1]
+        if op == "+":
+            self._count("added")
+            self._new_left -= 1
+            self._functions(line[1:])
+        elif op == "-":
+            self._count("removed")
+            self._old_left -= 1
+            self._functions(line[1:])
+        elif op == "\\":
+            return  # \ No newline at end of file
+        else:
+            # 空行视为被编辑器去掉了前导空格的上下文行
+            self._count("context")
+            self._old_left -= 1
+            self._new_left -= 1
+
+    def _count(self, key: str):
+        self._file[key] += 1
+        self.totals[key] += 1
+
+    def _functions(self, text: str):
+        if not text:
+            return
+        for name in touched_functions(text):
+            if len(self._file["functions"]) < self.max_functions:
+                self._file["functions"].add(name)
+            if len(self.functions) < self.max_functions:
+                self.functions.add(name)
+
+    # 输出
+
+    def result(self) -> Dict:
+        totals = self.totals
+        result = dict(totals)
+        result["churn"] = totals["added"] + totals["removed"]
+        result["net"] = totals["added"] - totals["removed"]
+        result["functions"] = sorted(self.functions)
+        result["per_file"] = {
+            path: {**{k: v for k, v in stats.items() if k != "functions"},
+                   "functions": sorted(stats["functions"])}
+            for path, stats in self.per_file.items()
+        }
+        if self.malformed:
+            result["malformed"] = True
+        return result
+
+
+def parse_diff(source: Union[str, TextIO], sink: Optional[TextIO] = None) -> Dict:
+    """统计 diff 文本或文件对象；给出 sink 时同时把原文写入 (一次读完即可落盘并统计)"""
+    parser = DiffStatsParser()
+    if isinstance(source, str):
+        if sink is not None:
+            sink.write(source)
+        parser.feed(source)
+        return parser.close()
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if sink is not None:
+            sink.write(chunk)
+        parser.feed(chunk)
+    return parser.close()
+
+
+def mutation_diff(tracker, mutation: Dict) -> Optional[Dict]:
+    """记录中的 diff 统计；早期记录没有时流式解析其 patch (不写回)"""
+    diff = (mutation.get("metrics") or {}).get("diff")
+    if diff is not None:
+        return diff
+    patch = tracker.patches_dir / f"{mutation['mutation_id']}.patch"
+    if not patch.exists():
+        return None
+    with open(patch, 'r', encoding='utf-8') as f:
+        return parse_diff(f)
+
+
+def registry_churn(tracker, by: str = "target_skill") -> Dict[str, Dict]:
+    """按技能 (或 agent_id 等字段) 汇总代码增长与变动"""
+    groups: Dict[str, Dict] = {}
+    for mutation in tracker.iter_mutations():
+        diff = mutation_diff(tracker, mutation)
+        group = groups.setdefault(str(mutation.get(by)), {
+            "mutations": 0, "measured": 0, "added": 0, "removed": 0, "churn": 0, "net": 0, "hunks": 0})
+        group["mutations"] += 1
+        if diff is None:
+            continue
+        group["measured"] += 1
+        for key in ("added", "removed", "churn", "net", "hunks"):
+            group[key] += diff[key]
+    return dict(sorted(groups.items()))
+
+
+if __name__ == "__main__":
+    print(json.dumps(parse_diff(sys.stdin), indent=2, ensure_ascii=False))
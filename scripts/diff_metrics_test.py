@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+📐 ThreeJSEvolution diff 统计自检
+逐行计数、函数识别、任意切分的流式输入、log 时写入 metrics
+"""
+
+import io
+import random
+import sys
+import tempfile
+
+from diff_metrics import DiffStatsParser, parse_diff, registry_churn
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+
+PATCH = """diff --git a/skills/threejs/v1_x/index.html b/skills/threejs/v1_x/index.html
+index abc1234..def5678 100644
+--- a/skills/threejs/v1_x/index.html
++++ b/skills/threejs/v1_x/index.html
+@@ -10,3 +10,5 @@ function animate() {
+     renderer.render(scene, camera);
+-    stats.update();
++    stats.end();
++    const spawn = (x) => makeBox(x);
++    // --- 分隔
+ }
+@@ -40,2 +42,2 @@ class World {
+-    step(dt) {
++    async step(dt) {
+     }
+--- a/old.js
++++ /dev/null
+@@ -1,2 +0,0 @@
+-function legacy() {}
+-legacy();
+\\ No newline at end of file
+"""
+
+
+def test_counts_and_functions():
+    stats = parse_diff(PATCH)
+    assert (stats["files"], stats["added"], stats["removed"], stats["context"], stats["hunks"]) == (2, 4, 4, 3, 3)
+    assert stats["churn"] == 8 and stats["net"] == 0 and "malformed" not in stats
+    page = stats["per_file"]["skills/threejs/v1_x/index.html"]
+    assert (page["added"], page["removed"], page["hunks"]) == (4, 2, 2)
+    assert page["functions"] == ["animate", "spawn", "step"]
+    assert stats["per_file"]["old.js"]["functions"] == ["legacy"]
+
+
+def test_chunked_feed_matches():
+    expected = parse_diff(PATCH)
+    rng = random.Random(7)
+    for _ in range(50):
+        parser = DiffStatsParser()
+        i = 0
+        while i < len(PATCH):
+            n = rng.randint(1, 40)
+            parser.feed(PATCH[i:i + n])
+            i += n
+        assert parser.close() == expected
+    assert parse_diff(io.StringIO(PATCH)) == expected
+
+
+def test_malformed_and_bounded():
+    # @@ 头声明 1 行，实际多出 2 行
+    stats = parse_diff("--- a/f\n+++ b/f\n@@ -1 +1 @@\n-a\n+b\n+c\n+d\n")
+    assert stats["added"] == 3 and stats["malformed"] is True
+    parser = DiffStatsParser(max_functions=3)
+    parser.feed("--- a/f\n+++ b/f\n@@ -0,0 +1,10 @@\n")
+    parser.feed("".join(f"+function f{n}() {{}}\n" for n in range(10)))
+    assert len(parser.close()["functions"]) == 3
+
+
+def test_log_records_metrics():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        tracker.save_mutation({"mutation_id": "gen-v1-base", "parent_id": "null", "target_skill": "threejs"})
+        mutation_id = tracker.log_mutation("gen-v1-base", "tester", "threejs", "optimization",
+                                           "流式", io.StringIO(PATCH), "+1%", metrics={"render_fps": 60})
+        mutation = tracker.load_mutation(mutation_id)
+        assert mutation["metrics"]["code_lines"] == 8 and mutation["metrics"]["render_fps"] == 60
+        assert mutation["metrics"]["diff"] == parse_diff(PATCH)
+        assert (tracker.patches_dir / f"{mutation_id}.patch").read_text(encoding="utf-8") == PATCH
+        churn = registry_churn(tracker)
+        assert churn["threejs"]["mutations"] == 2 and churn["threejs"]["churn"] == 8
+
+
+def main():
+    tests = [test_counts_and_functions, test_chunked_feed_matches, test_malformed_and_bounded,
+             test_log_records_metrics]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+🏭 ThreeJSEvolution 候选评估调度
+把一批候选 mutation 放进优先队列，由有上限的进程池并行评估，结果边完成边写回 registry
+
+每个候选的评估 (在独立的 worker 进程中)：
+1. 物化页面 - 旧记录直接用 diff_url，其余沿谱系重建到 checkout/<id>/
+2. 静态检查 - HTML 结构、内联脚本语法 (与 watch 相同)、加载体积、代码复杂度
+3. 无头基准 - 有浏览器且 --trials > 0 时复用 gate 的遥测基准，取各轮中位数
+
+调度：
+    优先级    数值大的先评估，默认取声明的 performance_delta (声称提升越多越先验证)
+    超时      worker 连同它启动的浏览器在同一进程组，超时整组杀掉
+    重试      超时或崩溃 (没有输出结果) 的任务重新入队；检查失败是确定的，不重试
+    去重      --pending 跳过 log 时标记为近似重复 (near_duplicates) 的候选，
+              前提是相似的记录已经评估过或在同一批中 (见 similarity_index.py)
+    资源限制  worker 的 CPU 秒数 (RLIMIT_CPU) 与可选的地址空间上限 (RLIMIT_AS)
+每个任务一个新进程，卡死或超限的 worker 不会拖累其余任务；结果只由调度进程写回，
+写入 mutation 的 evaluation 字段 (不参与 content_hash)。
+
+Usage:
+    python3 scripts/evolution_tracker.py evaluate <mutation_id ...> [--pending] [--jobs 4]
+        [--timeout 120] [--retries 1] [--memory-mb N] [--trials 1] [--duration 3] [--priority ID=N]
+        [--include-duplicates]
+"""
+
+import argparse
+import heapq
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from evolution_tracker import EvolutionTracker, default_registry
+from instrument import configure, traced
+
+DEFAULT_JOBS = max(1, (os.cpu_count() or 2) // 2)
+DEFAULT_TIMEOUT = 120.0
+# 调度循环检查 worker 状态的间隔 (秒)
+POLL_INTERVAL = 0.05
+# 没有产出结果、值得重跑的状态
+RETRYABLE = ("timeout", "crashed")
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2.0
+
+
+@traced("evaluate.mutation")
+def evaluate_mutation(tracker: EvolutionTracker, mutation_id: str, trials: int = 1,
+                      duration: float = 3.0, browser: Optional[str] = None) -> Dict:
+    """在当前进程评估一个候选 (worker 调用)"""
+    from js_complexity import analyze_script, combine, inline_scripts, stars
+    from materialize import MaterializeError, Materializer
+    from perf_gate import BrowserBench, find_browser, load_size
+    from watch import check_page
+
+    try:
+        page = Materializer(tracker).page_path(mutation_id)
+    except MaterializeError as e:
+        return {"status": "error", "error": str(e)}
+    if page is None:
+        return {"status": "error", "error": "没有可测试的页面"}
+
+    checks = check_page(page)
+    html = page.read_text(encoding="utf-8")
+    complexity = combine(analyze_script(code) for _, code in inline_scripts(html))
+    result = {
+        "page": page.relative_to(tracker.registry).as_posix(),
+        "checks": [{"name": name, "ok": ok, "message": message} for name, ok, message in checks],
+        "size": load_size(page),
+        "complexity": stars(complexity),
+        "bench": None,
+    }
+
+    browser = browser or (find_browser() if trials > 0 else None)
+    if browser and trials > 0:
+        bench = BrowserBench(tracker, tracker.registry, browser, duration)
+        samples: Dict[str, List[float]] = {}
+        try:
+            for _ in range(trials):
+                stats = bench.run(page)
+                for key, value in (stats or {}).items():
+                    samples.setdefault(key, []).append(value)
+        finally:
+            bench.close()
+        if samples:
+            result["bench"] = {key: round(_median(values), 3) for key, values in samples.items()}
+            result["bench"]["trials"] = len(samples["frame_p50_ms"])
+
+    result["status"] = "passed" if all(ok for _, ok, _ in checks) else "failed"
+    return result
+
+
+def rank_key(result: Dict):
+    """通过检查的候选排序：先比帧时间，再比 gzip 体积"""
+    bench = result.get("bench") or {}
+    return (bench.get("frame_p50_ms", float("inf")), (result.get("size") or {}).get("gzip_bytes", 0))
+
+
+class Task:
+    """队列中的一个候选"""
+
+    __slots__ = ("mutation_id", "priority", "attempt")
+
+    def __init__(self, mutation_id: str, priority: float = 0.0):
+        self.mutation_id = mutation_id
+        self.priority = priority
+        self.attempt = 0
+
+
+class Scheduler:
+    """优先队列 + 有上限的 worker 进程池"""
+
+    def __init__(self, tracker: EvolutionTracker, jobs: int = DEFAULT_JOBS,
+                 timeout: float = DEFAULT_TIMEOUT, retries: int = 1,
+                 memory_mb: Optional[int] = None, worker_args: Optional[List[str]] = None,
+                 record: bool = True):
+        self.tracker = tracker
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.retries = retries
+        self.memory_mb = memory_mb
+        self.worker_args = worker_args or []
+        self.record = record
+        self.queue: List = []
+        self._seq = 0
+        self.results: Dict[str, Dict] = {}
+
+    def submit(self, mutation_id: str, priority: float = 0.0):
+        self._push(Task(mutation_id, priority))
+
+    def _push(self, task: Task):
+        # 同优先级按提交顺序；重试的任务排在同优先级的新任务之后
+        heapq.heappush(self.queue, (-task.priority, self._seq, task))
+        self._seq += 1
+
+    def command(self, task: Task) -> List[str]:
+        """worker 命令行：本脚本的 --worker 模式"""
+        return [sys.executable, str(Path(__file__).resolve()), "--worker", task.mutation_id,
+                "--registry", str(self.tracker.registry)] + self.worker_args
+
+    def _limits(self):
+        """fork 之后、exec 之前在 worker 中执行"""
+        try:
+            import resource
+        except ImportError:
+            return
+        cpu = int(self.timeout) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 5))
+        if self.memory_mb:
+            limit = self.memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    def _start(self, task: Task) -> Dict:
+        task.attempt += 1
+        out, err = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+        proc = subprocess.Popen(self.command(task), stdin=subprocess.DEVNULL, stdout=out, stderr=err,
+                                start_new_session=True,
+                                preexec_fn=self._limits if os.name == "posix" else None)
+        now = time.monotonic()
+        return {"task": task, "proc": proc, "out": out, "err": err, "start": now,
+                "deadline": now + self.timeout}
+
+    def _collect(self, job: Dict, timed_out: bool) -> Dict:
+        proc = job["proc"]
+        if timed_out:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except (OSError, AttributeError):
+                proc.kill()
+            proc.wait()
+            result = {"status": "timeout", "error": f"超过 {self.timeout:g} 秒"}
+        else:
+            job["out"].seek(0)
+            lines = job["out"].read().decode("utf-8", errors="replace").strip().splitlines()
+            try:
+                result = json.loads(lines[-1])
+            except (IndexError, ValueError):
+                job["err"].seek(0)
+                stderr = job["err"].read().decode("utf-8", errors="replace").strip().splitlines()
+                result = {"status": "crashed",
+                          "error": f"退出码 {proc.returncode}" + (f": {stderr[-1][:200]}" if stderr else "")}
+        job["out"].close()
+        job["err"].close()
+        result["attempts"] = job["task"].attempt
+        result["seconds"] = round(time.monotonic() - job["start"], 3)
+        return result
+
+    def finish(self, task: Task, result: Dict):
+        """结果写回 registry (只有调度进程写，不会与 worker 竞争)"""
+        result["timestamp"] = datetime.utcnow().isoformat() + "Z"
+        self.results[task.mutation_id] = result
+        if self.record:
+            mutation = self.tracker.load_mutation(task.mutation_id)
+            mutation["evaluation"] = result
+            self.tracker.save_mutation(mutation)
+
+    @traced("evaluate.run")
+    def run(self, on_result: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+        running: List[Dict] = []
+        try:
+            while self.queue or running:
+                while self.queue and len(running) < self.jobs:
+                    running.append(self._start(heapq.heappop(self.queue)[2]))
+                time.sleep(POLL_INTERVAL)
+                now = time.monotonic()
+                for job in list(running):
+                    finished = job["proc"].poll() is not None
+                    if not finished and now < job["deadline"]:
+                        continue
+                    running.remove(job)
+                    task, result = job["task"], self._collect(job, not finished)
+                    if result["status"] in RETRYABLE and task.attempt <= self.retries:
+                        self._push(task)
+                        continue
+                    self.finish(task, result)
+                    if on_result is not None:
+                        on_result(task.mutation_id, result)
+        finally:
+            # 中断时不留下孤儿 worker 与浏览器
+            for job in running:
+                self._collect(job, True)
+        return self.results
+
+
+def default_priority(mutation: Dict) -> float:
+    from mutation_record import parse_delta
+    return parse_delta(mutation.get("claimed_performance_delta") or mutation.get("performance_delta")) or 0.0
+
+
+def skip_duplicates(tracker: EvolutionTracker, candidates: Dict[str, Dict], queued: set) -> Dict[str, str]:
+    """log 时标记为近似重复、且相似的记录已评估或同批排队的候选 → {候选: 相似记录}
+
+    按时间从旧到新处理，被跳过的候选移出队列：C 只与被跳过的 B 相似时照常评估，不会沿链传递。
+    """
+    skipped = {}
+    queued = set(queued)
+    order = sorted(candidates.items(), key=lambda item: (item[1].get("timestamp") or "", item[0]))
+    for mutation_id, mutation in order:
+        for dup in mutation.get("near_duplicates", []):
+            other = dup["mutation_id"]
+            if other in queued or (tracker.has_mutation(other)
+                                   and "evaluation" in tracker.load_mutation(other)):
+                skipped[mutation_id] = other
+                queued.discard(mutation_id)
+                break
+    return skipped
+
+
+def report(mutation_id: str, result: Dict):
+    symbol = {"passed": "✅", "failed": "❌", "timeout": "⏱️"}.get(result["status"], "💥")
+    retried = f"，第 {result['attempts']} 次" if result["attempts"] > 1 else ""
+    line = f"{symbol} {mutation_id:<24} {result['status']:<8} {result['seconds']:.1f}s{retried}"
+    if result.get("error"):
+        line += f"  {result['error']}"
+    elif result["status"] != "passed":
+        failed = [c["name"] for c in result["checks"] if not c["ok"]]
+        line += f"  {', '.join(failed)}"
+    else:
+        bench = result.get("bench")
+        line += f"  gzip {result['size']['gzip_bytes']} B  {result['complexity']}"
+        if bench:
+            line += f"  p50 {bench['frame_p50_ms']} ms"
+    print(line)
+    sys.stdout.flush()
+
+
+def main(argv: Optional[List[str]] = None, tracker: Optional[EvolutionTracker] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 候选评估调度")
+    parser.add_argument("mutation_ids", nargs="*")
+    parser.add_argument("--registry", default=default_registry())
+    parser.add_argument("--pending", action="store_true", help="加入所有还没有 evaluation 的记录")
+    parser.add_argument("--include-duplicates", action="store_true",
+                        help="--pending 时不跳过 log 标记的近似重复记录")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="并行 worker 数")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="单个任务的超时 (秒)")
+    parser.add_argument("--retries", type=int, default=1, help="超时或崩溃后的重试次数")
+    parser.add_argument("--memory-mb", type=int, help="worker 地址空间上限 (无头浏览器需要留足)")
+    parser.add_argument("--trials", type=int, default=1, help="无头基准轮数 (0 = 只做静态检查)")
+    parser.add_argument("--duration", type=float, default=3.0, help="每轮基准秒数")
+    parser.add_argument("--browser", help="浏览器可执行文件 (默认自动查找)")
+    parser.add_argument("--priority", action="append", default=[], metavar="ID=N",
+                        help="指定优先级 (数值大的先评估)")
+    parser.add_argument("--dry-run", action="store_true", help="只输出结果，不写回")
+    parser.add_argument("--worker", metavar="ID", help=argparse.SUPPRESS)
+    args = parser.parse_args(configure(sys.argv[1:] if argv is None else argv))
+
+    tracker = tracker or EvolutionTracker(args.registry)
+    if args.worker:
+        result = evaluate_mutation(tracker, args.worker, args.trials, args.duration, args.browser)
+        print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    try:
+        ids = [tracker.resolve_id(text) for text in args.mutation_ids]
+        overrides = {}
+        for spec in args.priority:
+            text, _, value = spec.partition("=")
+            overrides[tracker.resolve_id(text)] = float(value)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.pending:
+        pending = {m["mutation_id"]: m for m in tracker.iter_mutations()
+                   if "evaluation" not in m and m["mutation_id"] not in ids}
+        if not args.include_duplicates:
+            for mutation_id, other in skip_duplicates(tracker, pending, set(ids) | set(pending)).items():
+                print(f"⏭️ 跳过 {mutation_id}: 与 {other} 近似重复")
+                del pending[mutation_id]
+        ids += list(pending)
+    if not ids:
+        print("❌ 没有要评估的 mutation")
+        return 1
+
+    worker_args = ["--trials", str(args.trials), "--duration", str(args.duration)]
+    if args.browser:
+        worker_args += ["--browser", args.browser]
+    scheduler = Scheduler(tracker, args.jobs, args.timeout, args.retries, args.memory_mb,
+                          worker_args, record=not args.dry_run)
+    for mutation_id in ids:
+        priority = overrides.get(mutation_id)
+        if priority is None:
+            priority = default_priority(tracker.load_mutation(mutation_id))
+        scheduler.submit(mutation_id, priority)
+
+    print(f"🏭 评估 {len(ids)} 个候选，{scheduler.jobs} 个 worker，超时 {args.timeout:g}s")
+    start = time.perf_counter()
+    try:
+        results = scheduler.run(report)
+    except KeyboardInterrupt:
+        print("⚠️ 已中断，已完成的结果已写回")
+        return 1
+
+    passed = sorted((r for r in results.items() if r[1]["status"] == "passed"), key=lambda r: rank_key(r[1]))
+    print(f"📊 {len(passed)}/{len(results)} 通过，用时 {time.perf_counter() - start:.1f}s")
+    for mutation_id, _ in passed[:5]:
+        print(f"   🏆 {mutation_id}")
+    return 0 if len(passed) == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
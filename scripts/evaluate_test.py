@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+🏭 ThreeJSEvolution 候选评估调度自检
+worker 评估 (物化 + 静态检查)、优先级顺序、超时杀进程组、崩溃重试、资源限制、结果写回、近似重复跳过
+"""
+
+import sys
+import tempfile
+import time
+
+from evaluate import Scheduler, Task, evaluate_mutation, skip_duplicates
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body><script>
+function loop(t) { if (t > 0) { requestAnimationFrame(loop); } }
+</script></body></html>
+"""
+
+# 按 mutation ID 决定行为的假 worker
+FAKE_WORKER = r"""
+import json, sys, time
+mutation_id, attempt = sys.argv[1], int(sys.argv[2])
+if mutation_id == "gen-v1-slow":
+    time.sleep(30)
+if mutation_id == "gen-v1-flaky" and attempt == 1:
+    sys.exit("worker 崩溃")
+if mutation_id == "gen-v1-hog":
+    data = bytearray(1024 * 1024 * 1024)
+print("调试输出")
+print(json.dumps({"status": "passed", "started": time.time()}))
+"""
+
+
+class FakeScheduler(Scheduler):
+    def command(self, task: Task):
+        return [sys.executable, "-c", FAKE_WORKER, task.mutation_id, str(task.attempt)]
+
+
+def _tracker(tmp: str, ids) -> EvolutionTracker:
+    tracker = EvolutionTracker(tmp)
+    for mutation_id in ids:
+        tracker.save_mutation({"mutation_id": mutation_id, "parent_id": "null", "target_skill": "t",
+                               "performance_delta": "+0%"})
+    return tracker
+
+
+def test_worker_evaluates_materialized_page():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp, [])
+        page = tracker.registry / "skills/t/v1_base/index.html"
+        page.parent.mkdir(parents=True)
+        page.write_text(PAGE, encoding="utf-8")
+        tracker.save_mutation({"mutation_id": "gen-v1-base", "parent_id": "null", "target_skill": "t",
+                               "diff_url": "skills/t/v1_base/index.html", "performance_delta": "baseline"})
+        tracker.save_mutation({"mutation_id": "gen-v1-empty", "parent_id": "null", "target_skill": "t",
+                               "performance_delta": "+0%"})
+
+        result = evaluate_mutation(tracker, "gen-v1-base", trials=0)
+        assert result["status"] == "passed" and result["bench"] is None
+        assert result["page"] == "skills/t/v1_base/index.html"
+        assert result["size"]["raw_bytes"] == len(PAGE.encode("utf-8"))
+        assert result["complexity"] == "★☆☆☆☆"
+
+        # 真实 worker 进程：结果写回记录，没有页面的记录报错但不影响其他任务
+        scheduler = Scheduler(tracker, jobs=2, timeout=60, worker_args=["--trials", "0"])
+        scheduler.submit("gen-v1-base")
+        scheduler.submit("gen-v1-empty")
+        results = scheduler.run()
+        assert results["gen-v1-empty"]["status"] == "error" and results["gen-v1-empty"]["attempts"] == 1
+        evaluation = tracker.load_mutation("gen-v1-base")["evaluation"]
+        assert evaluation["status"] == "passed" and evaluation["checks"] == result["checks"]
+
+
+def test_priority_order_with_single_worker():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp, ["gen-v1-a", "gen-v1-b", "gen-v1-c", "gen-v1-d"])
+        scheduler = FakeScheduler(tracker, jobs=1, record=False)
+        for mutation_id, priority in (("gen-v1-a", 0), ("gen-v1-b", 15), ("gen-v1-c", 0), ("gen-v1-d", 40)):
+            scheduler.submit(mutation_id, priority)
+        order = []
+        scheduler.run(lambda mutation_id, result: order.append(mutation_id))
+        # 优先级高的先评估，同优先级按提交顺序
+        assert order == ["gen-v1-d", "gen-v1-b", "gen-v1-a", "gen-v1-c"]
+        # record=False (--dry-run) 不写回
+        assert "evaluation" not in tracker.load_mutation("gen-v1-a")
+
+
+def test_timeouts_retries_and_limits():
+    ids = ["gen-v1-ok", "gen-v1-slow", "gen-v1-flaky", "gen-v1-hog"]
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp, ids)
+        scheduler = FakeScheduler(tracker, jobs=4, timeout=1.0, retries=1, memory_mb=256)
+        for mutation_id in ids:
+            scheduler.submit(mutation_id)
+        start = time.monotonic()
+        results = scheduler.run()
+        # 慢任务超时两次 (首次 + 1 次重试) 后放弃，不会等满 30 秒
+        assert time.monotonic() - start < 10
+        assert results["gen-v1-slow"]["status"] == "timeout" and results["gen-v1-slow"]["attempts"] == 2
+        # 崩溃后重试成功；调试输出不影响结果解析
+        assert results["gen-v1-flaky"]["status"] == "passed" and results["gen-v1-flaky"]["attempts"] == 2
+        assert results["gen-v1-ok"]["status"] == "passed" and results["gen-v1-ok"]["attempts"] == 1
+        # 超出地址空间上限：MemoryError 退出，重试后仍失败
+        hog = results["gen-v1-hog"]
+        assert hog["status"] == "crashed" and "MemoryError" in hog["error"] and hog["attempts"] == 2
+        # 每个结果都写回了记录
+        for mutation_id in ids:
+            assert tracker.load_mutation(mutation_id)["evaluation"]["status"] == results[mutation_id]["status"]
+
+
+def test_duplicate_skips_do_not_chain():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp, [])
+        # B 与 A 相似，C 只与 B 相似 (与 A 差得较远)；三者都在同一批待评估
+        candidates = {}
+        for n, (mutation_id, near) in enumerate((("gen-v1-a", []), ("gen-v1-b", ["gen-v1-a"]),
+                                                 ("gen-v1-c", ["gen-v1-b"]))):
+            candidates[mutation_id] = {"mutation_id": mutation_id, "timestamp": f"2026-03-0{n + 1}T00:00:00Z",
+                                       "near_duplicates": [{"mutation_id": m, "similarity": 0.9} for m in near]}
+        # 传入顺序与时间顺序相反也一样：B 被跳过，C 照常评估
+        reverse = dict(reversed(list(candidates.items())))
+        assert skip_duplicates(tracker, reverse, set(candidates)) == {"gen-v1-b": "gen-v1-a"}
+        assert skip_duplicates(tracker, candidates, set(candidates)) == {"gen-v1-b": "gen-v1-a"}
+
+
+def main():
+    tests = [test_worker_evaluates_materialized_page, test_priority_order_with_single_worker,
+             test_timeouts_retries_and_limits, test_duplicate_skips_do_not_chain]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
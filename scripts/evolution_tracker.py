@@ -11,13 +11,30 @@
 """
 
 import json
-import hashlib
-import subprocess
-from datetime import datetime
+import os
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
 import sys
 
+# 同目录脚本 (materialize 等) 在被其他入口导入时也能找到
+SCRIPTS_DIR = str(Path(__file__).resolve().parent)
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from instrument import configure, span, traced  # noqa: E402
+
+
+def default_registry() -> str:
+    """命令行工具的默认基因库：EVOLUTION_REGISTRY，否则为 scripts/ 所在的仓库根目录"""
+    return os.environ.get("EVOLUTION_REGISTRY", str(Path(SCRIPTS_DIR).parent))
+
+
+def daemon_socket(registry: str) -> str:
+    """常驻服务的 socket：EVOLUTION_SOCKET，否则为 <registry>/logs/tracker.sock"""
+    return os.environ.get("EVOLUTION_SOCKET") or os.path.join(registry, "logs", "tracker.sock")
+
+
 class EvolutionTracker:
     """基因进化追踪器"""
 
@@ -26,33 +43,56 @@ class EvolutionTracker:
         self.mutations_dir = self.registry / "mutations"
         self.patches_dir = self.registry / "patches"
         self.logs_file = self.registry / "logs" / "evolution_log.json"
-
-        # 确保目录存在
-        self.mutations_dir.mkdir(parents=True, exist_ok=True)
-        self.patches_dir.mkdir(parents=True, exist_ok=True)
-        self.logs_file.parent.mkdir(parents=True, exist_ok=True)
+        self._diff_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._pack = None
+        self._query_index = None
+        self._id_index = None
+        self._similarity_index = None
+        # 目录在第一次写入时才创建，只读命令 (tree/compare/query) 不改动 registry
 
     def generate_mutation_id(self, version: str, skill: str) -> str:
         """生成唯一的进化ID"""
+        import hashlib
+        from datetime import datetime
         timestamp = datetime.now().strftime("%Y%m%d-%H%M")
         random_suffix = hashlib.md5(f"{version}{skill}{timestamp}".encode()).hexdigest()[:4]
         return f"gen-{version}-{random_suffix}"
 
+    @traced("tracker.log_mutation")
     def log_mutation(self,
                       parent_id: str,
                       agent_id: str,
                       skill: str,
                       change_type: str,
                       description: str,
-                      diff_content: str,
+                      diff_content: Union[str, TextIO],
                       performance_delta: str = "+0%",
                       metrics: Optional[Dict] = None) -> str:
-        """记录一次基因突变"""
+        """记录一次基因突变
+
+        diff_content 可以是字符串，也可以是文件对象 (如 stdin)：后者边写入 patch 边统计，
+        不在内存中保留完整 diff。
+        """
+        from datetime import datetime
+        from diff_metrics import parse_diff
 
         # 生成新 ID
         version = parent_id.split('-')[1]  # 从 parent 提取版本
         mutation_id = self.generate_mutation_id(version, skill)
 
+        # 保存 patch，同时统计增删行、hunk 与涉及的函数
+        with span("tracker.patch"):
+            self.patches_dir.mkdir(parents=True, exist_ok=True)
+            patch_file = self.patches_dir / f"{mutation_id}.patch"
+            with open(patch_file, 'w', encoding='utf-8') as f:
+                diff = parse_diff(diff_content, sink=f)
+
+        # 在 parent 的文件上应用 patch，静态分析新一代的脚本复杂度
+        from materialize import Materializer
+        materializer = Materializer(self)
+        with span("tracker.complexity"):
+            complexity = self._patched_complexity(materializer, parent_id, patch_file)
+
         # 构建 mutation 数据
         mutation = {
             "mutation_id": mutation_id,
@@ -65,33 +105,64 @@ class EvolutionTracker:
             "diff_url": f"patches/{mutation_id}.patch",
             "description": description,
             "changelog": [description],
-            "metrics": metrics or {
-                "code_lines": len(diff_content.split('\n')),
-                "complexity": "★★☆☆☆",
-                "test_coverage": "0%"
+            "metrics": {
+                "code_lines": diff["churn"],  # 增删的代码行，不含文件头与上下文
+                "test_coverage": "0%",
+                "diff": diff,
+                **(metrics or {})
             },
             "approved": False
         }
-
-        # 保存 mutation
-        mutation_file = self.mutations_dir / f"{mutation_id}.json"
-        with open(mutation_file, 'w', encoding='utf-8') as f:
-            json.dump(mutation, f, indent=2, ensure_ascii=False)
-
-        # 保存 patch
-        patch_file = self.patches_dir / f"{mutation_id}.patch"
-        with open(patch_file, 'w', encoding='utf-8') as f:
-            f.write(diff_content)
-
-        # 更新主日志
-        self._append_to_log(mutation)
+        if complexity is not None:
+            from js_complexity import stars
+            mutation["metrics"].setdefault("complexity", stars(complexity))
+            mutation["metrics"].setdefault("complexity_detail", complexity)
+
+        # 链式内容哈希 (标识字段 + patch + parent 的哈希)，sync 据此比较与校验
+        from registry_sync import stamp_new
+        mutation["content_hash"] = stamp_new(self, mutation)
+
+        # patch 与已有记录近似重复时标记出来，evaluate 据此跳过
+        with span("tracker.similarity"):
+            from similarity_index import flag_new
+            near = flag_new(self, mutation)
+        if near:
+            mutation["near_duplicates"] = near
+
+        with span("tracker.write"):
+            # 保存 mutation
+            self.save_mutation(mutation)
+
+            # 更新主日志
+            self._append_to_log(mutation)
+
+        # 每隔若干代保存完整快照，保证 checkout 只需回放有限个 patch
+        with span("tracker.snapshot"):
+            if materializer.after_log(mutation_id):
+                print(f"📸 快照已保存: snapshots/{mutation_id}/")
 
         print(f"🧬 Mutation 记录成功: {mutation_id}")
         print(f"📁 Patch: {patch_file}")
         print(f"📊 性能变化: {performance_delta}")
+        for dup in near:
+            print(f"⚠️ 与 {dup['mutation_id']} 近似重复 (相似度 {dup['similarity']:.2f})")
 
         return mutation_id
 
+    def _patched_complexity(self, materializer, parent_id: str, patch_file: Path) -> Optional[Dict]:
+        """parent 的文件应用 patch 后的复杂度汇总；parent 无法物化或 patch 不适用时为 None"""
+        from js_complexity import ComplexityCache
+        from materialize import MaterializeError, apply_patch
+        try:
+            files = apply_patch(materializer.checkout(parent_id),
+                                patch_file.read_text(encoding='utf-8'))
+        except (MaterializeError, ValueError):
+            return None
+        cache = ComplexityCache(self)
+        detail = cache.files(files)
+        cache.save()
+        return detail
+
     def _append_to_log(self, mutation: Dict):
         """追加到主日志"""
         logs = []
@@ -108,76 +179,322 @@ class EvolutionTracker:
             "timestamp": mutation["timestamp"]
         })
 
+        self.logs_file.parent.mkdir(parents=True, exist_ok=True)
         with open(self.logs_file, 'w', encoding='utf-8') as f:
             json.dump(logs, f, indent=2)
 
-    def get_evolution_tree(self, mutation_id: str = None) -> Dict:
-        """获取进化树"""
-        mutations = {}
+    @property
+    def pack(self):
+        """冷记录 packfile (见 mutation_pack.py)"""
+        if self._pack is None:
+            from mutation_pack import MutationPack
+            self._pack = MutationPack(self.registry)
+        return self._pack
+
+    def iter_mutations(self) -> Iterator[Dict]:
+        """逐条读取全部记录 (松散记录优先于 pack 中的同名记录)"""
+        loose = set()
         for f in self.mutations_dir.glob("*.json"):
-            with open(f, 'r') as mf:
+            with open(f, 'r', encoding='utf-8') as mf:
                 data = json.load(mf)
-                mutations[data['mutation_id']] = data
+            loose.add(data['mutation_id'])
+            yield data
+        for mutation_id, data in self.pack.items():
+            if mutation_id not in loose:
+                yield data
+
+    @property
+    def id_index(self):
+        """有序 ID 索引 (见 id_index.py)"""
+        if self._id_index is None:
+            from id_index import IdIndex
+            self._id_index = IdIndex(self)
+        return self._id_index
+
+    def resolve_id(self, text: str) -> str:
+        """完整 ID 或唯一前缀 → 完整 ID，找不到时的 ValueError 附带相近的 ID"""
+        return self.id_index.resolve(text)
+
+    @property
+    def query_index(self):
+        """属性查询的二级索引 (见 query_index.py)"""
+        if self._query_index is None:
+            from query_index import QueryIndex
+            self._query_index = QueryIndex(self)
+        return self._query_index
+
+    @property
+    def similarity_index(self):
+        """近似重复检测的 MinHash/LSH 索引 (见 similarity_index.py)"""
+        if self._similarity_index is None:
+            from similarity_index import SimilarityIndex
+            self._similarity_index = SimilarityIndex(self)
+        return self._similarity_index
+
+    @traced("tracker.load_tree")
+    def get_evolution_tree(self, mutation_id: str = None) -> Dict:
+        """获取进化树 (pack 与松散记录合并，松散记录优先)"""
+        return {data['mutation_id']: data for data in self.iter_mutations()}
 
-        return mutations
+    @traced("tracker.load_records")
+    def get_records(self) -> Dict:
+        """紧凑的进化树 {id: Mutation}：只常驻热字段，冷字段访问时再读取
 
-    def compare_mutations(self, id1: str, id2: str) -> Dict:
-        """对比两次突变"""
-        tracker = EvolutionTracker()
-        tree = tracker.get_evolution_tree()
+        生成谱系、统计等只看 ID/parent/时间/delta 的分析应使用它而不是 get_evolution_tree。
+        """
+        from mutation_record import compact_tree
+        return compact_tree(self.iter_mutations(), self.load_mutation)
 
-        if id1 not in tree or id2 not in tree:
-            raise ValueError(f"未知 mutation ID: {id1} 或 {id2}")
+    def load_mutation(self, mutation_id: str) -> Dict:
+        """读取单个 mutation 记录"""
+        mutation_file = self.mutations_dir / f"{mutation_id}.json"
+        if not mutation_file.exists():
+            packed = self.pack.get(mutation_id)
+            if packed is None:
+                raise ValueError(f"未知 mutation ID: {mutation_id}")
+            return packed
+        with open(mutation_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def has_mutation(self, mutation_id: str) -> bool:
+        return (self.mutations_dir / f"{mutation_id}.json").exists() or mutation_id in self.pack
+
+    def save_mutation(self, mutation: Dict):
+        """写回 mutation 记录 (已打包的记录写成松散文件，覆盖 pack 中的旧版本)"""
+        self.mutations_dir.mkdir(parents=True, exist_ok=True)
+        mutation_file = self.mutations_dir / f"{mutation['mutation_id']}.json"
+        with open(mutation_file, 'w', encoding='utf-8') as f:
+            json.dump(mutation, f, indent=2, ensure_ascii=False)
+        self.query_index.update(mutation)
+        if self.id_index.path.exists():
+            self.id_index.add(mutation['mutation_id'])
+
+    def update_metrics(self, mutation_id: str, metrics: Dict) -> Dict:
+        """合并实测指标到 mutation 的 metrics"""
+        mutation = self.load_mutation(mutation_id)
+        mutation.setdefault("metrics", {}).update(metrics)
+        self.save_mutation(mutation)
+        return mutation
+
+    def page_for(self, mutation: Dict) -> Optional[Path]:
+        """mutation 对应的技能页面 (diff_url 指向完整 HTML 时)"""
+        diff_url = mutation.get("diff_url", "")
+        if not diff_url.endswith(".html"):
+            return None
+        return self.registry / diff_url
+
+    # compare --diff 结果的 LRU 缓存容量 (按 ID 对)
+    DIFF_CACHE_SIZE = 64
+
+    @traced("tracker.diff")
+    def diff_mutations(self, id1: str, id2: str) -> str:
+        """两代技能文件之间的 unified diff (先物化，再用 patience 算法比较)"""
+        key = (id1, id2)
+        if key in self._diff_cache:
+            self._diff_cache.move_to_end(key)
+            return self._diff_cache[key]
+
+        from materialize import Materializer, diff_files
+        materializer = Materializer(self)
+        text = diff_files(materializer.checkout(id1), materializer.checkout(id2))
+        self._diff_cache[key] = text
+        if len(self._diff_cache) > self.DIFF_CACHE_SIZE:
+            self._diff_cache.popitem(last=False)
+        return text
+
+    @traced("tracker.compare")
+    def compare_mutations(self, id1: str, id2: str, diff: bool = False) -> Dict:
+        """对比两次突变 (diff=True 时附带文件级 diff)"""
+        id1, id2 = self.resolve_id(id1), self.resolve_id(id2)
+        tree = self.get_records()
 
         m1, m2 = tree[id1], tree[id2]
+        depths = self.generation_depths(tree)
 
-        return {
+        result = {
             "from": id1,
             "to": id2,
-            "generations_apart": int(m2['mutation_id'].split('-')[1]) - int(m1['mutation_id'].split('-')[1]),
+            "generations_apart": depths[id2] - depths[id1],
             "performance_gain": m2['performance_delta'],
             "feature_jumps": len(m2['changelog']) - len(m1['changelog']),
             "lineage": self._get_lineage(m2, tree)
         }
+        if diff:
+            from materialize import diff_stats
+            result["diff"] = self.diff_mutations(id1, id2)
+            result["diff_stats"] = diff_stats(result["diff"])
+        return result
+
+    INDEX_COLUMNS = ["id", "parent", "skill", "type", "delta", "timestamp", "approved", "agent", "summary"]
+
+    @traced("tracker.build_index")
+    def build_index(self, out_dir: Optional[str] = None, shard_size: int = 500) -> Dict:
+        """编译静态索引：谱系边、摘要、各技能最新版本，按 shard_size 分片
+
+        行按谱系排序 (parent 总在子代之前)，各技能的 latest 是谱系最深的一代。
+        只有一个分片时数据直接内联在 registry-index.json 中，页面一次请求即可渲染。
+        """
+        from datetime import datetime
+        out = Path(out_dir) if out_dir else self.registry / "index"
+        out.mkdir(parents=True, exist_ok=True)
+
+        tree = self.get_evolution_tree()
+        rows = []
+        for m in self.lineage_order(tree):
+            summary = m.get("description", "")
+            rows.append([
+                m["mutation_id"],
+                None if m.get("parent_id") in (None, "null") else m["parent_id"],
+                m.get("target_skill"),
+                m.get("change_type"),
+                m.get("performance_delta"),
+                m.get("timestamp"),
+                bool(m.get("approved")),
+                m.get("agent_id"),
+                summary if len(summary) <= 80 else summary[:79] + "…"
+            ])
+
+        skills: Dict[str, Dict] = {}
+        for row in rows:
+            info = skills.setdefault(row[2], {"count": 0, "approved": 0})
+            info["count"] += 1
+            info["latest"] = row[0]
+            if row[6]:
+                info["approved"] += 1
+                info["latest_approved"] = row[0]
+
+        index = {
+            "version": 1,
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "count": len(rows),
+            "columns": self.INDEX_COLUMNS,
+            "skills": skills,
+            "shards": []
+        }
+
+        for old in out.glob("shard-*.json"):
+            old.unlink()
+        if len(rows) <= shard_size:
+            index["rows"] = rows
+        else:
+            for n, start in enumerate(range(0, len(rows), shard_size)):
+                chunk = rows[start:start + shard_size]
+                name = f"shard-{n:04d}.json"
+                with open(out / name, 'w', encoding='utf-8') as f:
+                    json.dump({"columns": self.INDEX_COLUMNS, "rows": chunk}, f,
+                              ensure_ascii=False, separators=(",", ":"))
+                index["shards"].append({
+                    "file": name,
+                    "count": len(chunk),
+                    "from": chunk[0][0],
+                    "to": chunk[-1][0]
+                })
+
+        with open(out / "registry-index.json", 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        return index
+
+    def generation_depths(self, tree: Dict) -> Dict[str, int]:
+        """每个 mutation 距谱系根的代数 (parent 缺失或成环时视为根)"""
+        depths: Dict[str, int] = {}
+        for mutation_id in tree:
+            chain = []
+            current = mutation_id
+            while current not in depths and current not in chain:
+                chain.append(current)
+                parent = tree[current].get('parent_id')
+                if parent not in tree:
+                    break
+                current = parent
+            base = depths.get(current, -1)
+            for n, mid in enumerate(reversed(chain)):
+                depths[mid] = base + 1 + n
+        return depths
+
+    def lineage_order(self, tree: Dict) -> List[Dict]:
+        """拓扑序：按代数排列，同代内按 (timestamp, id)
+
+        记录里的时间戳并不可靠 (子代可能早于父代)，谱系先后以 parent 关系为准。
+        """
+        depths = self.generation_depths(tree)
+        return sorted(tree.values(), key=lambda m: (depths[m['mutation_id']],
+                                                    m.get('timestamp', ''), m['mutation_id']))
 
     def _get_lineage(self, mutation: Dict, tree: Dict) -> List[str]:
         """获取血统链"""
         lineage = [mutation['mutation_id']]
         current = mutation
         while current['parent_id'] != 'null' and current['parent_id'] in tree:
+            if current['parent_id'] in lineage:  # 损坏的记录可能指向自身或后代
+                break
             current = tree[current['parent_id']]
             lineage.append(current['mutation_id'])
         return list(reversed(lineage))
 
 
-def main():
-    """命令行入口"""
-    tracker = EvolutionTracker()
-
-    if len(sys.argv) < 2:
+def main(argv: Optional[List[str]] = None, tracker: Optional[EvolutionTracker] = None):
+    """命令行入口 (tracker 由常驻服务传入时复用其内存中的状态)"""
+    argv = configure(sys.argv if argv is None else argv)
+    if tracker is None:
+        registry = default_registry()
+        # 常驻服务在运行时，把请求转发给它 (没有 socket 文件时不加载客户端)
+        if os.path.exists(daemon_socket(registry)):
+            from tracker_daemon import forward
+            code = forward(registry, argv[1:])
+            if code is not None:
+                sys.exit(code)
+        tracker = EvolutionTracker(registry)
+
+    if len(argv) < 2:
         print("Usage: python3 evolution_tracker.py <command> [args]")
         print("Commands:")
         print("  log <parent_id> <agent> <skill> <type> <desc> <delta>")
         print("  tree [mutation_id]")
-        print("  compare <id1> <id2>")
+        print("  compare <id1> <id2> [--diff]")
+        print("  gate <mutation_id> [--trials N] [--threshold PCT] [--approve]")
+        print("  index [out_dir] [shard_size]")
+        print("  churn [--by skill|agent|type] [--json]")
+        print("  complexity [mutation_id ...] [--json] [--update]")
+        print("  query [--skill S] [--type T] [--agent A] [--approved yes|no] [--since DATE] [--until DATE] [--limit N] [--page P]")
+        print("  pack [--older-than DAYS] [--all]")
+        print("  checkout <mutation_id> [out_dir]")
+        print("  snapshot <mutation_id>")
+        print("  watch [--interval S] [--debounce S] [--no-checks] [--once]")
+        print("  serve [--socket PATH]")
+        print("  sync <dir|http://host:port> [--push] [--dry-run] | sync --serve [--port N] | sync --verify [--stamp]")
+        print("  evaluate <mutation_id ...> [--pending] [--jobs N] [--timeout S] [--retries N] [--trials N]")
+        print("  similar [mutation_id ...] [--threshold 0.8] [--rebuild] [--json]")
+        print("Options: --profile [PATH.json|DIR/] [--cprofile PATH]  (或 EVOLUTION_PROFILE=...)")
         sys.exit(1)
 
-    command = sys.argv[1]
+    command = argv[1]
+    with span(f"cli.{command}"):
+        _dispatch(tracker, command, argv)
+
+
+def _dispatch(tracker: EvolutionTracker, command: str, argv: List[str]):
+    """执行单个子命令"""
+    def resolve(text: str) -> str:
+        try:
+            return tracker.resolve_id(text)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
 
     if command == "log":
-        if len(sys.argv) < 8:
+        if len(argv) < 8:
             print("Usage: evolution_tracker.py log <parent_id> <agent> <skill> <type> <desc> <delta>")
             sys.exit(1)
 
-        parent_id = sys.argv[2]
-        agent_id = sys.argv[3]
-        skill = sys.argv[4]
-        change_type = sys.argv[5]
-        description = sys.argv[6]
-        performance_delta = sys.argv[7]
+        parent_id = resolve(argv[2])
+        agent_id = argv[3]
+        skill = argv[4]
+        change_type = argv[5]
+        description = argv[6]
+        performance_delta = argv[7]
 
-        # 读取标准输入的 diff
-        diff_content = sys.stdin.read() if not sys.stdin.isatty() else ""
+        # 标准输入的 diff 直接流式写入 patch
+        diff_content = sys.stdin if not sys.stdin.isatty() else ""
 
         tracker.log_mutation(
             parent_id=parent_id,
@@ -190,17 +507,117 @@ def main():
         )
 
     elif command == "tree":
-        mutation_id = sys.argv[2] if len(sys.argv) > 2 else None
+        mutation_id = resolve(argv[2]) if len(argv) > 2 else None
         tree = tracker.get_evolution_tree()
+        if mutation_id:
+            # 只输出从根到该代的谱系
+            tree = {mid: tree[mid] for mid in tracker._get_lineage(tree[mutation_id], tree)}
         print(json.dumps(tree, indent=2, ensure_ascii=False))
 
     elif command == "compare":
-        if len(sys.argv) < 4:
-            print("Usage: evolution_tracker.py compare <id1> <id2>")
+        if len(argv) < 4:
+            print("Usage: evolution_tracker.py compare <id1> <id2> [--diff]")
             sys.exit(1)
 
-        result = tracker.compare_mutations(sys.argv[2], sys.argv[3])
+        diff = "--diff" in argv[4:]
+        errors: Tuple[type, ...] = (ValueError,)
+        if diff:
+            # 只有 --diff 需要物化 (materialize 会带入 difflib 等模块)
+            from materialize import MaterializeError
+            errors += (MaterializeError,)
+        try:
+            result = tracker.compare_mutations(argv[2], argv[3], diff=diff)
+        except errors as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        diff = result.pop("diff", None)
         print(json.dumps(result, indent=2, ensure_ascii=False))
+        if diff is not None:
+            print(diff, end="")
+
+    elif command == "index":
+        out_dir = argv[2] if len(argv) > 2 else None
+        shard_size = int(argv[3]) if len(argv) > 3 else 500
+        index = tracker.build_index(out_dir, shard_size)
+        print(f"🗂️ 索引已生成: {index['count']} 个 mutation, {max(1, len(index['shards']))} 个分片")
+
+    elif command == "churn":
+        from diff_metrics import registry_churn
+        by = {"skill": "target_skill", "agent": "agent_id", "type": "change_type"}
+        field = argv[argv.index("--by") + 1] if "--by" in argv else "skill"
+        if field not in by:
+            print(f"❌ --by 只支持: {', '.join(by)}")
+            sys.exit(1)
+        groups = registry_churn(tracker, by[field])
+        if "--json" in argv:
+            print(json.dumps(groups, indent=2, ensure_ascii=False))
+            return
+        for name, g in groups.items():
+            print(f"📐 {name:<20} {g['measured']}/{g['mutations']} 个有 diff  "
+                  f"+{g['added']} -{g['removed']}  净增 {g['net']:+d}  {g['hunks']} 个 hunk")
+
+    elif command == "complexity":
+        from js_complexity import main as complexity_main
+        sys.exit(complexity_main(argv[2:] + ["--registry", str(tracker.registry)], tracker))
+
+    elif command == "query":
+        from query_index import main as query_main
+        sys.exit(query_main(argv[2:] + ["--registry", str(tracker.registry)], tracker))
+
+    elif command == "pack":
+        from mutation_pack import DEFAULT_AGE_DAYS, pack_mutations
+        days = DEFAULT_AGE_DAYS
+        if "--all" in argv:
+            days = 0
+        elif "--older-than" in argv:
+            days = float(argv[argv.index("--older-than") + 1])
+        packed = pack_mutations(tracker, days)
+        print(f"📦 已打包 {len(packed)} 个 mutation，pack 中共 {len(tracker.pack)} 个")
+
+    elif command in ("checkout", "snapshot"):
+        if len(argv) < 3:
+            print(f"Usage: evolution_tracker.py {command} <mutation_id>")
+            sys.exit(1)
+
+        from materialize import Materializer, MaterializeError
+        materializer = Materializer(tracker)
+        mutation_id = resolve(argv[2])
+        try:
+            if command == "checkout":
+                out_dir = argv[3] if len(argv) > 3 else str(tracker.registry / "checkout" / mutation_id)
+                for path in materializer.write(mutation_id, out_dir):
+                    print(f"📄 {path}")
+            else:
+                materializer.save_snapshot(mutation_id, materializer.checkout(mutation_id))
+                print(f"📸 快照已保存: snapshots/{mutation_id}/")
+        except (MaterializeError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    elif command == "watch":
+        from watch import main as watch_main
+        sys.exit(watch_main(argv[2:] + ["--registry", str(tracker.registry)], tracker))
+
+    elif command == "serve":
+        from tracker_daemon import serve
+        socket_file = argv[argv.index("--socket") + 1] if "--socket" in argv else None
+        serve(tracker, socket_file)
+
+    elif command == "sync":
+        from registry_sync import main as sync_main
+        sys.exit(sync_main(argv[2:] + ["--registry", str(tracker.registry)], tracker))
+
+    elif command == "similar":
+        from similarity_index import main as similar_main
+        sys.exit(similar_main(argv[2:] + ["--registry", str(tracker.registry)], tracker))
+
+    elif command == "evaluate":
+        from evaluate import main as evaluate_main
+        sys.exit(evaluate_main(argv[2:] + ["--registry", str(tracker.registry)], tracker))
+
+    elif command == "gate":
+        from perf_gate import main as gate_main
+        sys.exit(gate_main(argv[2:] + ["--registry", str(tracker.registry)], tracker))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+🧬 ThreeJSEvolution 静态索引自检
+build_index 的分片、谱系排序与各技能最新版本 (index.html 据此渲染)
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+
+# (id, parent, skill, timestamp, approved)；gen-v1-c 的时间戳早于其 parent
+RECORDS = [
+    ("gen-v1-base", "null", "threejs-game", "2026-03-01T00:00:00Z", True),
+    ("gen-v1-a", "gen-v1-base", "threejs-game", "2026-03-02T00:00:00Z", True),
+    ("gen-v1-b", "gen-v1-base", "threejs-game", "2026-03-03T00:00:00Z", False),
+    ("gen-v1-c", "gen-v1-b", "threejs-game", "2026-02-20T00:00:00Z", False),
+    ("gen-v1-eng", "null", "threejs-engine", "2026-03-01T00:00:00Z", False),
+    ("gen-v1-eng2", "gen-v1-eng", "threejs-engine", "2026-03-05T00:00:00Z", True),
+    ("gen-v1-d", "gen-v1-c", "threejs-game", "2026-03-04T00:00:00Z", False),
+]
+
+
+def _tracker(tmp: str) -> EvolutionTracker:
+    tracker = EvolutionTracker(tmp)
+    for mutation_id, parent_id, skill, timestamp, approved in RECORDS:
+        tracker.save_mutation({"mutation_id": mutation_id, "parent_id": parent_id, "target_skill": skill,
+                               "change_type": "optimization", "timestamp": timestamp, "approved": approved,
+                               "agent_id": "tester", "performance_delta": "+1%",
+                               "description": f"{mutation_id} " + "很长的描述" * 30})
+    return tracker
+
+
+def test_build_index_shards():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp)
+        out = Path(tmp) / "site"
+        out.mkdir()
+        (out / "shard-0009.json").write_text("{}", encoding="utf-8")  # 上次构建的残留
+        index = tracker.build_index(str(out), shard_size=3)
+
+        assert index["count"] == len(RECORDS) and "rows" not in index
+        assert [s["count"] for s in index["shards"]] == [3, 3, 1]
+        assert sorted(p.name for p in out.glob("shard-*.json")) == ["shard-0000.json", "shard-0001.json",
+                                                                   "shard-0002.json"]
+        rows = []
+        for shard in index["shards"]:
+            data = json.loads((out / shard["file"]).read_text(encoding="utf-8"))
+            assert data["columns"] == index["columns"] == EvolutionTracker.INDEX_COLUMNS
+            assert (shard["from"], shard["to"]) == (data["rows"][0][0], data["rows"][-1][0])
+            rows += data["rows"]
+        assert json.loads((out / "registry-index.json").read_text(encoding="utf-8")) == index
+
+        # 谱系排序：按代数，同代按时间戳；gen-v1-c 虽然时间戳最早，仍排在 parent 之后
+        ids = [row[0] for row in rows]
+        assert ids == ["gen-v1-base", "gen-v1-eng", "gen-v1-a", "gen-v1-b", "gen-v1-eng2",
+                       "gen-v1-c", "gen-v1-d"]
+        by_id = {row[0]: dict(zip(index["columns"], row)) for row in rows}
+        assert all(ids.index(m["parent"]) < ids.index(mid) for mid, m in by_id.items() if m["parent"])
+        assert by_id["gen-v1-base"]["parent"] is None
+        assert len(by_id["gen-v1-a"]["summary"]) == 80 and by_id["gen-v1-a"]["summary"].endswith("…")
+
+        # 各技能的最新版本是谱系最深的一代；页面显示的是最后一个分片的最后一行
+        game, engine = index["skills"]["threejs-game"], index["skills"]["threejs-engine"]
+        assert (game["count"], game["approved"], game["latest"], game["latest_approved"]) == \
+            (5, 2, "gen-v1-d", "gen-v1-a")
+        assert (engine["count"], engine["latest"], engine["latest_approved"]) == (2, "gen-v1-eng2", "gen-v1-eng2")
+        last = json.loads((out / index["shards"][-1]["file"]).read_text(encoding="utf-8"))["rows"][-1]
+        assert last[0] == "gen-v1-d"
+
+
+def test_build_index_inline_when_small():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _tracker(tmp)
+        out = Path(tmp) / "site"
+        tracker.build_index(str(out), shard_size=3)
+        # 记录数不超过 shard_size 时内联，旧分片被清理
+        index = tracker.build_index(str(out), shard_size=len(RECORDS))
+        assert index["shards"] == [] and len(index["rows"]) == len(RECORDS)
+        assert list(out.glob("shard-*.json")) == []
+        assert index["rows"][-1][0] == "gen-v1-d"
+
+
+def main():
+    tests = [test_build_index_shards, test_build_index_inline_when_small]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
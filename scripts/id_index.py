@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+🔤 ThreeJSEvolution mutation ID 解析
+有序 ID 索引 + 二分查找：唯一前缀即可定位 (类似 git 短哈希)，拼错时给出 "您是不是要找"
+
+索引 (logs/id_index.txt) 每行一个 ID，按字典序排列；save_mutation 新增记录时插入。
+其他途径 (git pull、手工复制) 带来的记录在查不到时会触发一次重建。
+"""
+
+import bisect
+from typing import List, Optional
+
+INDEX_FILE = "id_index.txt"
+
+# 超过这个数量时只在前缀附近找相似 ID
+FUZZY_SCAN_LIMIT = 50_000
+FUZZY_WINDOW = 200
+
+
+class UnknownMutationError(ValueError):
+    """ID 不存在或前缀不唯一"""
+
+    def __init__(self, text: str, message: str, candidates: Optional[List[str]] = None):
+        super().__init__(message)
+        self.text = text
+        self.candidates = candidates or []
+
+
+class IdIndex:
+    """有序 mutation ID 列表"""
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.path = tracker.logs_file.parent / INDEX_FILE
+        self._ids: Optional[List[str]] = None
+        self._fresh = False  # 本进程内刚从磁盘重建过
+
+    @property
+    def ids(self) -> List[str]:
+        if self._ids is None:
+            if self.path.exists():
+                self._ids = self.path.read_text(encoding="utf-8").split()
+            else:
+                self.rebuild()
+        return self._ids
+
+    def rebuild(self) -> List[str]:
+        """从 mutations/ 文件名与 pack 索引重建 (不解析记录内容)"""
+        ids = {p.stem for p in self.tracker.mutations_dir.glob("*.json")}
+        ids.update(self.tracker.pack.ids())
+        self._ids = sorted(ids)
+        self._fresh = True
+        self.save()
+        return self._ids
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text("\n".join(self._ids) + "\n" if self._ids else "", encoding="utf-8")
+        tmp.replace(self.path)
+
+    def add(self, mutation_id: str, save: bool = True) -> bool:
+        ids = self.ids
+        pos = bisect.bisect_left(ids, mutation_id)
+        if pos == len(ids) or ids[pos] != mutation_id:
+            ids.insert(pos, mutation_id)
+            if save:
+                self.save()
+            return True
+        return False
+
+    def remove(self, mutation_id: str, save: bool = True) -> bool:
+        ids = self.ids
+        pos = bisect.bisect_left(ids, mutation_id)
+        if pos < len(ids) and ids[pos] == mutation_id:
+            del ids[pos]
+            if save:
+                self.save()
+            return True
+        return False
+
+    def with_prefix(self, prefix: str, limit: int = 10) -> List[str]:
+        ids = self.ids
+        pos = bisect.bisect_left(ids, prefix)
+        found = []
+        while pos < len(ids) and ids[pos].startswith(prefix) and len(found) < limit:
+            found.append(ids[pos])
+            pos += 1
+        return found
+
+    def suggest(self, text: str, n: int = 3) -> List[str]:
+        ids = self.ids
+        if len(ids) > FUZZY_SCAN_LIMIT:
+            pos = bisect.bisect_left(ids, text)
+            ids = ids[max(0, pos - FUZZY_WINDOW):pos + FUZZY_WINDOW]
+        import difflib
+        return difflib.get_close_matches(text, ids, n=n, cutoff=0.6)
+
+    def resolve(self, text: str) -> str:
+        """完整 ID 或唯一前缀 → 完整 ID"""
+        if "/" not in text and (self.tracker.mutations_dir / f"{text}.json").exists():
+            # 完整 ID 的松散记录：不需要读取 (或重建) 索引
+            return text
+        matches = self.with_prefix(text, limit=11)
+        if text in matches:
+            return text
+        if len(matches) == 1:
+            return matches[0]
+        if len(matches) > 1:
+            shown = ", ".join(matches[:10]) + (" ..." if len(matches) > 10 else "")
+            raise UnknownMutationError(text, f"mutation ID 前缀不唯一: {text} (可能是 {shown})", matches)
+        if self.tracker.has_mutation(text):
+            self.add(text)
+            return text
+        if not self._fresh:
+            # 索引可能落后于磁盘 (例如 git pull 带来的新记录)
+            self.rebuild()
+            return self.resolve(text)
+        suggestions = self.suggest(text)
+        hint = f"，您是不是要找: {', '.join(suggestions)}" if suggestions else ""
+        raise UnknownMutationError(text, f"未知 mutation ID: {text}{hint}", suggestions)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+🔤 ThreeJSEvolution ID 解析自检
+唯一前缀、前缀冲突、相似 ID 建议，以及索引落后于磁盘时的重建
+"""
+
+import sys
+import tempfile
+import time
+
+from evolution_tracker import EvolutionTracker
+from id_index import UnknownMutationError
+from instrument import run_tests
+
+IDS = ["gen-v1-base", "gen-v1-opt-mouse-v1", "gen-v1_phys", "gen-v1_phys-fix", "gen-v1_anim", "gen-v2-arch-plan"]
+
+
+def _expect_error(tracker, text):
+    try:
+        tracker.resolve_id(text)
+    except UnknownMutationError as e:
+        return e
+    raise AssertionError(f"{text} 不应解析成功")
+
+
+def test_prefix_resolution():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        for mid in IDS:
+            tracker.save_mutation({"mutation_id": mid, "parent_id": "null"})
+
+        assert tracker.resolve_id("gen-v2") == "gen-v2-arch-plan"
+        assert tracker.resolve_id("gen-v1-o") == "gen-v1-opt-mouse-v1"
+        # 完整 ID 同时是另一个 ID 的前缀时取完整匹配
+        assert tracker.resolve_id("gen-v1_phys") == "gen-v1_phys"
+        assert _expect_error(tracker, "gen-v1_ph").candidates == ["gen-v1_phys", "gen-v1_phys-fix"]
+        assert "gen-v1_phys" in _expect_error(tracker, "gen-v1_phsy").candidates
+        assert isinstance(_expect_error(tracker, "nothing"), ValueError)
+
+        # save_mutation 同步索引；绕过 tracker 写入的记录在查不到时触发重建
+        tracker.save_mutation({"mutation_id": "gen-v3-new", "parent_id": "null"})
+        assert EvolutionTracker(tmp).resolve_id("gen-v3") == "gen-v3-new"
+        (tracker.mutations_dir / "gen-v4-pulled.json").write_text('{"mutation_id": "gen-v4-pulled"}')
+        assert EvolutionTracker(tmp).resolve_id("gen-v4") == "gen-v4-pulled"
+
+
+def test_bisect_scale():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        index = tracker.id_index
+        index._ids = sorted(f"gen-v{n % 97}-{n:07x}" for n in range(300_000))
+        index._fresh = True
+        start = time.perf_counter()
+        for n in range(0, 300_000, 3000):
+            full = f"gen-v{n % 97}-{n:07x}"
+            try:
+                assert index.resolve(full[:-1]) == full
+            except UnknownMutationError as e:
+                assert full in e.candidates
+        assert (time.perf_counter() - start) / 100 < 0.001
+
+
+def main():
+    tests = [test_prefix_resolution, test_bisect_scale]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
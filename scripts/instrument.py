@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+⏱️ ThreeJSEvolution 性能剖析
+tracker 与测试脚本共用的计时层：按阶段记录 span，结束时输出结构化 JSON
+
+每个 span 记录：
+    wall_ms / cpu_ms          墙钟与 CPU 时间
+    read_bytes / write_bytes  读写字节数 (/proc/self/io 的 rchar/wchar，非 Linux 为 null)
+    opens / spawns            打开文件与启动子进程的次数 (audit hook 统计)
+span 可以嵌套，计数包含子 span；parent 字段给出嵌套关系。
+
+开启方式 (默认关闭，关闭时 span 几乎没有开销)：
+    python3 scripts/evolution_tracker.py --profile out.json tree
+    EVOLUTION_PROFILE=out.json python3 scripts/materialize_test.py
+    EVOLUTION_PROFILE=1 ...                        # 输出到 stderr
+    EVOLUTION_PROFILE=dir/ ...                     # 写入 dir/profile-<pid>.json
+    --cprofile run.prof / EVOLUTION_CPROFILE=...   # 额外保存 cProfile 数据
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+_enabled = False
+_output: Optional[str] = None
+_profiler = None
+_cprofile_path: Optional[str] = None
+_spans: List[Dict] = []
+_stack: List[int] = []
+_counters = {"opens": 0, "spawns": 0}
+_hook_installed = False
+_start: Optional[Dict] = None
+
+_io_fd: Optional[int] = None
+_io_overhead = 0
+
+_SPAWN_EVENTS = {"subprocess.Popen", "os.system"}
+
+
+def _audit(event: str, args):
+    if not _enabled:
+        return
+    if event == "open":
+        _counters["opens"] += 1
+    elif event in _SPAWN_EVENTS:
+        _counters["spawns"] += 1
+
+
+def _io_bytes():
+    """(rchar, wchar)，扣除读取 /proc/self/io 本身的字节"""
+    global _io_overhead
+    if _io_fd is None:
+        return None, None
+    data = os.pread(_io_fd, 512, 0)
+    fields = dict(line.split(b": ") for line in data.splitlines() if b": " in line)
+    # 内容在本次读取计数之前生成，本次的字节要到下一次采样才会出现在 rchar 中
+    read = int(fields[b"rchar"]) - _io_overhead
+    _io_overhead += len(data)
+    return read, int(fields[b"wchar"])
+
+
+def _sample() -> Dict:
+    read, write = _io_bytes()
+    return {"wall": time.perf_counter(), "cpu": time.process_time(), "read": read, "write": write,
+            "opens": _counters["opens"], "spawns": _counters["spawns"]}
+
+
+def _delta(begin: Dict, end: Dict) -> Dict:
+    def diff(key):
+        return None if begin[key] is None else end[key] - begin[key]
+    return {
+        "wall_ms": round((end["wall"] - begin["wall"]) * 1000, 3),
+        "cpu_ms": round((end["cpu"] - begin["cpu"]) * 1000, 3),
+        "read_bytes": diff("read"),
+        "write_bytes": diff("write"),
+        "opens": end["opens"] - begin["opens"],
+        "spawns": end["spawns"] - begin["spawns"],
+    }
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(output: str = "-", cprofile: Optional[str] = None):
+    """开始记录；output 为 JSON 路径 (目录则按 pid 命名，"-" 为 stderr)"""
+    global _enabled, _output, _profiler, _cprofile_path, _hook_installed, _io_fd, _start
+    if not _enabled:
+        if not _hook_installed:
+            # audit hook 无法移除，只装一次；关闭时 _audit 立即返回
+            sys.addaudithook(_audit)
+            _hook_installed = True
+        if _io_fd is None and os.path.exists("/proc/self/io"):
+            _io_fd = os.open("/proc/self/io", os.O_RDONLY)
+        _enabled = True
+        _start = _sample()
+        atexit.register(dump)
+    _output = output
+    if cprofile and _profiler is None:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _cprofile_path = cprofile
+        _profiler.enable()
+
+
+def disable():
+    """停止记录并丢弃已有数据 (不写出)"""
+    global _enabled, _profiler, _start
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler = None
+    if _enabled:
+        atexit.unregister(dump)
+    _enabled = False
+    _start = None
+    _spans.clear()
+    _stack.clear()
+
+
+def configure(argv: List[str]) -> List[str]:
+    """从命令行参数中取出 --profile [PATH] 与 --cprofile PATH，返回剩余参数
+
+    环境变量 EVOLUTION_PROFILE / EVOLUTION_CPROFILE 作用相同。
+    """
+    argv = list(argv)
+    output = os.environ.get("EVOLUTION_PROFILE")
+    cprofile = os.environ.get("EVOLUTION_CPROFILE")
+    if "--profile" in argv:
+        i = argv.index("--profile")
+        has_path = i + 1 < len(argv) and argv[i + 1].endswith((".json", "/"))
+        output = argv[i + 1] if has_path else "-"
+        del argv[i:i + 1 + has_path]
+    if "--cprofile" in argv:
+        i = argv.index("--cprofile")
+        cprofile = argv[i + 1]
+        del argv[i:i + 2]
+        output = output or "-"
+    if output:
+        enable("-" if output == "1" else output, cprofile)
+    return argv
+
+
+class span:
+    """计时上下文：with span("tracker.build_index", shards=3): ..."""
+
+    __slots__ = ("name", "attrs", "begin", "index")
+
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.begin = None
+
+    def __enter__(self):
+        if _enabled:
+            self.index = len(_spans)
+            _spans.append({"name": self.name, "parent": _stack[-1] if _stack else None})
+            _stack.append(self.index)
+            self.begin = _sample()
+        return self
+
+    def set(self, **attrs):
+        """在 span 结束前补充属性 (如处理的记录数)"""
+        self.attrs.update(attrs)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.begin is None:
+            return False
+        end = _sample()
+        record = _spans[self.index]
+        record["start_ms"] = round((self.begin["wall"] - _start["wall"]) * 1000, 3)
+        record.update(_delta(self.begin, end))
+        if exc_type is not None and exc_type is not SystemExit:
+            record["error"] = exc_type.__name__
+        record.update(self.attrs)
+        if _stack and _stack[-1] == self.index:
+            _stack.pop()
+        return False
+
+
+def traced(name: str) -> Callable:
+    """函数装饰器版本的 span"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def report() -> Dict:
+    """到目前为止的剖析结果"""
+    return {
+        "argv": sys.argv,
+        "pid": os.getpid(),
+        "python": sys.version.split()[0],
+        "total": _delta(_start, _sample()) if _start else None,
+        "spans": [s for s in _spans if "wall_ms" in s],
+    }
+
+
+def dump():
+    """写出 JSON (进程退出时自动调用)"""
+    global _profiler
+    if not _enabled:
+        return
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_cprofile_path)
+        _profiler = None
+    text = json.dumps(report(), indent=2, ensure_ascii=False)
+    if _output in (None, "-"):
+        print(text, file=sys.stderr)
+        return
+    path = _output
+    if path.endswith("/") or os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+        path = os.path.join(path, f"profile-{os.getpid()}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text + "\n")
+
+
+def run_tests(tests: List[Callable], argv: Optional[List[str]] = None) -> int:
+    """*_test.py 共用的运行器：每个测试一个 span，返回退出码"""
+    configure(sys.argv if argv is None else argv)
+    failed = 0
+    for test in tests:
+        try:
+            with span(f"test.{test.__name__}"):
+                test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+# 由环境变量开启时，被导入即开始记录 (pytest 等不经过 configure 的入口)
+if os.environ.get("EVOLUTION_PROFILE") or os.environ.get("EVOLUTION_CPROFILE"):
+    configure([])
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+⏱️ ThreeJSEvolution 剖析层自检
+span 嵌套、读写字节、打开文件与子进程计数、参数解析
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import instrument
+from instrument import configure, span, traced
+
+
+@traced("demo.traced")
+def _work(path: str):
+    with open(path, "w") as f:
+        f.write("x" * 4096)
+    with open(path) as f:
+        return len(f.read())
+
+
+def test_disabled_is_noop():
+    with span("ignored") as s:
+        pass
+    assert s.begin is None and not instrument.enabled()
+    assert instrument.report()["spans"] == []
+
+
+def test_spans_and_counters():
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "profile.json")
+        argv = configure(["tracker", "--profile", out, "tree"])
+        try:
+            assert argv == ["tracker", "tree"] and instrument.enabled()
+            with span("outer", records=2) as outer:
+                assert _work(os.path.join(tmp, "data.txt")) == 4096
+                subprocess.run([sys.executable, "-c", "pass"])
+                outer.set(done=True)
+
+            spans = {s["name"]: s for s in instrument.report()["spans"]}
+            inner, outer = spans["demo.traced"], spans["outer"]
+            assert inner["parent"] == 0 and outer["parent"] is None
+            assert outer["records"] == 2 and outer["done"] is True
+            assert inner["opens"] == 2 and outer["spawns"] == 1
+            if inner["read_bytes"] is not None:
+                assert inner["read_bytes"] >= 4096 and inner["write_bytes"] >= 4096
+            assert outer["wall_ms"] >= inner["wall_ms"]
+
+            instrument.dump()
+            with open(out, encoding="utf-8") as f:
+                assert [s["name"] for s in json.load(f)["spans"]] == ["outer", "demo.traced"]
+        finally:
+            instrument.disable()
+
+
+def test_configure_flags():
+    try:
+        assert configure(["x", "--profile", "tree"]) == ["x", "tree"]
+        assert configure(["x", "log", "--profile", "dir/"]) == ["x", "log"]
+    finally:
+        instrument.disable()
+    assert not instrument.enabled()
+
+
+def main():
+    tests = [test_disabled_is_noop, test_spans_and_counters, test_configure_flags]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+🧮 ThreeJSEvolution 代码复杂度
+静态分析技能页面的内联脚本，把结果映射到 metrics.complexity 的星级
+
+每个函数统计：
+    cyclomatic  圈复杂度 = 1 + 分支点 (if/for/while/case/catch、&&、||、??、三元 ?)
+    lines       函数体跨越的行数
+    nesting     控制结构 ({ } 包围的 if/for/while/switch/try ...) 的最大嵌套层数
+    statements  语句数 (分号结束的语句 + 控制语句 + 函数声明)
+函数包括 function 声明/表达式、带 { } 的箭头函数与对象/类方法；表达式体的箭头函数计入外层函数。
+不在任何函数内的代码记为 <top-level>。
+
+分析结果按脚本内容的 sha256 缓存在 logs/complexity_cache.json，
+重新统计全部世代时只分析内容变过的脚本。
+
+Usage:
+    python3 scripts/evolution_tracker.py complexity [mutation_id ...] [--json] [--update]
+    python3 scripts/js_complexity.py page.html
+"""
+
+import json
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from instrument import traced
+
+CACHE_FILE = "complexity_cache.json"
+CACHE_VERSION = 1
+
+INLINE_SCRIPT = re.compile(r"<script(?![^>]*\bsrc=)([^>]*)>(.*?)</script>", re.DOTALL | re.IGNORECASE)
+
+# 星级阈值：得分 (见 score) 达到第 n 个值即为 n 颗星；按已有记录校准
+# (v1_base 约 13 分 ★，v1_phys/v1_anim 约 60 分 ★★★)
+STAR_THRESHOLDS = (1, 25, 50, 100, 200)
+STARS = ["☆☆☆☆☆", "★☆☆☆☆", "★★☆☆☆", "★★★☆☆", "★★★★☆", "★★★★★"]
+
+_DECISION_KEYWORDS = {"if", "for", "while", "case", "catch"}
+_DECISION_OPERATORS = {"&&", "||", "??", "?", "&&=", "||=", "??="}
+_CONTROL_KEYWORDS = {"if", "for", "while", "switch", "try", "catch", "finally", "else", "do"}
+_CONTROL_STATEMENTS = {"if", "for", "while", "switch", "try", "do"}
+# 可以出现在 keyword (...) { 里的关键字，其余 name(...) { 都是方法定义
+_HEAD_KEYWORDS = {"if", "for", "while", "switch", "catch", "with", "function"}
+# 其后出现的 / 是正则字面量而不是除号
+_REGEX_AFTER = {"return", "typeof", "case", "in", "of", "new", "delete", "void", "throw", "else",
+                "do", "yield", "await", "instanceof"}
+
+_TOKEN = re.compile(r"""
+    (?P<space>[ \t\r\f\v ﻿]+)
+  | (?P<newline>\n)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<name>[A-Za-z_$\u0080-￿][\w$\u0080-￿]*)
+  | (?P<num>0[xXoObB][\da-fA-F_]+n?|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?n?)
+  | (?P<punct>>>>=|\.\.\.|===|!==|\*\*=|<<=|>>=|>>>|&&=|\|\|=|\?\?=|=>|==|!=|<=|>=|&&|\|\||\?\?
+      |\?\.(?!\d)|\+\+|--|\+=|-=|\*=|/=|%=|&=|\|=|\^=|\*\*|<<|>>|[{}()\[\];,<>+\-*/%&|^!~?:=.@#])
+""", re.VERBOSE | re.DOTALL)
+
+Token = Tuple[str, str, int]
+
+
+class _Scanner:
+    """把 JavaScript 源码切成 (kind, value, line)，跳过空白与注释
+
+    字符串与正则字面量整体作为一个 token；模板字符串中 ${ } 里的代码照常切分。
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self.pos = 0
+        self.line = 1
+        self.tokens: List[Token] = []
+        self.braces: List[str] = []  # "{" 或 "${"，用于判断 } 是否回到模板字符串
+
+    def _prev(self) -> Optional[Token]:
+        return self.tokens[-1] if self.tokens else None
+
+    def _regex_allowed(self) -> bool:
+        prev = self._prev()
+        if prev is None:
+            return True
+        kind, value, _ = prev
+        if kind == "name":
+            return value in _REGEX_AFTER
+        if kind in ("num", "str", "regex", "tmpl"):
+            return False
+        return value not in (")", "]", "}", "++", "--")
+
+    def _skip_string(self, quote: str) -> int:
+        i = self.pos + 1
+        code = self.code
+        while i < len(code):
+            c = code[i]
+            if c == "\\":
+                i += 2
+                continue
+            if c == quote or c == "\n":
+                return i + 1
+            i += 1
+        return i
+
+    def _skip_regex(self) -> int:
+        i = self.pos + 1
+        code = self.code
+        in_class = False
+        while i < len(code):
+            c = code[i]
+            if c == "\\":
+                i += 2
+                continue
+            if c == "\n":
+                return i
+            if c == "[":
+                in_class = True
+            elif c == "]":
+                in_class = False
+            elif c == "/" and not in_class:
+                i += 1
+                while i < len(code) and (code[i].isalnum() or code[i] == "_"):
+                    i += 1
+                return i
+            i += 1
+        return i
+
+    def _template(self, start: int):
+        """从 start (` 之后或 } 之后) 扫描模板字符串，直到 ` 或 ${"""
+        i = start
+        code = self.code
+        while i < len(code):
+            c = code[i]
+            if c == "\\":
+                i += 2
+                continue
+            if c == "\n":
+                self.line += 1
+            elif c == "`":
+                self.pos = i + 1
+                return
+            elif c == "$" and code.startswith("${", i):
+                self.braces.append("${")
+                self.pos = i + 2
+                return
+            i += 1
+        self.pos = i
+
+    def scan(self) -> List[Token]:
+        code = self.code
+        while self.pos < len(code):
+            c = code[self.pos]
+            if c in "\"'":
+                end = self._skip_string(c)
+                self.tokens.append(("str", code[self.pos:end], self.line))
+                self.pos = end
+                continue
+            if c == "`":
+                self.tokens.append(("tmpl", "`", self.line))
+                self._template(self.pos + 1)
+                continue
+            if c == "}" and self.braces and self.braces[-1] == "${":
+                self.braces.pop()
+                self._template(self.pos + 1)
+                continue
+            if c == "/" and not code.startswith(("//", "/*"), self.pos) and self._regex_allowed():
+                end = self._skip_regex()
+                self.tokens.append(("regex", code[self.pos:end], self.line))
+                self.pos = end
+                continue
+            m = _TOKEN.match(code, self.pos)
+            if m is None:
+                self.pos += 1  # 不认识的字符 (如 HTML 注释残留)，跳过
+                continue
+            kind, value = m.lastgroup, m.group()
+            if kind == "newline":
+                self.line += 1
+            elif kind == "comment":
+                self.line += value.count("\n")
+            elif kind != "space":
+                if value == "{":
+                    self.braces.append("{")
+                elif value == "}" and self.braces:
+                    self.braces.pop()
+                self.tokens.append((kind, value, self.line))
+            self.pos = m.end()
+        return self.tokens
+
+
+def tokenize(code: str) -> List[Token]:
+    return _Scanner(code).scan()
+
+
+class _Unit:
+    """正在统计的函数 (或顶层代码)"""
+
+    __slots__ = ("name", "line", "end", "paren", "decisions", "statements", "depth", "nesting")
+
+    def __init__(self, name: str, line: int, paren: int):
+        self.name = name
+        self.line = line
+        self.end = line
+        self.paren = paren
+        self.decisions = 0
+        self.statements = 0
+        self.depth = 0
+        self.nesting = 0
+
+    def result(self) -> Dict:
+        return {"name": self.name, "line": self.line, "lines": self.end - self.line + 1,
+                "cyclomatic": 1 + self.decisions, "nesting": self.nesting, "statements": self.statements}
+
+
+def _name_before(tokens: List[Token], i: int) -> str:
+    """tokens[i] 之前的 `name =` / `name:` 给出的名字 (函数表达式、箭头函数)"""
+    while i >= 0 and tokens[i][1] == "async":
+        i -= 1
+    if i >= 1 and tokens[i][1] in ("=", ":") and tokens[i - 1][0] in ("name", "str"):
+        return tokens[i - 1][1].strip("'\"")
+    return "<anonymous>"
+
+
+def analyze_script(code: str) -> Dict:
+    """单段脚本的复杂度：各函数明细与整体汇总"""
+    tokens = tokenize(code)
+    top = _Unit("<top-level>", 1, 0)
+    units = [top]
+    functions: List[Dict] = []
+    kinds: List[str] = []          # 每个未闭合的 { 是 function / control / block
+    opens: List[int] = []          # 未闭合的 ( 的位置
+    matching: Dict[int, int] = {}  # ) 的位置 → 对应 ( 的位置
+    paren = 0
+    pending_function: Optional[Tuple[str, int, int]] = None  # (名字, 行, 所在括号层)
+    pending_control: Optional[int] = None                      # 控制关键字所在括号层
+
+    for i, (kind, value, line) in enumerate(tokens):
+        unit = units[-1]
+        prev = tokens[i - 1][1] if i else None
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if kind == "name":
+            if value == "function" and prev != ".":
+                if nxt is not None and nxt[0] == "name":
+                    name = nxt[1]
+                elif nxt is not None and nxt[1] == "*" and i + 2 < len(tokens) and tokens[i + 2][0] == "name":
+                    name = tokens[i + 2][1]
+                else:
+                    name = _name_before(tokens, i - 1)
+                pending_function = (name, line, paren)
+                if prev in (None, ";", "{", "}") and paren == unit.paren:
+                    unit.statements += 1
+            elif prev not in (".", "?."):
+                if value in _DECISION_KEYWORDS:
+                    unit.decisions += 1
+                if value in _CONTROL_KEYWORDS:
+                    pending_control = paren
+                if value in _CONTROL_STATEMENTS and not (value == "while" and prev == "}" and _closes_do(tokens, i)):
+                    unit.statements += 1
+            continue
+
+        if kind != "punct":
+            continue
+
+        if value == "(":
+            opens.append(i)
+            paren += 1
+        elif value == ")":
+            if opens:
+                matching[i] = opens.pop()
+                paren -= 1
+            # name(...) { 只可能是方法定义 (if/for/catch 等是关键字)
+            if nxt is not None and nxt[1] == "{" and pending_function is None and i in matching:
+                before = matching[i] - 1
+                if before >= 0 and tokens[before][0] == "name" and tokens[before][1] not in _HEAD_KEYWORDS:
+                    pending_function = (tokens[before][1], tokens[before][2], paren)
+        elif value == "=>":
+            if nxt is not None and nxt[1] == "{":
+                start = matching.get(i - 1, i - 1) if prev == ")" else i - 1
+                pending_function = (_name_before(tokens, start - 1), line, paren)
+        elif value == "{":
+            if pending_function is not None and pending_function[2] == paren:
+                name, start_line, _ = pending_function
+                kinds.append("function")
+                units.append(_Unit(name, start_line, paren))
+                pending_function = pending_control = None
+            elif pending_control is not None and pending_control == paren:
+                kinds.append("control")
+                unit.depth += 1
+                unit.nesting = max(unit.nesting, unit.depth)
+                pending_control = None
+            else:
+                kinds.append("block")
+        elif value == "}":
+            block = kinds.pop() if kinds else "block"
+            if block == "function" and len(units) > 1:
+                unit.end = line
+                functions.append(unit.result())
+                units.pop()
+            elif block == "control":
+                unit.depth = max(0, unit.depth - 1)
+        elif value == ";":
+            if paren == unit.paren:
+                unit.statements += 1
+            if pending_control == paren:
+                pending_control = None  # 不带 { } 的控制语句体结束
+        elif value in _DECISION_OPERATORS:
+            unit.decisions += 1
+
+    # 未闭合的函数 (脚本被截断) 计到末尾
+    last = tokens[-1][2] if tokens else 1
+    while len(units) > 1:
+        unit = units.pop()
+        unit.end = last
+        functions.append(unit.result())
+    top.end = last
+
+    functions.sort(key=lambda f: f["line"])
+    everything = functions + [top.result()]
+    return {
+        "functions": functions,
+        "top_level": top.result(),
+        "summary": {
+            "lines": code.count("\n") + 1,
+            "functions": len(functions),
+            "statements": sum(f["statements"] for f in everything),
+            "cyclomatic": sum(f["cyclomatic"] for f in everything),
+            "max_cyclomatic": max((f["cyclomatic"] for f in functions), default=0),
+            "max_nesting": max(f["nesting"] for f in everything),
+            "max_function_lines": max((f["lines"] for f in functions), default=0),
+        },
+    }
+
+
+def _closes_do(tokens: List[Token], i: int) -> bool:
+    """tokens[i] 的 while 是否是 do { } while 的结尾 (不算新语句)"""
+    depth = 0
+    for j in range(i - 1, -1, -1):
+        value = tokens[j][1]
+        if value == "}":
+            depth += 1
+        elif value == "{":
+            depth -= 1
+            if depth == 0:
+                return j >= 1 and tokens[j - 1][1] == "do"
+    return False
+
+
+def inline_scripts(html: str) -> List[Tuple[str, str]]:
+    """页面中的内联脚本 [(属性, 代码)]，跳过 JSON 数据块"""
+    return [(attrs, code) for attrs, code in INLINE_SCRIPT.findall(html)
+            if code.strip() and "json" not in attrs.lower()]
+
+
+def score(summary: Dict) -> int:
+    """得分：总圈复杂度 + 每 10 条语句 1 分，单个函数过复杂或嵌套过深额外加分"""
+    if not summary["functions"] and not summary["statements"]:
+        return 0
+    return (summary["cyclomatic"] + summary["statements"] // 10
+            + max(0, summary["max_cyclomatic"] - 10) * 4
+            + max(0, summary["max_nesting"] - 3) * 10)
+
+
+def stars(summary: Dict) -> str:
+    """得分 → ★☆☆☆☆ … ★★★★★"""
+    value = score(summary)
+    return STARS[sum(1 for t in STAR_THRESHOLDS if value >= t)]
+
+
+def combine(analyses: Iterable[Dict], hotspots: int = 3) -> Dict:
+    """多段脚本的分析合并为一页 (或一代) 的汇总"""
+    total = {"scripts": 0, "lines": 0, "functions": 0, "statements": 0, "cyclomatic": 0,
+             "max_cyclomatic": 0, "max_nesting": 0, "max_function_lines": 0}
+    functions = []
+    for analysis in analyses:
+        s = analysis["summary"]
+        total["scripts"] += 1
+        for key in ("lines", "functions", "statements", "cyclomatic"):
+            total[key] += s[key]
+        for key in ("max_cyclomatic", "max_nesting", "max_function_lines"):
+            total[key] = max(total[key], s[key])
+        functions.extend(analysis["functions"])
+    functions.sort(key=lambda f: (-f["cyclomatic"], f["line"]))
+    total["hotspots"] = [[f["name"], f["cyclomatic"]] for f in functions[:hotspots]]
+    total["score"] = score(total)
+    return total
+
+
+class ComplexityCache:
+    """按脚本内容哈希缓存的分析结果"""
+
+    def __init__(self, tracker):
+        self.path = tracker.logs_file.parent / CACHE_FILE
+        self.scripts: Dict[str, Dict] = {}
+        self.dirty = False
+        self.hits = self.misses = 0
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except ValueError:
+                data = {}
+            if data.get("version") == CACHE_VERSION:
+                self.scripts = data["scripts"]
+
+    def script(self, code: str) -> Dict:
+        import hashlib
+        digest = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        cached = self.scripts.get(digest)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        analysis = analyze_script(code)
+        self.scripts[digest] = analysis
+        self.dirty = True
+        return analysis
+
+    def files(self, files: Dict[str, str]) -> Dict:
+        """一代的全部技能文件：HTML 中的内联脚本与独立的 .js 文件"""
+        analyses = []
+        for key in sorted(files):
+            if key.endswith(".html"):
+                analyses.extend(self.script(code) for _, code in inline_scripts(files[key]))
+            elif key.endswith((".js", ".mjs")):
+                analyses.append(self.script(files[key]))
+        return combine(analyses)
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "scripts": self.scripts}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        tmp.replace(self.path)
+        self.dirty = False
+
+
+@traced("complexity.report")
+def complexity_report(tracker, ids: Optional[List[str]] = None) -> List[Dict]:
+    """按谱系顺序统计各代复杂度，附带相对 parent 的变化与记录中的性能变化"""
+    from materialize import Materializer, MaterializeError
+
+    tree = tracker.get_records()
+    wanted = set(ids) if ids else None
+    materializer = Materializer(tracker)
+    cache = ComplexityCache(tracker)
+    analyzed: Dict[str, Optional[Dict]] = {}
+    rows = []
+    for mutation in tracker.lineage_order(tree):
+        mutation_id = mutation["mutation_id"]
+        parent_id = mutation.get("parent_id")
+        if wanted is not None and mutation_id not in wanted:
+            continue
+        try:
+            detail = cache.files(materializer.checkout(mutation_id))
+        except (MaterializeError, ValueError):
+            detail = None
+        analyzed[mutation_id] = detail
+        parent = analyzed.get(parent_id)
+        if parent is None and parent_id in tree and parent_id not in analyzed:
+            try:
+                parent = cache.files(materializer.checkout(parent_id))
+            except (MaterializeError, ValueError):
+                parent = None
+        recorded = (mutation.get("metrics") or {}).get("complexity")
+        rows.append({
+            "mutation_id": mutation_id,
+            "parent_id": parent_id,
+            "performance_delta": mutation.get("performance_delta"),
+            "recorded": recorded,
+            "stars": stars(detail) if detail else None,
+            "detail": detail,
+            "cyclomatic_delta": (detail["cyclomatic"] - parent["cyclomatic"]
+                                 if detail and parent else None),
+        })
+    cache.save()
+    return rows
+
+
+def main(argv: Optional[List[str]] = None, tracker=None) -> int:
+    import argparse
+    from evolution_tracker import EvolutionTracker, default_registry
+    from instrument import configure
+
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 代码复杂度")
+    parser.add_argument("ids", nargs="*", help="只统计这些 mutation (默认全部)")
+    parser.add_argument("--registry", default=default_registry())
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    parser.add_argument("--update", action="store_true", help="把计算出的星级写回 metrics.complexity")
+    args = parser.parse_args(configure(sys.argv[1:] if argv is None else argv))
+
+    tracker = tracker or EvolutionTracker(args.registry)
+    try:
+        ids = [tracker.resolve_id(text) for text in args.ids]
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    rows = complexity_report(tracker, ids)
+    if args.update:
+        for row in rows:
+            if row["detail"] is not None:
+                tracker.update_metrics(row["mutation_id"], {"complexity": row["stars"],
+                                                            "complexity_detail": row["detail"]})
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return 0
+    for row in rows:
+        detail = row["detail"]
+        if detail is None:
+            print(f"🧮 {row['mutation_id']:<24} (无法物化，跳过)")
+            continue
+        delta = row["cyclomatic_delta"]
+        changed = "" if row["recorded"] in (None, row["stars"]) else f" (记录为 {row['recorded']})"
+        print(f"🧮 {row['mutation_id']:<24} {row['stars']}{changed}  "
+              f"{detail['functions']} 个函数  {detail['statements']} 条语句  "
+              f"圈复杂度 {detail['cyclomatic']}{'' if delta is None else f' ({delta:+d})'}  "
+              f"最大 {detail['max_cyclomatic']}  嵌套 {detail['max_nesting']}  "
+              f"性能 {row['performance_delta']}")
+    if args.update:
+        print(f"✅ 已更新 {sum(1 for r in rows if r['detail'] is not None)} 条记录的 metrics.complexity")
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 scripts/js_complexity.py <page.html|script.js>")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        text = f.read()
+    if sys.argv[1].endswith(".html"):
+        results = [analyze_script(code) for _, code in inline_scripts(text)]
+    else:
+        results = [analyze_script(text)]
+    page = combine(results)
+    print(json.dumps({"stars": stars(page), **page, "scripts_detail": results}, indent=2, ensure_ascii=False))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+🧮 ThreeJSEvolution 代码复杂度自检
+词法边界 (字符串/正则/模板/注释)、函数识别与圈复杂度、星级校准、按内容哈希缓存
+"""
+
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from js_complexity import (ComplexityCache, analyze_script, combine, complexity_report,
+                           inline_scripts, stars, tokenize)
+from materialize import diff_files
+
+REPO = Path(__file__).resolve().parent.parent
+
+SCRIPT = """
+const CONFIG = { speed: 1 };
+function update(dt) {
+    for (const o of objects) {
+        if (o.active && !o.sleeping) {
+            o.step(dt > 0.1 ? 0.1 : dt);
+        } else if (o.age > 10) {
+            remove(o);
+        }
+    }
+}
+const onKey = (e) => {
+    switch (e.key) {
+        case 'r': reset(); break;
+        case ' ': jump(); break;
+    }
+};
+class World {
+    step(dt) { this.t += dt ?? 0; }
+}
+objects.forEach(function (o) { o.reset(); });
+do { tick(); } while (pending);
+"""
+
+
+def _functions(code: str):
+    return {f["name"]: f for f in analyze_script(code)["functions"]}
+
+
+def test_tokens_skip_literals():
+    # 字符串、正则、模板、注释里的 if / && / { 都不是代码
+    code = ("const a = 'if (x) {'; // if && ||\n"
+            "const re = /[/{]+/g.test(s) ? 1 : 2;\n"
+            "const t = `a ${b ? `{${c}}` : '}'} if`; /* if { */\n"
+            "const d = x / y / z;")
+    values = [v for _, v, _ in tokenize(code)]
+    assert values.count("{") == values.count("}") == 0
+    assert values.count("?") == 2 and "if" not in values
+    assert tokenize(code)[-1][2] == 4
+    assert analyze_script(code)["top_level"]["cyclomatic"] == 3
+
+
+def test_functions_and_cyclomatic():
+    functions = _functions(SCRIPT)
+    assert set(functions) == {"update", "onKey", "step", "<anonymous>"}
+    update = functions["update"]
+    # for、if、&&、三元、else if
+    assert update["cyclomatic"] == 6 and update["nesting"] == 2
+    assert update["line"] == 3 and update["lines"] == 9
+    assert functions["onKey"]["cyclomatic"] == 3 and functions["onKey"]["nesting"] == 1
+    assert functions["step"]["cyclomatic"] == 2
+    top = analyze_script(SCRIPT)["top_level"]
+    # do { } while 只算一条语句，一个分支点
+    assert top["cyclomatic"] == 2 and top["nesting"] == 1 and top["statements"] == 7
+    summary = analyze_script(SCRIPT)["summary"]
+    assert summary["functions"] == 4 and summary["max_cyclomatic"] == 6
+
+
+def test_stars_match_recorded_pages():
+    def page_stars(rel):
+        html = (REPO / rel).read_text(encoding="utf-8")
+        return stars(combine(analyze_script(code) for _, code in inline_scripts(html)))
+
+    # 与人工填写的记录一致：v1_base ★，v1_phys ★★★
+    assert page_stars("skills/threejs/v1_base/index.html") == "★☆☆☆☆"
+    assert page_stars("skills/threejs/v1_phys/index.html") == "★★★☆☆"
+    assert stars(combine([])) == "☆☆☆☆☆"
+
+
+def test_report_is_incremental():
+    base = {"index.html": "<html><script>\nfunction a() { if (x) { y(); } }\n</script></html>\n"}
+    grown = {"index.html": base["index.html"].replace("y(); }", "y(); } while (z || w) { z(); }"),
+             "main.js": "export const f = (a) => { return a ? 1 : 2; };\n"}
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        tracker.save_mutation({"mutation_id": "gen-v1-base", "parent_id": "null", "target_skill": "t",
+                               "diff_url": "skills/t/v1_base/index.html", "performance_delta": "baseline"})
+        page = tracker.registry / "skills/t/v1_base/index.html"
+        page.parent.mkdir(parents=True)
+        page.write_text(base["index.html"], encoding="utf-8")
+
+        patch = diff_files(base, grown)
+        child = tracker.log_mutation("gen-v1-base", "tester", "t", "feature_addition", "循环",
+                                     io.StringIO(patch), "+1%")
+        metrics = tracker.load_mutation(child)["metrics"]
+        assert metrics["complexity_detail"]["functions"] == 2
+        assert metrics["complexity_detail"]["cyclomatic"] == 2 + 3 + 1 + 2
+        assert metrics["complexity"] == "★☆☆☆☆"
+
+        rows = {r["mutation_id"]: r for r in complexity_report(tracker)}
+        base_cyclomatic = rows["gen-v1-base"]["detail"]["cyclomatic"]
+        assert rows[child]["cyclomatic_delta"] == rows[child]["detail"]["cyclomatic"] - base_cyclomatic
+        assert rows[child]["detail"] == metrics["complexity_detail"]
+
+        # 所有脚本都已缓存：再次统计不重新分析
+        cache = ComplexityCache(tracker)
+        assert len(cache.scripts) == 3
+        cache.files(grown)
+        cache.files(base)
+        assert (cache.hits, cache.misses) == (3, 0)
+
+
+def main():
+    tests = [test_tokens_skip_literals, test_functions_and_cyclomatic, test_stars_match_recorded_pages,
+             test_report_is_incremental]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
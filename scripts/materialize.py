@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+🧩 ThreeJSEvolution 版本物化
+从最近的完整快照出发，沿谱系依次应用 patch，重建任意一代的技能文件
+
+存储约定：
+1. snapshots/<mutation_id>/ - 完整快照，每 K 代保存一次
+2. patches/<mutation_id>.patch - 相对 parent 的 unified diff
+3. diff_url 直接指向 .html 的旧记录视为该页面 (index.html) 的完整快照
+
+文件名以代目录为根，例如 skills/threejs/v1_base/index.html 与
+skills/threejs/v1_opt/index.html 都对应 index.html。
+
+Usage:
+    python3 scripts/evolution_tracker.py checkout <mutation_id> [out_dir]
+    python3 scripts/evolution_tracker.py snapshot <mutation_id>
+"""
+
+import bisect
+import difflib
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from instrument import traced
+
+# 每隔多少代保存一次完整快照
+SNAPSHOT_INTERVAL = 10
+
+_HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_GEN_DIR = re.compile(r"^skills/[^/]+/[^/]+/(.+)$")
+
+Files = Dict[str, str]
+
+
+class MaterializeError(Exception):
+    """无法重建某一代的文件"""
+
+
+class Hunk:
+    """一个 @@ 块"""
+
+    __slots__ = ("old_start", "old_len", "new_start", "new_len", "lines",
+                 "old_no_eol", "new_no_eol")
+
+    def __init__(self, old_start: int, old_len: int, new_start: int, new_len: int):
+        self.old_start = old_start
+        self.old_len = old_len
+        self.new_start = new_start
+        self.new_len = new_len
+        self.lines: List[Tuple[str, str]] = []
+        self.old_no_eol = False
+        self.new_no_eol = False
+
+
+class FilePatch:
+    """单个文件的变更"""
+
+    __slots__ = ("old_path", "new_path", "hunks")
+
+    def __init__(self, old_path: str, new_path: str):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.hunks: List[Hunk] = []
+
+
+def file_key(path: Optional[str]) -> Optional[str]:
+    """patch 路径 → 代内文件名 (去掉 a/ b/ 前缀与 skills/<skill>/<version>/)"""
+    if path is None or path == "/dev/null":
+        return None
+    path = path.split("\t", 1)[0]
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    m = _GEN_DIR.match(path)
+    return m.group(1) if m else path
+
+
+def parse_patch(text: str) -> List[FilePatch]:
+    """严格解析 unified diff，行数与 @@ 头不符时报错"""
+    patches: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    hunk: Optional[Hunk] = None
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+
+    def check(h: Optional[Hunk]):
+        if h is None:
+            return
+        old = sum(1 for op, _ in h.lines if op != "+")
+        new = sum(1 for op, _ in h.lines if op != "-")
+        if (old, new) != (h.old_len, h.new_len):
+            raise MaterializeError(
+                f"hunk @@ -{h.old_start},{h.old_len} +{h.new_start},{h.new_len} @@ "
+                f"实际为 -{old} +{new} 行，patch 不完整")
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            check(hunk)
+            hunk = None
+            current = FilePatch(line[4:], lines[i + 1][4:])
+            patches.append(current)
+            i += 2
+            continue
+        m = _HUNK.match(line)
+        if m and current is not None:
+            check(hunk)
+            old_start, old_len, new_start, new_len = m.groups()
+            hunk = Hunk(int(old_start), int(old_len or 1), int(new_start), int(new_len or 1))
+            current.hunks.append(hunk)
+        elif hunk is not None and line[:1] in (" ", "+", "-"):
+            hunk.lines.append((line[0], line[1:]))
+        elif hunk is not None and line == "":
+            hunk.lines.append((" ", ""))
+        elif hunk is not None and line.startswith("\\"):
+            if hunk.lines and hunk.lines[-1][0] == "-":
+                hunk.old_no_eol = True
+            elif hunk.lines and hunk.lines[-1][0] == "+":
+                hunk.new_no_eol = True
+            else:
+                hunk.old_no_eol = hunk.new_no_eol = True
+        else:
+            check(hunk)
+            hunk = None
+        i += 1
+    check(hunk)
+    return patches
+
+
+def _split(text: str) -> Tuple[List[str], bool]:
+    if text == "":
+        return [], True
+    return text.split("\n")[:-1] if text.endswith("\n") else text.split("\n"), text.endswith("\n")
+
+
+def _join(lines: List[str], eol: bool) -> str:
+    if not lines:
+        return ""
+    return "\n".join(lines) + ("\n" if eol else "")
+
+
+def apply_file_patch(text: str, patch: FilePatch) -> str:
+    """应用单文件 patch，上下文必须完全匹配 (允许行号偏移)"""
+    lines, eol = _split(text)
+    out: List[str] = []
+    pos = 0
+    offset = 0
+    for hunk in patch.hunks:
+        expected = [t for op, t in hunk.lines if op != "+"]
+        start = max(hunk.old_start - 1 + offset, 0) if hunk.old_len else hunk.old_start + offset
+        found = None
+        for delta in range(0, len(lines) + 1):
+            for cand in (start - delta, start + delta) if delta else (start,):
+                if pos <= cand <= len(lines) - len(expected) and lines[cand:cand + len(expected)] == expected:
+                    found = cand
+                    break
+            if found is not None:
+                break
+        if found is None:
+            raise MaterializeError(
+                f"{patch.new_path}: hunk @@ -{hunk.old_start},{hunk.old_len} @@ 上下文不匹配")
+        out.extend(lines[pos:found])
+        out.extend(t for op, t in hunk.lines if op != "-")
+        pos = found + len(expected)
+        offset = found - (hunk.old_start - 1)
+        if pos == len(lines):
+            eol = not hunk.new_no_eol
+    out.extend(lines[pos:])
+    return _join(out, eol)
+
+
+def apply_patch(files: Files, text: str) -> Files:
+    """把多文件 patch 应用到文件集合，返回新集合"""
+    result = dict(files)
+    for patch in parse_patch(text):
+        old_key, new_key = file_key(patch.old_path), file_key(patch.new_path)
+        if old_key is not None and old_key not in result:
+            raise MaterializeError(f"patch 修改的文件不存在: {old_key}")
+        source = result.pop(old_key, "") if old_key is not None else ""
+        if new_key is not None:
+            result[new_key] = apply_file_patch(source, patch)
+    return result
+
+
+def _unique_positions(seq: List[str], lo: int, hi: int) -> Dict[str, int]:
+    seen: Dict[str, int] = {}
+    for i in range(lo, hi):
+        seen[seq[i]] = -1 if seq[i] in seen else i
+    return {line: i for line, i in seen.items() if i >= 0}
+
+
+def _patience_anchors(a: List[str], alo: int, ahi: int,
+                      b: List[str], blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """两侧各只出现一次的行，按 b 中位置取最长递增子序列"""
+    ua = _unique_positions(a, alo, ahi)
+    ub = _unique_positions(b, blo, bhi)
+    pairs = [(i, ub[line]) for line, i in sorted(ua.items(), key=lambda kv: kv[1]) if line in ub]
+    # patience sorting: tails[k] 为长度 k+1 的递增子序列末尾 (pairs 下标)，tail_b[k] 为其 b 位置
+    tails: List[int] = []
+    tail_b: List[int] = []
+    prev: List[int] = [-1] * len(pairs)
+    for idx, (_, j) in enumerate(pairs):
+        k = bisect.bisect_left(tail_b, j)
+        if k:
+            prev[idx] = tails[k - 1]
+        if k == len(tails):
+            tails.append(idx)
+            tail_b.append(j)
+        else:
+            tails[k] = idx
+            tail_b[k] = j
+    anchors = []
+    idx = tails[-1] if tails else -1
+    while idx >= 0:
+        anchors.append(pairs[idx])
+        idx = prev[idx]
+    return anchors[::-1]
+
+
+def patience_blocks(a: List[str], b: List[str]) -> List[Tuple[int, int, int]]:
+    """patience diff 的匹配块 (与 SequenceMatcher.get_matching_blocks 格式相同)
+
+    先以两侧唯一的行作锚点切分，锚点之间递归；找不到唯一行的区间退回 difflib。
+    大文件里的重复行 (如 "}") 不会把匹配拖向错误的位置，耗时也接近线性。
+    """
+    matches: List[Tuple[int, int]] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo, blo = alo + 1, blo + 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi, bhi = ahi - 1, bhi - 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+        anchors = _patience_anchors(a, alo, ahi, b, blo, bhi)
+        if not anchors:
+            sm = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+            for i, j, size in sm.get_matching_blocks():
+                matches.extend((alo + i + k, blo + j + k) for k in range(size))
+            continue
+        last_a, last_b = alo, blo
+        for i, j in anchors:
+            stack.append((last_a, i, last_b, j))
+            matches.append((i, j))
+            last_a, last_b = i + 1, j + 1
+        stack.append((last_a, ahi, last_b, bhi))
+
+    blocks: List[Tuple[int, int, int]] = []
+    for i, j in sorted(matches):
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            blocks[-1] = (blocks[-1][0], blocks[-1][1], blocks[-1][2] + 1)
+        else:
+            blocks.append((i, j, 1))
+    blocks.append((len(a), len(b), 0))
+    return blocks
+
+
+class PatienceMatcher(difflib.SequenceMatcher):
+    """用 patience_blocks 代替 difflib 自带匹配的 SequenceMatcher"""
+
+    def __init__(self, a: List[str], b: List[str]):
+        super().__init__(None, a, b, autojunk=False)
+
+    def get_matching_blocks(self):
+        if self.matching_blocks is None:
+            self.matching_blocks = [difflib.Match(*m) for m in patience_blocks(self.a, self.b)]
+        return self.matching_blocks
+
+
+def _range(start: int, length: int) -> str:
+    start += 1 if length else 0
+    return str(start) if length == 1 else f"{start},{length}"
+
+
+def unified_diff(a: List[str], b: List[str], fromfile: str, tofile: str, n: int = 3) -> List[str]:
+    """与 difflib.unified_diff(lineterm="") 输出格式相同，匹配算法为 patience"""
+    out: List[str] = []
+    for group in PatienceMatcher(a, b).get_grouped_opcodes(n):
+        if not out:
+            out += [f"--- {fromfile}", f"+++ {tofile}"]
+        first, last = group[0], group[-1]
+        out.append(f"@@ -{_range(first[1], last[2] - first[1])} +{_range(first[3], last[4] - first[3])} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                out.extend(" " + line for line in a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                out.extend("-" + line for line in a[i1:i2])
+            if tag in ("replace", "insert"):
+                out.extend("+" + line for line in b[j1:j2])
+    return out
+
+
+def diff_files(old: Files, new: Files) -> str:
+    """两个文件集合之间的 unified diff"""
+    chunks = []
+    for key in sorted(set(old) | set(new)):
+        a, b = old.get(key), new.get(key)
+        if a == b:
+            continue
+        # 缺少结尾换行的最后一行带上 "\n" 标记参与比较，输出时还原为 "\ No newline" 行
+        sides = []
+        for text in (a, b):
+            lines, eol = _split(text or "")
+            if lines and not eol:
+                lines[-1] += "\n"
+            sides.append(lines)
+        diff = unified_diff(
+            sides[0], sides[1],
+            fromfile=f"a/{key}" if a is not None else "/dev/null",
+            tofile=f"b/{key}" if b is not None else "/dev/null")
+        for line in diff:
+            if line.endswith("\n"):
+                chunks.append(line[:-1] + "\n\\ No newline at end of file\n")
+            else:
+                chunks.append(line + "\n")
+    return "".join(chunks)
+
+
+def diff_stats(text: str) -> Dict[str, int]:
+    """unified diff 的文件数与增删行数"""
+    stats = {"files": 0, "added": 0, "removed": 0}
+    for patch in parse_patch(text):
+        stats["files"] += 1
+        for hunk in patch.hunks:
+            stats["added"] += sum(1 for op, _ in hunk.lines if op == "+")
+            stats["removed"] += sum(1 for op, _ in hunk.lines if op == "-")
+    return stats
+
+
+class Materializer:
+    """沿谱系重建技能文件，按 interval 放置快照"""
+
+    def __init__(self, tracker, interval: int = SNAPSHOT_INTERVAL):
+        self.tracker = tracker
+        self.interval = interval
+        self.snapshots_dir = tracker.registry / "snapshots"
+        self._mutations: Dict[str, Dict] = {}
+        self._cache: Dict[str, Files] = {}
+
+    def mutation(self, mutation_id: str) -> Dict:
+        """按需读取单个记录，只触及谱系上的文件"""
+        if mutation_id not in self._mutations:
+            self._mutations[mutation_id] = self.tracker.load_mutation(mutation_id)
+        return self._mutations[mutation_id]
+
+    def lineage(self, mutation_id: str) -> List[str]:
+        chain = [mutation_id]
+        current = self.mutation(mutation_id)
+        while current.get("parent_id") not in (None, "null"):
+            parent_id = current["parent_id"]
+            if parent_id in chain:
+                raise MaterializeError(f"谱系成环: {' → '.join(chain)} → {parent_id}")
+            if not self.tracker.has_mutation(parent_id):
+                break
+            chain.append(parent_id)
+            current = self.mutation(parent_id)
+        return list(reversed(chain))
+
+    def depth(self, mutation_id: str) -> int:
+        return len(self.lineage(mutation_id)) - 1
+
+    def load_snapshot(self, mutation_id: str) -> Optional[Files]:
+        """已保存的快照，或旧记录中 diff_url 指向的完整页面"""
+        snap = self.snapshots_dir / mutation_id
+        if snap.is_dir():
+            return {p.relative_to(snap).as_posix(): p.read_text(encoding="utf-8")
+                    for p in sorted(snap.rglob("*")) if p.is_file()}
+        page = self.tracker.page_for(self.mutation(mutation_id))
+        if page is not None and page.exists():
+            return {"index.html": page.read_text(encoding="utf-8")}
+        return None
+
+    def save_snapshot(self, mutation_id: str, files: Files):
+        snap = self.snapshots_dir / mutation_id
+        if snap.exists():
+            import shutil
+            shutil.rmtree(snap)
+        for key, text in files.items():
+            path = snap / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+
+    def patch_for(self, mutation_id: str) -> Optional[str]:
+        patch = self.tracker.patches_dir / f"{mutation_id}.patch"
+        return patch.read_text(encoding="utf-8") if patch.exists() else None
+
+    @traced("materialize.checkout")
+    def checkout(self, mutation_id: str) -> Files:
+        """重建某一代的全部文件"""
+        if mutation_id in self._cache:
+            return dict(self._cache[mutation_id])
+
+        chain = self.lineage(mutation_id)
+        base_idx, files = None, None
+        for idx in range(len(chain) - 1, -1, -1):
+            if chain[idx] in self._cache:
+                base_idx, files = idx, dict(self._cache[chain[idx]])
+                break
+            files = self.load_snapshot(chain[idx])
+            if files is not None:
+                base_idx = idx
+                break
+        if base_idx is None:
+            raise MaterializeError(f"{mutation_id} 的谱系上没有任何快照")
+
+        for mid in chain[base_idx + 1:]:
+            patch = self.patch_for(mid)
+            if patch is None:
+                raise MaterializeError(f"{mid} 既没有快照也没有 patch")
+            try:
+                files = apply_patch(files, patch)
+            except MaterializeError as e:
+                raise MaterializeError(f"{mid}: {e}") from None
+        self._cache[mutation_id] = dict(files)
+        return files
+
+    def write(self, mutation_id: str, out_dir: str) -> List[Path]:
+        out = Path(out_dir)
+        written = []
+        for key, text in self.checkout(mutation_id).items():
+            path = out / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+            written.append(path)
+        return written
+
+    def page_path(self, mutation_id: str) -> Optional[Path]:
+        """可直接打开的页面：旧记录用 diff_url，其余物化到 checkout/<id>/"""
+        page = self.tracker.page_for(self.mutation(mutation_id))
+        if page is not None and page.exists():
+            return page
+        try:
+            written = self.write(mutation_id, str(self.tracker.registry / "checkout" / mutation_id))
+        except MaterializeError:
+            return None
+        return next((p for p in written if p.name == "index.html"), None)
+
+    def after_log(self, mutation_id: str) -> Optional[bool]:
+        """log 之后调用：每 interval 代保存一次快照
+
+        返回 True 表示保存了快照，False 表示无需保存，None 表示无法物化。
+        """
+        self._mutations.pop(mutation_id, None)
+        try:
+            if self.depth(mutation_id) % self.interval:
+                return False
+            files = self.checkout(mutation_id)
+        except MaterializeError:
+            return None
+        self.save_snapshot(mutation_id, files)
+        return True
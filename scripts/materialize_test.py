@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+🧩 ThreeJSEvolution 物化自检
+diff_files / apply_patch 往返、patience diff、严格计数、沿谱系 checkout
+"""
+
+import difflib
+import random
+import sys
+import tempfile
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from materialize import (MaterializeError, Materializer, apply_patch, diff_files, diff_stats,
+                         parse_patch, unified_diff)
+
+BASE = {"index.html": "<html>\n<body>\n<script>\nlet a = 1;\n</script>\n</body>\n</html>\n"}
+NEXT = {
+    "index.html": "<html>\n<body>\n<canvas></canvas>\n<script>\nlet a = 2;\n</script>\n</body>\n</html>",
+    "main.js": "export const x = 1;\n"
+}
+
+
+def test_round_trip():
+    patch = diff_files(BASE, NEXT)
+    assert apply_patch(BASE, patch) == NEXT
+    assert apply_patch(NEXT, diff_files(NEXT, BASE)) == BASE
+    assert diff_files(BASE, BASE) == ""
+
+
+def test_random_round_trip():
+    rng = random.Random(3)
+    for _ in range(500):
+        a = [rng.choice("ab}{;") for _ in range(rng.randint(0, 20))]
+        b = list(a)
+        for _ in range(rng.randint(0, 5)):
+            if b and rng.random() < 0.4:
+                del b[rng.randrange(len(b))]
+            else:
+                b.insert(rng.randint(0, len(b)), rng.choice("axy}"))
+        old = {"f.js": "\n".join(a) + rng.choice(["", "\n"])} if a else {}
+        new = {"f.js": "\n".join(b) + rng.choice(["", "\n"])} if b else {}
+        assert apply_patch(old, diff_files(old, new)) == new, (old, new)
+
+
+def test_patience_diff():
+    a = ["function a() {", "  one();", "}", "", "function b() {", "  two();", "}"]
+    b = ["function b() {", "  two();", "}", "", "function a() {", "  one();", "}"]
+    # 与 difflib 输出格式一致，并且能回放
+    text = "\n".join(unified_diff(a, b, "a/f.js", "b/f.js")) + "\n"
+    assert text.startswith("--- a/f.js\n+++ b/f.js\n@@ -1,7 +1,7 @@")
+    assert apply_patch({"f.js": "\n".join(a) + "\n"}, text) == {"f.js": "\n".join(b) + "\n"}
+    same = [f"{i}" for i in range(200)]
+    changed = same[:50] + ["x"] + same[51:]
+    assert unified_diff(same, changed, "a", "b") == list(
+        difflib.unified_diff(same, changed, "a", "b", lineterm=""))
+    assert diff_stats(diff_files(BASE, NEXT)) == {"files": 2, "added": 4, "removed": 2}
+
+
+def test_strict_counts():
+    patch = diff_files(BASE, NEXT).replace("@@ -1,7 +1,8 @@", "@@ -1,7 +1,9 @@")
+    try:
+        parse_patch(patch)
+    except MaterializeError as e:
+        assert "实际为 -7 +8 行" in str(e)
+    else:
+        raise AssertionError("行数不符的 hunk 应被拒绝")
+
+
+def test_checkout_lineage():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        materializer = Materializer(tracker, interval=2)
+        tracker.patches_dir.mkdir()
+        chain = [BASE, NEXT, BASE]
+        for n, files in enumerate(chain):
+            mid = f"gen-t{n}"
+            tracker.save_mutation({"mutation_id": mid, "parent_id": f"gen-t{n - 1}" if n else "null",
+                                   "diff_url": f"patches/{mid}.patch", "performance_delta": "+0%",
+                                   "changelog": []})
+            if n:
+                (tracker.patches_dir / f"{mid}.patch").write_text(diff_files(chain[n - 1], files))
+        materializer.save_snapshot("gen-t0", BASE)
+
+        assert materializer.lineage("gen-t2") == ["gen-t0", "gen-t1", "gen-t2"]
+        assert materializer.checkout("gen-t1") == NEXT
+        diff = tracker.diff_mutations("gen-t0", "gen-t2")
+        assert diff == "" and tracker.compare_mutations("gen-t0", "gen-t1", diff=True)["diff_stats"]["files"] == 2
+        assert tracker.diff_mutations("gen-t0", "gen-t2") is diff and ("gen-t0", "gen-t2") in tracker._diff_cache
+        assert materializer.after_log("gen-t1") is False
+        assert materializer.after_log("gen-t2") is True
+        assert (tracker.registry / "snapshots" / "gen-t2" / "index.html").read_text() == BASE["index.html"]
+
+        tracker.save_mutation({"mutation_id": "gen-t0", "parent_id": "gen-t2"})
+        try:
+            Materializer(tracker).lineage("gen-t2")
+        except MaterializeError:
+            pass
+        else:
+            raise AssertionError("成环的谱系应报错")
+
+
+def main():
+    tests = [test_round_trip, test_random_round_trip, test_patience_diff, test_strict_counts,
+             test_checkout_lineage]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+📦 ThreeJSEvolution mutation 打包
+把已批准、不再修改的旧 mutation 合并进一个 packfile，按偏移索引经 mmap 随机读取
+
+存储约定：
+1. packs/mutations.pack - 依次拼接的 JSON 记录 (UTF-8，每条以换行结尾)
+2. packs/mutations.idx.json - {mutation_id: [offset, length]}
+3. mutations/<id>.json - 松散记录，优先于 pack 中的同名记录 (修改过的冷记录即写回这里)
+
+Usage:
+    python3 scripts/evolution_tracker.py pack [--older-than DAYS] [--all]
+"""
+
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from instrument import traced
+
+if TYPE_CHECKING:  # datetime 只在打包时用到，运行时延迟导入
+    from datetime import datetime
+
+PACK_DIR = "packs"
+PACK_FILE = "mutations.pack"
+INDEX_FILE = "mutations.idx.json"
+
+# 默认只打包 30 天前的记录
+DEFAULT_AGE_DAYS = 30
+
+
+class MutationPack:
+    """只读 packfile，首次访问时加载索引并 mmap 数据文件"""
+
+    def __init__(self, registry: Path):
+        self.dir = Path(registry) / PACK_DIR
+        self.pack_file = self.dir / PACK_FILE
+        self.index_file = self.dir / INDEX_FILE
+        self._index: Optional[Dict[str, List[int]]] = None
+        self._mm: Optional[mmap.mmap] = None
+
+    @property
+    def index(self) -> Dict[str, List[int]]:
+        if self._index is None:
+            self._index = {}
+            if self.index_file.exists():
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)["records"]
+        return self._index
+
+    def _map(self) -> Optional[mmap.mmap]:
+        if self._mm is None and self.pack_file.exists() and self.pack_file.stat().st_size:
+            with open(self.pack_file, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = None
+        self._index = None
+
+    def __contains__(self, mutation_id: str) -> bool:
+        return mutation_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def ids(self) -> List[str]:
+        return list(self.index)
+
+    def get(self, mutation_id: str) -> Optional[Dict]:
+        entry = self.index.get(mutation_id)
+        mm = self._map() if entry else None
+        if mm is None:
+            return None
+        offset, length = entry
+        return json.loads(mm[offset:offset + length])
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        for mutation_id in self.index:
+            yield mutation_id, self.get(mutation_id)
+
+    def write(self, records: Dict[str, Dict]):
+        """用 records 重写 pack (先写临时文件再替换，读者不会看到半个 pack)"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        index: Dict[str, List[int]] = {}
+        tmp_pack = self.pack_file.with_suffix(".pack.tmp")
+        offset = 0
+        with open(tmp_pack, 'wb') as f:
+            for mutation_id in sorted(records):
+                data = json.dumps(records[mutation_id], ensure_ascii=False,
+                                  separators=(",", ":")).encode("utf-8")
+                f.write(data + b"\n")
+                index[mutation_id] = [offset, len(data)]
+                offset += len(data) + 1
+        tmp_index = self.index_file.with_suffix(".tmp")
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "size": offset, "records": index}, f, separators=(",", ":"))
+
+        self.close()
+        os.replace(tmp_pack, self.pack_file)
+        os.replace(tmp_index, self.index_file)
+
+
+def _parse_time(timestamp: str) -> Optional["datetime"]:
+    from datetime import datetime, timezone
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def pack_candidates(tracker, older_than_days: float = DEFAULT_AGE_DAYS) -> List[str]:
+    """可以打包的松散记录：已批准且早于 older_than_days 天"""
+    from datetime import datetime, timedelta, timezone
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    ids = []
+    for path in sorted(tracker.mutations_dir.glob("*.json")):
+        with open(path, 'r', encoding='utf-8') as f:
+            mutation = json.load(f)
+        created = _parse_time(mutation.get("timestamp", ""))
+        if mutation.get("approved") and created is not None and created <= cutoff:
+            ids.append(mutation["mutation_id"])
+    return ids
+
+
+@traced("pack.pack_mutations")
+def pack_mutations(tracker, older_than_days: float = DEFAULT_AGE_DAYS) -> List[str]:
+    """把符合条件的松散记录并入 pack，然后删除对应的松散文件"""
+    ids = pack_candidates(tracker, older_than_days)
+    if not ids:
+        return []
+    pack = tracker.pack
+    records = dict(pack.items())
+    for mutation_id in ids:
+        records[mutation_id] = tracker.load_mutation(mutation_id)
+    pack.write(records)
+    for mutation_id in ids:
+        (tracker.mutations_dir / f"{mutation_id}.json").unlink()
+    return ids
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+📦 ThreeJSEvolution 打包自检
+pack 之后的合并视图、松散记录覆盖与重新打包
+"""
+
+import sys
+import tempfile
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from mutation_pack import pack_candidates, pack_mutations
+
+
+def _mutation(n: int, approved: bool, timestamp: str = "2026-01-01T00:00:00Z"):
+    return {"mutation_id": f"gen-t{n}", "parent_id": f"gen-t{n - 1}" if n else "null",
+            "timestamp": timestamp, "approved": approved, "description": f"第 {n} 代 · 中文"}
+
+
+def test_pack_merged_view():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        for n in range(4):
+            tracker.save_mutation(_mutation(n, approved=n != 2))
+        tracker.save_mutation(_mutation(4, True, timestamp="2999-01-01T00:00:00Z"))
+        before = tracker.get_evolution_tree()
+
+        assert pack_candidates(tracker, 30) == ["gen-t0", "gen-t1", "gen-t3"]
+        assert pack_mutations(tracker, 30) == ["gen-t0", "gen-t1", "gen-t3"]
+        assert sorted(p.stem for p in tracker.mutations_dir.glob("*.json")) == ["gen-t2", "gen-t4"]
+
+        reader = EvolutionTracker(tmp)
+        assert reader.get_evolution_tree() == before
+        assert reader.load_mutation("gen-t1") == before["gen-t1"]
+        assert reader.has_mutation("gen-t0") and not reader.has_mutation("gen-t9")
+
+        # 修改已打包的记录：写成松散文件并优先读取，再次打包时替换 pack 中的旧版本
+        reader.update_metrics("gen-t1", {"render_fps": 60})
+        assert reader.load_mutation("gen-t1")["metrics"] == {"render_fps": 60}
+        assert pack_mutations(reader, 30) == ["gen-t1"]
+        assert EvolutionTracker(tmp).load_mutation("gen-t1")["metrics"] == {"render_fps": 60}
+        assert len(EvolutionTracker(tmp).pack) == 3
+
+
+def main():
+    tests = [test_pack_merged_view]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+🧬 ThreeJSEvolution 紧凑 mutation 记录
+谱系与统计只需要少数字段：常驻内存的只有热字段，描述、changelog 等冷字段按需读取
+
+热字段：mutation_id, parent_id, target_skill, change_type, agent_id, timestamp,
+        performance_delta (及解析出的数值 delta), approved
+技能、类型、agent 与 ID 字符串全部 intern，同值只存一份。
+"""
+
+import re
+import sys
+from typing import Callable, Dict, Iterator, Optional
+
+_DELTA = re.compile(r"([+-]?\d+(?:\.\d+)?)\s*%")
+
+# 记录中的 JSON 键 → 热字段
+HOT_KEYS = {
+    "mutation_id": "mutation_id",
+    "parent_id": "parent_id",
+    "target_skill": "skill",
+    "change_type": "change_type",
+    "agent_id": "agent",
+    "timestamp": "timestamp",
+    "performance_delta": "performance_delta",
+    "approved": "approved",
+}
+
+Loader = Callable[[str], Dict]
+
+
+def parse_delta(text: Optional[str]) -> Optional[float]:
+    """'+15%' → 15.0，'100% functional' → 100.0，无法解析时为 None"""
+    m = _DELTA.search(text or "")
+    return float(m.group(1)) if m else None
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Mutation:
+    """一条 mutation 的紧凑表示
+
+    既可以用属性访问热字段 (m.skill, m.delta)，也可以像原来的 dict 一样按 JSON 键读取
+    (m["parent_id"], m.get("description"))；访问冷字段时才通过 loader 读取完整记录。
+    """
+
+    __slots__ = ("mutation_id", "parent_id", "skill", "change_type", "agent",
+                 "timestamp", "performance_delta", "delta", "approved", "_loader", "_cold")
+
+    def __init__(self, data: Dict, loader: Optional[Loader] = None):
+        self.mutation_id = _intern(data["mutation_id"])
+        self.parent_id = _intern(data.get("parent_id"))
+        self.skill = _intern(data.get("target_skill"))
+        self.change_type = _intern(data.get("change_type"))
+        self.agent = _intern(data.get("agent_id"))
+        self.timestamp = data.get("timestamp", "")
+        self.performance_delta = _intern(data.get("performance_delta"))
+        self.delta = parse_delta(self.performance_delta)
+        self.approved = bool(data.get("approved"))
+        self._loader = loader
+        self._cold: Optional[Dict] = None
+
+    def __repr__(self) -> str:
+        return f"Mutation({self.mutation_id!r}, parent={self.parent_id!r}, delta={self.performance_delta!r})"
+
+    @property
+    def root(self) -> bool:
+        return self.parent_id in (None, "null")
+
+    def load(self) -> Dict:
+        """完整记录 (冷字段)，读取后缓存到 unload() 为止"""
+        if self._cold is None:
+            if self._loader is None:
+                raise KeyError(f"{self.mutation_id} 没有可用的 loader")
+            self._cold = self._loader(self.mutation_id)
+        return self._cold
+
+    def unload(self):
+        self._cold = None
+
+    def __getitem__(self, key: str):
+        if key in HOT_KEYS:
+            return getattr(self, HOT_KEYS[key])
+        return self.load()[key]
+
+    def get(self, key: str, default=None):
+        if key in HOT_KEYS:
+            return getattr(self, HOT_KEYS[key])
+        return self.load().get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in HOT_KEYS or key in self.load()
+
+    def to_dict(self) -> Dict:
+        return dict(self.load())
+
+
+def compact_tree(records: Iterator[Dict], loader: Optional[Loader] = None) -> Dict[str, Mutation]:
+    """把完整记录流转成 {id: Mutation}，完整 dict 读完即丢弃"""
+    return {m.mutation_id: m for m in (Mutation(data, loader) for data in records)}
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+🧬 ThreeJSEvolution 紧凑记录自检
+热字段、冷字段按需读取，以及相对完整 dict 的内存占用
+"""
+
+import json
+import sys
+import tracemalloc
+
+from instrument import run_tests
+from mutation_record import Mutation, compact_tree, parse_delta
+
+
+def _records(n: int):
+    for i in range(n):
+        yield json.loads(json.dumps({
+            "mutation_id": f"gen-v1-{i:06d}",
+            "parent_id": f"gen-v1-{i - 1:06d}" if i else "null",
+            "agent_id": f"agent-{i % 5}",
+            "target_skill": "threejs-engine",
+            "change_type": "optimization",
+            "timestamp": f"2026-03-{i % 28 + 1:02d}T12:00:00Z",
+            "performance_delta": f"+{i % 40}%",
+            "description": "优化渲染循环 " * 40,
+            "changelog": [f"改动 {k}" for k in range(10)],
+            "metrics": {"code_lines": i, "complexity": "★★☆☆☆", "features": ["a", "b", "c"]},
+            "approved": i % 2 == 0
+        }))
+
+
+def test_hot_and_cold_fields():
+    loads = []
+    full = next(_records(1))
+
+    def loader(mutation_id):
+        loads.append(mutation_id)
+        return full
+
+    m = Mutation(full, loader)
+    assert (m.skill, m.delta, m.approved, m.root) == ("threejs-engine", 0.0, True, True)
+    assert m["parent_id"] == "null" and m.get("target_skill") == "threejs-engine"
+    assert not loads
+    assert m["changelog"][0] == "改动 0" and m.get("missing", 1) == 1
+    assert loads == ["gen-v1-000000"]
+    m.unload()
+    assert m.to_dict() == full and len(loads) == 2
+    assert parse_delta("100% functional") == 100.0 and parse_delta("-2.5%") == -2.5
+    assert parse_delta("更稳定") is None
+
+
+def test_interned_and_compact():
+    n = 3000
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tree = {d["mutation_id"]: d for d in _records(n)}
+    full_bytes = tracemalloc.get_traced_memory()[0] - base
+    del tree
+    base = tracemalloc.get_traced_memory()[0]
+    records = compact_tree(_records(n))
+    compact_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    assert compact_bytes < full_bytes * 0.2, (compact_bytes, full_bytes)
+    a, b = records["gen-v1-000001"], records["gen-v1-000002"]
+    assert a.skill is b.skill and b.parent_id is a.mutation_id
+
+
+def main():
+    tests = [test_hot_and_cold_fields, test_interned_and_compact]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
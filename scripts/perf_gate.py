@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+🚦 ThreeJSEvolution 性能回归门禁
+在相同条件下对候选 mutation 与其 parent 做重复基准测试，用统计检验判定是否回归
+
+检查项：
+1. 加载体积 - 页面原始字节数与 gzip 字节数 (确定值，按阈值比较)
+2. 帧时间 - 无头浏览器 + 遥测探针，每轮取 p50/p95 (Mann-Whitney U 检验)
+3. 长任务 - 每轮长任务数量 (Mann-Whitney U 检验)
+
+Usage:
+    python3 scripts/perf_gate.py <mutation_id> [--trials 5] [--threshold 5] [--approve]
+    python3 scripts/evolution_tracker.py gate <mutation_id> ...
+"""
+
+import argparse
+import gzip
+import itertools
+import math
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from evolution_tracker import EvolutionTracker, default_registry
+from instrument import configure, traced
+
+BROWSERS = ["chromium", "chromium-browser", "google-chrome", "google-chrome-stable"]
+
+# 精确检验的样本上限 (C(16, 8) = 12870 种组合)
+EXACT_LIMIT = 16
+
+
+def find_browser() -> Optional[str]:
+    """查找可用的无头浏览器"""
+    for name in BROWSERS:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def _ranks(values: Sequence[float]) -> List[float]:
+    """平均秩 (处理并列)"""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2.0 + 1
+        i = j + 1
+    return ranks
+
+
+def mann_whitney_greater(a: Sequence[float], b: Sequence[float]) -> Tuple[float, float]:
+    """单侧 Mann-Whitney U 检验: H1 为 b 的取值倾向大于 a
+
+    返回 (U_b, p)。小样本时枚举全部分组得到精确 p 值，否则用带并列修正的正态近似。
+    """
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 0.0, 1.0
+    pooled = list(a) + list(b)
+    ranks = _ranks(pooled)
+    u_b = sum(ranks[n1:]) - n2 * (n2 + 1) / 2.0
+
+    if n1 + n2 <= EXACT_LIMIT:
+        base = n2 * (n2 + 1) / 2.0
+        hits = total = 0
+        for combo in itertools.combinations(range(n1 + n2), n2):
+            total += 1
+            if sum(ranks[i] for i in combo) - base >= u_b - 1e-9:
+                hits += 1
+        return u_b, hits / total
+
+    n = n1 + n2
+    ties = {}
+    for v in pooled:
+        ties[v] = ties.get(v, 0) + 1
+    tie_term = sum(t ** 3 - t for t in ties.values()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return u_b, 1.0
+    z = (u_b - n1 * n2 / 2.0 - 0.5) / sigma
+    return u_b, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _median(values: Sequence[float]) -> float:
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2.0
+
+
+def load_size(page: Path) -> Dict[str, int]:
+    """页面加载体积"""
+    data = page.read_bytes()
+    return {"raw_bytes": len(data), "gzip_bytes": len(gzip.compress(data, 9, mtime=0))}
+
+
+class BrowserBench:
+    """无头浏览器帧时间基准 (复用遥测采集服务器与探针)"""
+
+    def __init__(self, tracker: EvolutionTracker, root: Path, browser: str,
+                 duration: float = 5.0):
+        from telemetry import make_server
+        from vendor_cache import VendorCache
+
+        self.browser = browser
+        self.duration = duration
+        self.root = root
+        # CDN 库从本地缓存加载，排除网络波动对帧时间的影响
+        self.server = make_server(tracker, str(root), 0, persist=False, probe_interval_ms=500,
+                                  vendor=VendorCache(str(root)))
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @traced("gate.trial")
+    def run(self, page: Path) -> Optional[Dict[str, float]]:
+        """打开页面 duration 秒，返回本轮帧时间统计"""
+        rel = page.resolve().relative_to(self.root.resolve()).as_posix()
+        store = self.server.store
+        store.reset(rel)
+
+        with tempfile.TemporaryDirectory() as profile:
+            proc = subprocess.Popen(
+                [self.browser, "--headless=new", "--no-sandbox", "--no-first-run",
+                 "--mute-audio", "--window-size=1280,720",
+                 "--use-angle=swiftshader", "--enable-unsafe-swiftshader",
+                 f"--user-data-dir={profile}",
+                 f"http://127.0.0.1:{self.port}/{rel}"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                time.sleep(self.duration)
+            finally:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+
+        summary = store.summary(rel)
+        if not summary or not summary["frames"]:
+            return None
+        return {
+            "frame_p50_ms": summary["frame_ms"]["p50"],
+            "frame_p95_ms": summary["frame_ms"]["p95"],
+            "long_tasks": summary["long_tasks"]
+        }
+
+
+def _delta_pct(parent: float, candidate: float) -> Optional[float]:
+    """相对变化百分比；parent 为 0 而候选不为 0 时无法按比例衡量，返回 None"""
+    if parent:
+        return round((candidate - parent) / parent * 100, 2)
+    return 0.0 if candidate == parent else None
+
+
+def _exceeds(parent: float, candidate: float, delta_pct: Optional[float], threshold: float) -> bool:
+    # 基线为 0 (如 parent 没有长任务) 时，任何增加都算超过阈值
+    return candidate > parent if delta_pct is None else delta_pct > threshold
+
+
+def _compare_samples(parent: List[float], candidate: List[float],
+                     threshold: float, alpha: float) -> Dict:
+    """越小越好的指标: 候选变大超过阈值且显著时判定回归"""
+    p_med, c_med = _median(parent), _median(candidate)
+    delta_pct = _delta_pct(p_med, c_med)
+    _, p_value = mann_whitney_greater(parent, candidate)
+    return {
+        "parent": round(p_med, 3),
+        "candidate": round(c_med, 3),
+        "delta_pct": delta_pct,
+        "p_value": round(p_value, 4),
+        "regressed": _exceeds(p_med, c_med, delta_pct, threshold) and p_value < alpha
+    }
+
+
+def _compare_fixed(parent: float, candidate: float, threshold: float) -> Dict:
+    delta_pct = _delta_pct(parent, candidate)
+    return {
+        "parent": parent,
+        "candidate": candidate,
+        "delta_pct": delta_pct,
+        "regressed": _exceeds(parent, candidate, delta_pct, threshold)
+    }
+
+
+@traced("gate.run")
+def run_gate(tracker: EvolutionTracker, mutation_id: str, trials: int = 5,
+             threshold: float = 5.0, alpha: float = 0.05, duration: float = 5.0,
+             browser: Optional[str] = None) -> Dict:
+    """对候选与 parent 交替进行 trials 轮测试，返回门禁结果"""
+    candidate = tracker.load_mutation(mutation_id)
+    parent_id = candidate.get("parent_id")
+    if not parent_id or parent_id == "null":
+        raise ValueError(f"{mutation_id} 没有 parent，无法比较")
+    parent = tracker.load_mutation(parent_id)
+
+    from materialize import Materializer
+
+    materializer = Materializer(tracker)
+    pages = {}
+    for role, mutation in (("parent", parent), ("candidate", candidate)):
+        page = materializer.page_path(mutation["mutation_id"])
+        if page is None:
+            raise ValueError(f"{mutation['mutation_id']} 没有可测试的页面 (diff_url: {mutation.get('diff_url')})")
+        pages[role] = page
+    if pages["parent"].resolve() == pages["candidate"].resolve():
+        raise ValueError(f"{mutation_id} 与 parent {parent_id} 指向同一页面 ({candidate.get('diff_url')})，"
+                         f"比较没有意义；请先为 {mutation_id} 保存独立的页面或快照")
+
+    results: Dict[str, Dict] = {}
+    sizes = {role: load_size(page) for role, page in pages.items()}
+    for key in ("raw_bytes", "gzip_bytes"):
+        results[key] = _compare_fixed(sizes["parent"][key], sizes["candidate"][key], threshold)
+
+    browser = browser or find_browser()
+    samples: Dict[str, Dict[str, List[float]]] = {"parent": {}, "candidate": {}}
+    if browser:
+        bench = BrowserBench(tracker, tracker.registry, browser, duration)
+        try:
+            # 交替执行，抵消机器负载随时间的漂移
+            for _ in range(trials):
+                for role in ("parent", "candidate"):
+                    stats = bench.run(pages[role])
+                    if stats is None:
+                        continue
+                    for key, value in stats.items():
+                        samples[role].setdefault(key, []).append(value)
+        finally:
+            bench.close()
+
+    for key in ("frame_p50_ms", "frame_p95_ms", "long_tasks"):
+        p_samples = samples["parent"].get(key, [])
+        c_samples = samples["candidate"].get(key, [])
+        if len(p_samples) >= 2 and len(c_samples) >= 2:
+            results[key] = _compare_samples(p_samples, c_samples, threshold, alpha)
+
+    # 实测性能变化: 优先用帧时间，否则用 gzip 体积 (正数为提升)
+    primary = "frame_p50_ms" if "frame_p50_ms" in results else "gzip_bytes"
+    measured = -(results[primary]["delta_pct"] or 0.0)
+    regressed = [k for k, r in results.items() if r["regressed"]]
+    if regressed:
+        status = "regressed"
+    elif primary == "gzip_bytes":
+        # 没有帧数据时只验证了体积，不足以确认声明的性能变化
+        status = "size-only"
+    else:
+        status = "passed"
+
+    return {
+        "parent_id": parent_id,
+        "status": status,
+        "regressed_metrics": regressed,
+        "measured_delta": f"{'+' if measured >= 0 else '-'}{abs(round(measured))}%",
+        "primary_metric": primary,
+        "trials": trials,
+        "threshold_pct": threshold,
+        "alpha": alpha,
+        "browser": Path(browser).name if browser else None,
+        "results": results,
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
+def record_gate(tracker: EvolutionTracker, mutation_id: str, gate: Dict,
+                approve: bool = False) -> Dict:
+    """把实测结果写回 mutation: 实测帧时间取代声明值，回归时撤销批准
+
+    size-only 的结果只记录在 perf_gate 中，声明的 delta 与批准状态保持不变。
+    """
+    mutation = tracker.load_mutation(mutation_id)
+    if gate["primary_metric"] != "gzip_bytes":
+        mutation.setdefault("claimed_performance_delta", mutation.get("performance_delta"))
+        mutation["performance_delta"] = gate["measured_delta"]
+    mutation["perf_gate"] = gate
+    if gate["status"] == "regressed":
+        mutation["approved"] = False
+        mutation.pop("reviewer", None)
+    elif approve and gate["status"] == "passed":
+        mutation["approved"] = True
+        mutation["reviewer"] = "perf-gate"
+    tracker.save_mutation(mutation)
+    return mutation
+
+
+def main(argv: Optional[List[str]] = None, tracker: Optional[EvolutionTracker] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 性能回归门禁")
+    parser.add_argument("mutation_id")
+    parser.add_argument("--registry", default=default_registry(),
+                        help="mutation 所在 registry (默认 EVOLUTION_REGISTRY 或仓库根目录)")
+    parser.add_argument("--trials", type=int, default=5, help="每个版本的测试轮数")
+    parser.add_argument("--threshold", type=float, default=5.0, help="允许的退化百分比")
+    parser.add_argument("--alpha", type=float, default=0.05, help="显著性水平")
+    parser.add_argument("--duration", type=float, default=5.0, help="每轮运行秒数")
+    parser.add_argument("--browser", help="浏览器可执行文件 (默认自动查找)")
+    parser.add_argument("--approve", action="store_true", help="通过时标记为 approved")
+    parser.add_argument("--dry-run", action="store_true", help="只输出结果，不写回")
+    args = parser.parse_args(configure(sys.argv[1:] if argv is None else argv))
+
+    tracker = tracker or EvolutionTracker(args.registry)
+    try:
+        args.mutation_id = tracker.resolve_id(args.mutation_id)
+        gate = run_gate(tracker, args.mutation_id, args.trials, args.threshold,
+                        args.alpha, args.duration, args.browser)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"🚦 {args.mutation_id} vs {gate['parent_id']}")
+    if not gate["browser"]:
+        print("⚠️ 未找到无头浏览器，仅比较加载体积")
+    for key, r in gate["results"].items():
+        symbol = "❌" if r["regressed"] else "✅"
+        p_value = f" (p={r['p_value']})" if "p_value" in r else ""
+        change = "从 0 增加" if r["delta_pct"] is None else f"{r['delta_pct']:+}%"
+        print(f"   {symbol} {key}: {r['parent']} → {r['candidate']} ({change}){p_value}")
+    print(f"📊 实测性能变化: {gate['measured_delta']} ({gate['primary_metric']})")
+
+    if not args.dry_run:
+        record_gate(tracker, args.mutation_id, gate, args.approve)
+
+    if gate["status"] == "regressed":
+        print(f"❌ 回归超过 {args.threshold}%: {', '.join(gate['regressed_metrics'])}")
+        return 1
+    if gate["status"] == "size-only":
+        print("⚠️ 仅验证了加载体积，保留声明的性能变化" + ("，未批准" if args.approve else ""))
+        return 0
+    print("✅ 门禁通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+🚦 ThreeJSEvolution 门禁自检
+Mann-Whitney U 检验与门禁结果写回规则
+"""
+
+import sys
+import tempfile
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from perf_gate import _compare_fixed, _compare_samples, mann_whitney_greater, record_gate
+
+
+def test_mann_whitney_exact():
+    u, p = mann_whitney_greater([1, 2, 3], [4, 5, 6])
+    assert u == 9 and abs(p - 1 / 20) < 1e-9
+    u, p = mann_whitney_greater([4, 5, 6], [1, 2, 3])
+    assert u == 0 and p == 1.0
+    # 并列值取平均秩
+    u, p = mann_whitney_greater([1, 1], [1, 1])
+    assert u == 2 and p == 1.0
+
+
+def test_mann_whitney_normal():
+    u, p = mann_whitney_greater(list(range(10)), list(range(10, 20)))
+    assert u == 100 and p < 1e-3
+    _, p = mann_whitney_greater(list(range(20)), list(range(20)))
+    assert 0.4 < p < 0.6
+
+
+def test_compare_samples():
+    slower = _compare_samples([16.0, 16.2, 16.1, 16.3], [18.0, 18.1, 18.3, 18.2], 5.0, 0.05)
+    assert slower["regressed"] and slower["delta_pct"] > 5
+    noisy = _compare_samples([16.0, 18.0], [18.0, 16.0], 5.0, 0.05)
+    assert not noisy["regressed"]
+
+
+def test_zero_baseline_regresses():
+    # parent 没有长任务，候选每轮都有：按比例无法衡量，但任何增加都算回归
+    new_tasks = _compare_samples([0, 0, 0, 0, 0], [2, 3, 2, 4, 3], 5.0, 0.05)
+    assert new_tasks["regressed"] and new_tasks["delta_pct"] is None and new_tasks["candidate"] == 3
+    still_zero = _compare_samples([0, 0, 0, 0, 0], [0, 0, 0, 0, 0], 5.0, 0.05)
+    assert not still_zero["regressed"] and still_zero["delta_pct"] == 0.0
+    assert _compare_fixed(0, 120, 5.0)["regressed"]
+    assert not _compare_fixed(0, 0, 5.0)["regressed"]
+
+
+def test_size_only_keeps_claim():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        tracker.save_mutation({"mutation_id": "gen-t1", "parent_id": "gen-t0",
+                               "performance_delta": "+30%", "approved": False})
+        gate = {"status": "size-only", "primary_metric": "gzip_bytes", "measured_delta": "+0%"}
+        mutation = record_gate(tracker, "gen-t1", gate, approve=True)
+        assert mutation["performance_delta"] == "+30%"
+        assert "claimed_performance_delta" not in mutation
+        assert mutation["approved"] is False
+
+        gate = {"status": "passed", "primary_metric": "frame_p50_ms", "measured_delta": "+12%"}
+        mutation = record_gate(tracker, "gen-t1", gate, approve=True)
+        assert mutation["performance_delta"] == "+12%"
+        assert mutation["claimed_performance_delta"] == "+30%"
+        assert mutation["approved"] is True
+
+
+def main():
+    tests = [test_mann_whitney_exact, test_mann_whitney_normal, test_compare_samples,
+             test_zero_baseline_regresses, test_size_only_keeps_claim]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
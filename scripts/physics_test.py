@@ -10,12 +10,20 @@ import os
 import sys
 from datetime import datetime
 
+from instrument import configure, traced
+
 class PhysicsEngineTester:
     """物理引擎测试器"""
     
-    def __init__(self):
+    def __init__(self, offline=False):
         self.test_file = "/root/.openclaw/workspace/evolution-registry/skills/threejs/v1_phys/index.html"
         self.url = "https://perlinson.github.io/ThreeJSEvolution/skills/threejs/v1_phys/index.html"
+        # 离线模式: 使用本地预览服务器与 vendor 缓存，不访问外网
+        self.offline = offline or os.environ.get("EVOLUTION_OFFLINE") == "1"
+        self.root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.preview = None
+        if self.offline:
+            self.test_file = os.path.join(self.root, "skills/threejs/v1_phys/index.html")
         self.results = []
         self.passed = 0
         self.failed = 0
@@ -39,6 +47,7 @@ class PhysicsEngineTester:
             if message:
                 print(f"        ❗ {message}")
     
+    @traced("physics.file_exists")
     def test_file_exists(self):
         """测试1: 文件是否存在"""
         print("\n1️⃣ 测试文件存在...")
@@ -46,6 +55,7 @@ class PhysicsEngineTester:
         self.log_test("HTML 文件存在", exists, f"路径: {self.test_file}")
         return exists
     
+    @traced("physics.html_structure")
     def test_html_structure(self):
         """测试2: HTML 结构"""
         print("\n2️⃣ 测试 HTML 结构...")
@@ -70,6 +80,7 @@ class PhysicsEngineTester:
         
         return all_pass, content
     
+    @traced("physics.threejs_integration")
     def test_threejs_integration(self, content):
         """测试3: Three.js 集成"""
         print("\n3️⃣ 测试 Three.js 集成...")
@@ -91,6 +102,7 @@ class PhysicsEngineTester:
         
         return all_pass
     
+    @traced("physics.physics_engine")
     def test_physics_engine(self, content):
         """测试4: 物理引擎 (Cannon.js)"""
         print("\n4️⃣ 测试物理引擎...")
@@ -112,6 +124,7 @@ class PhysicsEngineTester:
         
         return all_pass
     
+    @traced("physics.interactive_functions")
     def test_interactive_functions(self, content):
         """测试5: 交互功能"""
         print("\n5️⃣ 测试交互功能...")
@@ -152,6 +165,7 @@ class PhysicsEngineTester:
         
         return all_pass, js_code
     
+    @traced("physics.ui_elements")
     def test_ui_elements(self, content):
         """测试6: UI 元素"""
         print("\n6️⃣ 测试 UI 元素...")
@@ -175,6 +189,7 @@ class PhysicsEngineTester:
         
         return all_pass
     
+    @traced("physics.javascript_syntax")
     def test_javascript_syntax(self, js_code):
         """测试7: JavaScript 语法"""
         print("\n7️⃣ 测试 JavaScript 语法...")
@@ -199,10 +214,17 @@ class PhysicsEngineTester:
             self.log_test("JavaScript 语法检查", False, error)
             return False
     
+    @traced("physics.http_accessibility")
     def test_http_accessibility(self):
         """测试8: HTTP 可访问性"""
         print("\n8️⃣ 测试 HTTP 可访问性...")
         
+        if self.offline and self.preview is None:
+            from vendor_cache import start_preview
+            self.preview, base = start_preview(self.root)
+            self.url = f"{base}/skills/threejs/v1_phys/index.html"
+            print(f"   🔌 离线模式: {self.url}")
+        
         result = subprocess.run(
             ['curl', '-s', '-o', '/dev/null', '-w', '%{http_code}', self.url],
             capture_output=True,
@@ -227,10 +249,17 @@ class PhysicsEngineTester:
             has_threejs = 'three.min.js' in content
             self.log_test("Three.js 引用存在", has_threejs)
             
+            if self.offline:
+                cdn = re.findall(r'<script[^>]+src="(https?://[^"]+)"', content)
+                self.log_test("CDN 依赖已本地缓存", not cdn,
+                              f"未缓存: {', '.join(cdn)}" if cdn else "全部从 vendor/ 加载")
+                return has_canvas and has_threejs and not cdn
+            
             return has_canvas and has_threejs
         
         return False
     
+    @traced("physics.recursive_calls")
     def test_recursive_calls(self, js_code):
         """测试9: 递归调用问题"""
         print("\n9️⃣ 测试递归调用问题...")
@@ -335,7 +364,8 @@ class PhysicsEngineTester:
 
 
 def main():
-    tester = PhysicsEngineTester()
+    argv = configure(sys.argv)
+    tester = PhysicsEngineTester(offline="--offline" in argv)
     success = tester.run_all_tests()
     return 0 if success else 1
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+🔎 ThreeJSEvolution 属性查询
+按技能、类型、agent、批准状态和时间范围筛选 mutation，结果分页
+
+索引 (logs/query_index.json)：
+1. by_time - 按 (timestamp, id) 排序的列表，时间范围用二分查找
+2. postings - 各分类字段的倒排表 {字段: {取值: [id, ...]}}
+3. docs - 每条记录的索引值，更新时据此撤掉旧的倒排项
+
+save_mutation 写入记录时同步更新索引；索引不存在时第一次查询会全量重建。
+其他途径到达的记录 (git pull、手动复制、sync) 在查询前按 ID 集合比对补入。
+查询只读取命中且落在当前页的记录。
+
+Usage:
+    python3 scripts/evolution_tracker.py query --skill threejs-game --type optimization \\
+        --agent xiaobao-01 --since 2026-03-01 [--approved yes|no] [--limit 20] [--page 1]
+"""
+
+import argparse
+import bisect
+import json
+import sys
+from typing import Dict, List, Optional
+
+from evolution_tracker import EvolutionTracker, default_registry
+from instrument import configure, traced
+
+INDEX_FILE = "query_index.json"
+
+# 索引字段 → 记录中的 JSON 键
+FIELDS = {
+    "skill": "target_skill",
+    "type": "change_type",
+    "agent": "agent_id",
+    "approved": "approved",
+}
+
+
+def _value(mutation, key: str) -> str:
+    value = mutation.get(key)
+    if key == "approved":
+        return "yes" if value else "no"
+    return "" if value is None else str(value)
+
+
+class QueryIndex:
+    """按字段维护的二级索引"""
+
+    def __init__(self, tracker: EvolutionTracker):
+        self.tracker = tracker
+        self.path = tracker.logs_file.parent / INDEX_FILE
+        self.by_time: List[List[str]] = []
+        self.postings: Dict[str, Dict[str, List[str]]] = {f: {} for f in FIELDS}
+        self.docs: Dict[str, List[str]] = {}
+        self.loaded = False
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.by_time = data["by_time"]
+            self.postings = data["postings"]
+            self.docs = data["docs"]
+            self.loaded = True
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "count": len(self.docs), "by_time": self.by_time,
+                       "postings": self.postings, "docs": self.docs},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        tmp.replace(self.path)
+        self.loaded = True
+
+    @traced("query.rebuild")
+    def rebuild(self) -> "QueryIndex":
+        self.by_time, self.docs = [], {}
+        self.postings = {f: {} for f in FIELDS}
+        for mutation in self.tracker.get_records().values():
+            self._add(mutation)
+        self.save()
+        return self
+
+    def _add(self, mutation):
+        mutation_id = mutation["mutation_id"]
+        values = [_value(mutation, key) for key in FIELDS.values()]
+        timestamp = mutation.get("timestamp") or ""
+        self.docs[mutation_id] = values + [timestamp]
+        bisect.insort(self.by_time, [timestamp, mutation_id])
+        for field, value in zip(FIELDS, values):
+            ids = self.postings[field].setdefault(value, [])
+            ids.insert(bisect.bisect_left(ids, mutation_id), mutation_id)
+
+    def _remove(self, mutation_id: str):
+        doc = self.docs.pop(mutation_id, None)
+        if doc is None:
+            return
+        pos = bisect.bisect_left(self.by_time, [doc[-1], mutation_id])
+        if pos < len(self.by_time) and self.by_time[pos] == [doc[-1], mutation_id]:
+            del self.by_time[pos]
+        for field, value in zip(FIELDS, doc):
+            ids = self.postings[field].get(value, [])
+            pos = bisect.bisect_left(ids, mutation_id)
+            if pos < len(ids) and ids[pos] == mutation_id:
+                del ids[pos]
+            if not ids:
+                self.postings[field].pop(value, None)
+
+    @traced("query.refresh")
+    def refresh(self) -> int:
+        """与 mutations/ 文件名和 pack 索引比对，补入缺少的记录、撤掉已删除的记录，返回变化条数
+
+        只比较 ID 集合 (不解析已索引的记录)；绕过 save_mutation 直接改写已有记录需要 --rebuild。
+        """
+        if not self.loaded:
+            self.rebuild()
+            return len(self.docs)
+        on_disk = {p.stem for p in self.tracker.mutations_dir.glob("*.json")}
+        on_disk.update(self.tracker.pack.ids())
+        added = on_disk.difference(self.docs)
+        removed = set(self.docs).difference(on_disk)
+        for mutation_id in removed:
+            self._remove(mutation_id)
+        for mutation_id in sorted(added):
+            self._add(self.tracker.load_mutation(mutation_id))
+        if added or removed:
+            self.save()
+        return len(added) + len(removed)
+
+    def update(self, mutation: Dict, save: bool = True) -> bool:
+        """记录新增或修改后调用 (索引尚未建立时什么也不做)，返回索引是否有变化"""
+        if not self.loaded:
+            return False
+        values = [_value(mutation, key) for key in FIELDS.values()] + [mutation.get("timestamp") or ""]
+        if self.docs.get(mutation["mutation_id"]) == values:
+            return False
+        self._remove(mutation["mutation_id"])
+        self._add(mutation)
+        if save:
+            self.save()
+        return True
+
+    def remove(self, mutation_id: str, save: bool = True) -> bool:
+        """记录被删除后调用"""
+        if not self.loaded or mutation_id not in self.docs:
+            return False
+        self._remove(mutation_id)
+        if save:
+            self.save()
+        return True
+
+    @traced("query.search")
+    def search(self, since: Optional[str] = None, until: Optional[str] = None,
+               **filters: Optional[str]) -> List[str]:
+        """满足全部条件的 ID，按时间排序"""
+        candidates = None
+        for field, value in sorted(filters.items(), key=lambda kv: len(self.postings[kv[0]].get(kv[1], []))):
+            if value is None:
+                continue
+            ids = self.postings[field].get(value, [])
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+            if not candidates:
+                return []
+
+        # until 只写日期时包含当天全部记录
+        upper = until + "\uffff" if until else None
+        lo = bisect.bisect_left(self.by_time, [since]) if since else 0
+        hi = bisect.bisect_right(self.by_time, [upper]) if upper else len(self.by_time)
+        if candidates is not None and len(candidates) < hi - lo:
+            # 倒排表比时间窗口更窄：只看命中的记录
+            hits = sorted((self.docs[mid][-1], mid) for mid in candidates)
+            return [mid for ts, mid in hits if (not since or ts >= since) and (not upper or ts <= upper)]
+        return [mid for _, mid in self.by_time[lo:hi] if candidates is None or mid in candidates]
+
+
+def run_query(tracker: EvolutionTracker, index: QueryIndex, limit: int = 20, page: int = 1,
+              since: Optional[str] = None, until: Optional[str] = None, **filters) -> Dict:
+    ids = index.search(since, until, **filters)
+    start = (page - 1) * limit
+    rows = []
+    for mutation_id in ids[start:start + limit]:
+        m = tracker.load_mutation(mutation_id)
+        rows.append({
+            "id": mutation_id,
+            "parent": m.get("parent_id"),
+            "skill": m.get("target_skill"),
+            "type": m.get("change_type"),
+            "agent": m.get("agent_id"),
+            "delta": m.get("performance_delta"),
+            "timestamp": m.get("timestamp"),
+            "approved": bool(m.get("approved"))
+        })
+    return {"total": len(ids), "page": page, "pages": max(1, -(-len(ids) // limit)), "rows": rows}
+
+
+def main(argv: Optional[List[str]] = None, tracker: Optional[EvolutionTracker] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 属性查询")
+    parser.add_argument("--registry", default=default_registry())
+    parser.add_argument("--skill")
+    parser.add_argument("--type")
+    parser.add_argument("--agent")
+    parser.add_argument("--approved", choices=["yes", "no"])
+    parser.add_argument("--since", help="起始时间 (含)，如 2026-03-01")
+    parser.add_argument("--until", help="结束时间 (含)")
+    parser.add_argument("--limit", type=int, default=20, help="每页条数")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--rebuild", action="store_true", help="全量重建索引")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args(configure(sys.argv[1:] if argv is None else argv))
+
+    tracker = tracker or EvolutionTracker(args.registry)
+    index = tracker.query_index
+    if args.rebuild:
+        index.rebuild()
+    else:
+        index.refresh()
+
+    result = run_query(tracker, index, max(1, args.limit), max(1, args.page), args.since, args.until,
+                       skill=args.skill, type=args.type, agent=args.agent, approved=args.approved)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return 0
+    for row in result["rows"]:
+        mark = "✅" if row["approved"] else "⏳"
+        print(f"{mark} {row['timestamp']}  {row['id']:<24} {row['skill']:<16} {row['type']:<14} "
+              f"{row['agent']:<12} {row['delta']}")
+    print(f"🔎 共 {result['total']} 条，第 {result['page']}/{result['pages']} 页")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
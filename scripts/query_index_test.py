@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+🔎 ThreeJSEvolution 查询自检
+索引查询与全量扫描结果一致，save_mutation 后索引同步更新，其他途径到达的记录在查询前补入
+"""
+
+import io
+import json
+import random
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from query_index import main as query_main
+from query_index import run_query
+from tracker_daemon import CachedTracker
+
+SKILLS = ["threejs-game", "threejs-engine"]
+TYPES = ["optimization", "bugfix", "feature_addition"]
+AGENTS = ["xiaobao-01", "xiaobao-02"]
+
+
+def _scan(tree, since=None, until=None, **filters):
+    keys = {"skill": "target_skill", "type": "change_type", "agent": "agent_id"}
+    hits = []
+    for m in tree.values():
+        if any(v is not None and m[keys[k]] != v for k, v in filters.items() if k in keys):
+            continue
+        if filters.get("approved") and ("yes" if m["approved"] else "no") != filters["approved"]:
+            continue
+        if (since and m["timestamp"] < since) or (until and m["timestamp"][:len(until)] > until):
+            continue
+        hits.append((m["timestamp"], m["mutation_id"]))
+    return [mid for _, mid in sorted(hits)]
+
+
+def test_query_matches_scan():
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        for n in range(200):
+            tracker.save_mutation({
+                "mutation_id": f"gen-q{n:03d}", "parent_id": "null",
+                "target_skill": rng.choice(SKILLS), "change_type": rng.choice(TYPES),
+                "agent_id": rng.choice(AGENTS), "approved": rng.random() < 0.5,
+                "timestamp": f"2026-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}T10:00:00Z"})
+        tree = tracker.get_evolution_tree()
+        index = tracker.query_index.rebuild()
+
+        cases = [{}, {"skill": "threejs-game"}, {"skill": "threejs-game", "type": "optimization",
+                                                 "agent": "xiaobao-01", "since": "2026-03-01"},
+                 {"approved": "yes", "until": "2026-02-28"}, {"since": "2026-04-01", "until": "2026-04-30"},
+                 {"agent": "nobody"}]
+        for case in cases:
+            assert index.search(**case) == _scan(tree, **case), case
+
+        # 新增与修改都会同步到索引 (包括从另一个 tracker 实例重新读取)
+        mutation = tracker.load_mutation("gen-q000")
+        mutation["change_type"] = "breakthrough"
+        tracker.save_mutation(mutation)
+        fresh = EvolutionTracker(tmp).query_index
+        assert fresh.search(type="breakthrough") == ["gen-q000"]
+        assert "gen-q000" not in fresh.search(type=tree["gen-q000"]["change_type"])
+
+        page = run_query(tracker, fresh, limit=7, page=2, skill="threejs-engine")
+        expected = _scan(tracker.get_evolution_tree(), skill="threejs-engine")
+        assert page["total"] == len(expected) and [r["id"] for r in page["rows"]] == expected[7:14]
+
+
+def _query(tracker, *argv):
+    out = io.StringIO()
+    with redirect_stdout(out):
+        assert query_main(list(argv) + ["--json"], tracker) == 0
+    return [row["id"] for row in json.loads(out.getvalue())["rows"]]
+
+
+def test_records_added_outside_tracker():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        for n in range(3):
+            tracker.save_mutation({"mutation_id": f"gen-q{n}", "parent_id": "null", "agent_id": "tester",
+                                   "timestamp": f"2026-03-0{n + 1}T10:00:00Z"})
+        daemon = CachedTracker(tmp)
+        assert _query(EvolutionTracker(tmp), "--agent", "tester") == ["gen-q0", "gen-q1", "gen-q2"]
+        assert _query(daemon, "--agent", "tester") == ["gen-q0", "gen-q1", "gen-q2"]
+
+        # 像 git pull 一样直接放入记录文件、删掉另一条，索引文件已存在
+        pulled = {"mutation_id": "gen-q9", "parent_id": "gen-q0", "agent_id": "tester",
+                  "timestamp": "2026-03-09T10:00:00Z"}
+        (tracker.mutations_dir / "gen-q9.json").write_text(json.dumps(pulled), encoding="utf-8")
+        (tracker.mutations_dir / "gen-q1.json").unlink()
+        assert _query(EvolutionTracker(tmp), "--agent", "tester") == ["gen-q0", "gen-q2", "gen-q9"]
+        # 常驻服务中的 tracker 同样看到变化
+        assert _query(daemon, "--agent", "tester") == ["gen-q0", "gen-q2", "gen-q9"]
+        assert EvolutionTracker(tmp).query_index.refresh() == 0
+
+
+def main():
+    tests = [test_query_matches_scan, test_records_added_outside_tracker]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+🔗 ThreeJSEvolution registry 同步
+每条 mutation 带一个链式内容哈希，按技能组织成 Merkle 树，与其他 agent 的 registry 增量同步
+
+content_hash = sha256(标识字段 + 内容文件摘要 + parent 的 content_hash)
+    标识字段     mutation_id/parent_id/agent_id/target_skill/change_type/timestamp/description
+    内容文件     patches/<id>.patch 与 diff_url 指向的文件 (旧记录指向完整页面)
+metrics、approved 等会被后续步骤改写的字段不参与哈希。改动任何一代的内容，
+它和全部子代的哈希都会随之变化，verify 即可定位断开的位置。
+
+Merkle 树两层：技能根 = H(各桶哈希)，桶 (ID 哈希的前两位十六进制) = H(桶内 ID 与哈希)。
+同步时先比根，再比不同的桶，最后只传输对方缺少的记录与内容文件。
+
+索引缓存在 logs/merkle_state.json：只有记录或内容文件的 (mtime, size) 变化、
+或 parent 哈希变化的节点才重新计算，未变化的记录不会被读取。
+
+Usage:
+    python3 scripts/evolution_tracker.py sync ../other-registry [--push] [--dry-run]
+    python3 scripts/evolution_tracker.py sync http://127.0.0.1:8766 [--push]
+    python3 scripts/evolution_tracker.py sync --serve [--port 8766]
+    python3 scripts/evolution_tracker.py sync --verify [--stamp]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import posixpath
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from evolution_tracker import EvolutionTracker, default_registry
+from instrument import configure, traced
+
+STATE_FILE = "merkle_state.json"
+STATE_VERSION = 1
+HASHED_FIELDS = ("mutation_id", "parent_id", "agent_id", "target_skill", "change_type",
+                 "timestamp", "description")
+# 一个桶对应 ID 哈希的前几位十六进制 (2 位 = 256 个桶)
+BUCKET_CHARS = 2
+# 可以经同步写入的内容文件目录
+CONTENT_DIRS = ("patches/", "skills/")
+DEFAULT_PORT = 8766
+# 每次请求传输的记录数
+BATCH_SIZE = 50
+MISSING_PARENT = "缺少 parent"
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_files(registry: Path, mutation: Dict) -> List[str]:
+    """记录的内容文件 (相对 registry，存在的才算)"""
+    rels = [f"patches/{mutation['mutation_id']}.patch", mutation.get("diff_url") or ""]
+    found = []
+    for rel in rels:
+        if rel and rel not in found and safe_path(rel) and (registry / rel).is_file():
+            found.append(rel)
+    return sorted(found)
+
+
+def content_digest(digests: Dict[str, str]) -> Optional[str]:
+    """{相对路径: sha256} → 内容摘要，没有内容文件时为 None"""
+    if not digests:
+        return None
+    return _sha256("".join(f"{rel}\0{digests[rel]}\n" for rel in sorted(digests)).encode("utf-8"))
+
+
+def chain_hash(fields: Dict, parent_hash: Optional[str], digest: Optional[str]) -> str:
+    payload = {key: fields.get(key) for key in HASHED_FIELDS}
+    payload["parent_hash"] = parent_hash
+    payload["content"] = digest
+    return _sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False,
+                              separators=(",", ":")).encode("utf-8"))
+
+
+def bucket_of(mutation_id: str) -> str:
+    return _sha256(mutation_id.encode("utf-8"))[:BUCKET_CHARS]
+
+
+def merkle_hash(entries: Dict[str, str]) -> str:
+    return _sha256("".join(f"{key} {value}\n" for key, value in sorted(entries.items())).encode("utf-8"))
+
+
+def safe_path(rel: str) -> bool:
+    """只允许 patches/ 与 skills/ 下的规范相对路径"""
+    return (posixpath.normpath(rel) == rel and not rel.startswith("/")
+            and ".." not in rel.split("/") and rel.startswith(CONTENT_DIRS))
+
+
+def _is_root(parent_id: Optional[str]) -> bool:
+    return parent_id in (None, "null")
+
+
+class MerkleIndex:
+    """各记录的链式哈希与每个技能的 Merkle 树 (增量维护)"""
+
+    def __init__(self, tracker: EvolutionTracker):
+        self.tracker = tracker
+        self.path = tracker.logs_file.parent / STATE_FILE
+        self.nodes: Dict[str, Dict] = {}
+        self.dirty = False
+        self.recomputed = 0
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                self.nodes = data["nodes"]
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": STATE_VERSION, "nodes": self.nodes}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        tmp.replace(self.path)
+        self.dirty = False
+
+    # 增量刷新
+
+    def _record_stamps(self) -> Dict[str, List]:
+        stamps: Dict[str, List] = {}
+        mutations_dir = self.tracker.mutations_dir
+        if mutations_dir.is_dir():
+            for entry in os.scandir(mutations_dir):
+                if entry.name.endswith(".json"):
+                    st = entry.stat()
+                    stamps[entry.name[:-5]] = [st.st_mtime_ns, st.st_size]
+        pack = self.tracker.pack
+        if pack.index_file.exists():
+            pack_stamp = ["pack", pack.index_file.stat().st_mtime_ns]
+            for mutation_id in pack.ids():
+                stamps.setdefault(mutation_id, pack_stamp)
+        return stamps
+
+    def _stamp(self, mutation_id: str, record_stamp: List, files: Iterable[str]) -> List:
+        stats = []
+        for rel in sorted(set(files) | {f"patches/{mutation_id}.patch"}):
+            try:
+                st = (self.tracker.registry / rel).stat()
+                stats.append([rel, st.st_mtime_ns, st.st_size])
+            except OSError:
+                stats.append([rel, None, None])
+        return [record_stamp, stats]
+
+    @traced("sync.refresh")
+    def refresh(self) -> "MerkleIndex":
+        """按文件时间戳找出变化的记录，沿谱系重新计算受影响的哈希"""
+        stamps = self._record_stamps()
+        for mutation_id in set(self.nodes) - set(stamps):
+            del self.nodes[mutation_id]
+            self.dirty = True
+
+        changed = set()
+        for mutation_id, record_stamp in stamps.items():
+            node = self.nodes.get(mutation_id)
+            if node is not None and node["stamp"] == self._stamp(mutation_id, record_stamp, node["files"]):
+                continue
+            mutation = self.tracker.load_mutation(mutation_id)
+            registry = self.tracker.registry
+            files = content_files(registry, mutation)
+            self.nodes[mutation_id] = {
+                "fields": {key: mutation.get(key) for key in HASHED_FIELDS},
+                "recorded": mutation.get("content_hash"),
+                "files": files,
+                "digest": content_digest({rel: file_digest(registry / rel) for rel in files}),
+                "stamp": self._stamp(mutation_id, record_stamp, files),
+            }
+            changed.add(mutation_id)
+
+        # 按代数从根往下，parent 哈希变化的子代也要重算
+        tree = {mid: {"parent_id": node["fields"].get("parent_id")} for mid, node in self.nodes.items()}
+        depths = self.tracker.generation_depths(tree)
+        self.recomputed = 0
+        for mutation_id in sorted(self.nodes, key=lambda mid: (depths[mid], mid)):
+            node = self.nodes[mutation_id]
+            parent = self.nodes.get(node["fields"].get("parent_id"))
+            parent_hash = parent.get("hash") if parent is not None else None
+            if mutation_id in changed or "hash" not in node or node.get("parent_hash") != parent_hash:
+                node["parent_hash"] = parent_hash
+                node["hash"] = chain_hash(node["fields"], parent_hash, node["digest"])
+                self.recomputed += 1
+        if changed or self.recomputed:
+            self.dirty = True
+        return self
+
+    # 查询
+
+    def hash_of(self, mutation_id: str) -> Optional[str]:
+        node = self.nodes.get(mutation_id)
+        return node["hash"] if node is not None else None
+
+    def leaves(self, skill: str, bucket: Optional[str] = None) -> Dict[str, str]:
+        return {mid: node["hash"] for mid, node in self.nodes.items()
+                if node["fields"].get("target_skill") == skill
+                and (bucket is None or bucket_of(mid) == bucket)}
+
+    def buckets(self, skill: str) -> Dict[str, str]:
+        grouped: Dict[str, Dict[str, str]] = {}
+        for mutation_id, digest in self.leaves(skill).items():
+            grouped.setdefault(bucket_of(mutation_id), {})[mutation_id] = digest
+        return {bucket: merkle_hash(entries) for bucket, entries in grouped.items()}
+
+    def roots(self) -> Dict[str, str]:
+        skills = {str(node["fields"].get("target_skill")) for node in self.nodes.values()}
+        return {skill: merkle_hash(self.buckets(skill)) for skill in sorted(skills)}
+
+    def problems(self) -> List[Tuple[str, str]]:
+        """记录中的 content_hash 与重新计算的结果不一致 (内容或祖先被改动)"""
+        found = []
+        for mutation_id, node in sorted(self.nodes.items()):
+            if node["recorded"] and node["recorded"] != node["hash"]:
+                parent = self.nodes.get(node["fields"].get("parent_id"))
+                if parent is not None and parent["recorded"] and parent["recorded"] != parent["hash"]:
+                    found.append((mutation_id, "祖先的哈希已变化"))
+                else:
+                    found.append((mutation_id, "记录或内容文件被改动"))
+        return found
+
+    def unstamped(self) -> List[str]:
+        return sorted(mid for mid, node in self.nodes.items() if not node["recorded"])
+
+
+def stamp_new(tracker: EvolutionTracker, mutation: Dict) -> str:
+    """log 时为新记录计算 content_hash (内容文件已写入)"""
+    parent_id = mutation.get("parent_id")
+    parent_hash = None
+    if not _is_root(parent_id) and tracker.has_mutation(parent_id):
+        parent_hash = tracker.load_mutation(parent_id).get("content_hash")
+        if parent_hash is None:
+            # 旧记录没有 content_hash，按当前内容计算 (与 sync 的叶子一致)
+            index = MerkleIndex(tracker).refresh()
+            parent_hash = index.hash_of(parent_id)
+            index.save()
+    registry = tracker.registry
+    files = content_files(registry, mutation)
+    return chain_hash(mutation, parent_hash, content_digest({rel: file_digest(registry / rel) for rel in files}))
+
+
+class Replica:
+    """本地 registry 作为同步的一端"""
+
+    def __init__(self, tracker: EvolutionTracker):
+        self.tracker = tracker
+        self._index: Optional[MerkleIndex] = None
+
+    @property
+    def index(self) -> MerkleIndex:
+        if self._index is None:
+            self._index = MerkleIndex(self.tracker).refresh()
+            self._index.save()
+        return self._index
+
+    def roots(self) -> Dict[str, str]:
+        return self.index.roots()
+
+    def buckets(self, skill: str) -> Dict[str, str]:
+        return self.index.buckets(skill)
+
+    def leaves(self, skill: str, bucket: str) -> Dict[str, str]:
+        return self.index.leaves(skill, bucket)
+
+    def fetch(self, ids: List[str]) -> List[Dict]:
+        """记录与内容文件 (base64)"""
+        items = []
+        for mutation_id in ids:
+            mutation = self.tracker.load_mutation(mutation_id)
+            files = {rel: base64.b64encode((self.tracker.registry / rel).read_bytes()).decode("ascii")
+                     for rel in content_files(self.tracker.registry, mutation)}
+            items.append({"record": mutation, "files": files,
+                          "parent_hash": self.index.nodes[mutation_id]["parent_hash"]})
+        return items
+
+    @traced("sync.receive")
+    def receive(self, items: List[Dict]) -> Dict:
+        """校验哈希后写入对方缺少的记录，parent 先于子代；返回 {added, skipped, rejected}"""
+        result: Dict = {"added": [], "skipped": [], "rejected": {}}
+        accepted: Dict[str, str] = {}
+        pending = {item["record"]["mutation_id"]: item for item in items}
+        progress = True
+        while pending and progress:
+            progress = False
+            for mutation_id in sorted(pending):
+                item = pending[mutation_id]
+                parent_id = item["record"].get("parent_id")
+                if parent_id in pending:
+                    continue  # 等 parent 先处理
+                del pending[mutation_id]
+                progress = True
+                reason = self._accept(item, accepted)
+                if reason is None:
+                    result["added"].append(mutation_id)
+                elif reason == "已存在":
+                    result["skipped"].append(mutation_id)
+                else:
+                    result["rejected"][mutation_id] = reason
+        for mutation_id in pending:
+            result["rejected"][mutation_id] = "谱系成环"
+        if result["added"]:
+            self._index = None  # 下次访问时增量刷新
+        return result
+
+    def _accept(self, item: Dict, accepted: Dict[str, str]) -> Optional[str]:
+        record, files = item["record"], item.get("files", {})
+        mutation_id = record.get("mutation_id", "")
+        if not mutation_id or "/" in mutation_id or mutation_id.startswith("."):
+            return "无效的 mutation ID"
+        if self.tracker.has_mutation(mutation_id):
+            return "已存在"
+        # parent 哈希以本地为准；发送方也没有 parent 时 (parent_hash 为 None) 同样视为根
+        parent_id = record.get("parent_id")
+        parent_hash = None
+        if not _is_root(parent_id):
+            parent_hash = accepted.get(parent_id) or self.index.hash_of(parent_id)
+            if parent_hash is None and item.get("parent_hash") is not None:
+                return MISSING_PARENT
+            if parent_hash != item.get("parent_hash"):
+                return "parent 内容与对方不同"
+
+        blobs = {}
+        for rel, data in files.items():
+            if not safe_path(rel):
+                return f"不允许的路径: {rel}"
+            blobs[rel] = base64.b64decode(data)
+        digest = content_digest({rel: _sha256(data) for rel, data in blobs.items()})
+        computed = chain_hash(record, parent_hash, digest)
+        if record.get("content_hash") and record["content_hash"] != computed:
+            return "content_hash 校验失败"
+
+        registry = self.tracker.registry
+        for rel, data in blobs.items():
+            path = registry / rel
+            if path.exists() and path.read_bytes() != data:
+                return f"内容文件冲突: {rel}"
+        for rel, data in blobs.items():
+            path = registry / rel
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(data)
+        # 内容文件先落盘，记录存在即代表完整
+        self.tracker.save_mutation(record)
+        accepted[mutation_id] = computed
+        return None
+
+
+class HttpPeer:
+    """经 HTTP 访问另一台 registry (sync --serve 启动的服务)"""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _call(self, path: str, payload: Optional[Dict] = None):
+        from urllib.request import Request, urlopen
+        data = None if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        request = Request(f"{self.url}/merkle/{path}", data=data,
+                          headers={"Content-Type": "application/json"})
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def roots(self) -> Dict[str, str]:
+        return self._call("roots")
+
+    def buckets(self, skill: str) -> Dict[str, str]:
+        return self._call("buckets", {"skill": skill})
+
+    def leaves(self, skill: str, bucket: str) -> Dict[str, str]:
+        return self._call("leaves", {"skill": skill, "bucket": bucket})
+
+    def fetch(self, ids: List[str]) -> List[Dict]:
+        return self._call("fetch", {"ids": ids})
+
+    def receive(self, items: List[Dict]) -> Dict:
+        return self._call("receive", {"items": items})
+
+
+def open_peer(spec: str):
+    if spec.startswith(("http://", "https://")):
+        return HttpPeer(spec)
+    return Replica(EvolutionTracker(spec))
+
+
+@traced("sync.diff")
+def missing(source, target) -> Tuple[List[str], List[str]]:
+    """自上而下比较 Merkle 树：(target 缺少的 ID, 两边哈希不同的 ID)"""
+    absent, conflicts = [], []
+    target_roots = target.roots()
+    for skill, root in source.roots().items():
+        if target_roots.get(skill) == root:
+            continue
+        target_buckets = target.buckets(skill) if skill in target_roots else {}
+        for bucket, digest in source.buckets(skill).items():
+            if target_buckets.get(bucket) == digest:
+                continue
+            theirs = target.leaves(skill, bucket) if bucket in target_buckets else {}
+            for mutation_id, leaf in source.leaves(skill, bucket).items():
+                if mutation_id not in theirs:
+                    absent.append(mutation_id)
+                elif theirs[mutation_id] != leaf:
+                    conflicts.append(mutation_id)
+    return sorted(absent), sorted(conflicts)
+
+
+@traced("sync.transfer")
+def sync(source, target, dry_run: bool = False) -> Dict:
+    """把 source 有而 target 没有的记录传给 target"""
+    absent, conflicts = missing(source, target)
+    result = {"missing": absent, "conflicts": conflicts, "added": [], "skipped": [], "rejected": {}}
+    if dry_run:
+        return result
+    # parent 可能落在后面的批次里：缺 parent 的记录在其余记录传完后重试，直到没有进展
+    todo = absent
+    while todo:
+        retry = []
+        for start in range(0, len(todo), BATCH_SIZE):
+            received = target.receive(source.fetch(todo[start:start + BATCH_SIZE]))
+            result["added"] += received["added"]
+            result["skipped"] += received["skipped"]
+            for mutation_id, reason in received["rejected"].items():
+                if reason == MISSING_PARENT:
+                    retry.append(mutation_id)
+                else:
+                    result["rejected"][mutation_id] = reason
+        if len(retry) == len(todo):
+            result["rejected"].update({mutation_id: MISSING_PARENT for mutation_id in retry})
+            break
+        todo = retry
+    return result
+
+
+def make_server(replica: Replica, port: int = DEFAULT_PORT):
+    """本机 HTTP 服务 (port=0 时随机端口)，请求串行处理"""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, code: int, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/merkle/roots":
+                self._reply(200, replica.roots())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                args = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._reply(400, {"error": "invalid JSON"})
+                return
+            routes = {
+                "/merkle/roots": lambda: replica.roots(),
+                "/merkle/buckets": lambda: replica.buckets(args["skill"]),
+                "/merkle/leaves": lambda: replica.leaves(args["skill"], args["bucket"]),
+                "/merkle/fetch": lambda: replica.fetch(args["ids"]),
+                "/merkle/receive": lambda: replica.receive(args["items"]),
+            }
+            if self.path not in routes:
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                self._reply(200, routes[self.path]())
+            except (KeyError, ValueError) as e:
+                self._reply(400, {"error": str(e)})
+
+    return HTTPServer(("127.0.0.1", port), Handler)
+
+
+def main(argv: Optional[List[str]] = None, tracker: Optional[EvolutionTracker] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution registry 同步")
+    parser.add_argument("peer", nargs="?", help="对方 registry 目录或 http://host:port")
+    parser.add_argument("--registry", default=default_registry())
+    parser.add_argument("--push", action="store_true", help="把本地有而对方没有的记录推给对方")
+    parser.add_argument("--dry-run", action="store_true", help="只比较，不传输")
+    parser.add_argument("--serve", action="store_true", help="作为 HTTP 对端运行")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--verify", action="store_true", help="增量校验谱系哈希")
+    parser.add_argument("--stamp", action="store_true", help="给没有 content_hash 的记录补上")
+    args = parser.parse_args(configure(sys.argv[1:] if argv is None else argv))
+
+    local = Replica(tracker or EvolutionTracker(args.registry))
+
+    if args.serve:
+        server = make_server(local, args.port)
+        print(f"🔗 同步服务已启动: http://127.0.0.1:{server.server_address[1]}，Ctrl+C 退出")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    if args.verify or args.stamp or not args.peer:
+        index = local.index
+        if args.stamp:
+            for mutation_id in index.unstamped():
+                mutation = local.tracker.load_mutation(mutation_id)
+                mutation["content_hash"] = index.hash_of(mutation_id)
+                local.tracker.save_mutation(mutation)
+            index = MerkleIndex(local.tracker).refresh()
+            index.save()
+        for skill, root in index.roots().items():
+            print(f"🌳 {skill:<20} {root[:16]}  {len(index.leaves(skill))} 个 mutation")
+        print(f"🔍 重新计算 {index.recomputed} 个节点，其余沿用缓存")
+        problems = index.problems()
+        for mutation_id, reason in problems:
+            print(f"❌ {mutation_id}: {reason}")
+        unstamped = index.unstamped()
+        if unstamped:
+            print(f"⚠️ {len(unstamped)} 条记录没有 content_hash (sync --stamp 可补上)")
+        return 1 if problems else 0
+
+    try:
+        peer = open_peer(args.peer)
+        source, target = (local, peer) if args.push else (peer, local)
+        result = sync(source, target, dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"❌ 同步失败: {e}")
+        return 1
+    direction = "→" if args.push else "←"
+    print(f"🔗 {args.registry} {direction} {args.peer}: 缺少 {len(result['missing'])} 个 mutation")
+    if args.dry_run:
+        for mutation_id in result["missing"]:
+            print(f"   ➕ {mutation_id}")
+    for mutation_id in result["added"]:
+        print(f"   ✅ {mutation_id}")
+    for mutation_id, reason in result["rejected"].items():
+        print(f"   ❌ {mutation_id}: {reason}")
+    for mutation_id in result["conflicts"]:
+        print(f"   ⚠️ {mutation_id}: 两边内容不同，未同步")
+    return 1 if result["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
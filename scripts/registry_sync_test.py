@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+🔗 ThreeJSEvolution registry 同步自检
+链式哈希与增量校验、目录/HTTP 两种对端的 Merkle 增量同步、被篡改记录与越界路径的拒绝
+"""
+
+import base64
+import io
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from materialize import diff_files
+from registry_sync import MerkleIndex, Replica, make_server, missing, open_peer, stamp_new, sync
+
+PAGE = "<html><script>\nlet speed = 1;\n</script></html>\n"
+
+
+def _registry(tmp: str, name: str, generations: int = 3) -> EvolutionTracker:
+    """基础页面 + 若干代逐行修改的 patch (gen-v1-g1 … gen-v1-gN，哈希与 log 时相同)"""
+    tracker = EvolutionTracker(str(Path(tmp) / name))
+    tracker.save_mutation({"mutation_id": "gen-v1-base", "parent_id": "null", "agent_id": "tester",
+                           "target_skill": "threejs-game", "change_type": "feature_addition",
+                           "diff_url": "skills/t/v1_base/index.html", "performance_delta": "baseline"})
+    page = tracker.registry / "skills/t/v1_base/index.html"
+    page.parent.mkdir(parents=True)
+    page.write_text(PAGE, encoding="utf-8")
+
+    parent, before = "gen-v1-base", PAGE
+    tracker.patches_dir.mkdir(parents=True, exist_ok=True)
+    for n in range(1, generations + 1):
+        after = before.replace(f"speed = {n}", f"speed = {n + 1}")
+        mutation = {"mutation_id": f"gen-v1-g{n}", "parent_id": parent, "agent_id": "tester",
+                    "target_skill": "threejs-game", "change_type": "optimization",
+                    "timestamp": f"2026-03-0{n}T00:00:00", "description": f"第 {n} 代",
+                    "performance_delta": "+1%", "diff_url": f"patches/gen-v1-g{n}.patch"}
+        (tracker.patches_dir / f"gen-v1-g{n}.patch").write_text(
+            diff_files({"index.html": before}, {"index.html": after}), encoding="utf-8")
+        mutation["content_hash"] = stamp_new(tracker, mutation)
+        tracker.save_mutation(mutation)
+        parent, before = mutation["mutation_id"], after
+    return tracker
+
+
+def _lineage(tracker: EvolutionTracker):
+    """按代数排序的全部记录 (同一秒内写入的时间戳相同，不能按时间排)"""
+    mutations = {m["mutation_id"]: m for m in tracker.iter_mutations()}
+    depths = tracker.generation_depths(mutations)
+    return sorted(mutations.values(), key=lambda m: depths[m["mutation_id"]])
+
+
+def test_chain_hash_and_incremental_verify():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = _registry(tmp, "a")
+        index = MerkleIndex(tracker).refresh()
+        index.save()
+        children = [m for m in _lineage(tracker) if m["mutation_id"] != "gen-v1-base"]
+        # 写入的 content_hash 与独立计算的一致；基础记录尚未补哈希
+        assert all(m["content_hash"] == index.hash_of(m["mutation_id"]) for m in children)
+        assert index.problems() == [] and index.unstamped() == ["gen-v1-base"]
+
+        # 没有变化时不重新计算
+        assert MerkleIndex(tracker).refresh().recomputed == 0
+
+        # log 写入的 content_hash 接在 parent 当前的哈希之后
+        last = children[-1]["mutation_id"]
+        patch = diff_files({"index.html": "a\n"}, {"index.html": "b\n"})
+        child = tracker.log_mutation(last, "tester", "threejs-game", "optimization", "接着改",
+                                     io.StringIO(patch), "+1%")
+        index = MerkleIndex(tracker).refresh()
+        assert index.recomputed == 1 and index.nodes[child]["parent_hash"] == index.hash_of(last)
+        assert tracker.load_mutation(child)["content_hash"] == index.hash_of(child)
+
+        # 改动第一代的 patch：它和全部子代都变化，其余沿用缓存
+        first = children[0]["mutation_id"]
+        with open(tracker.patches_dir / f"{first}.patch", 'a', encoding='utf-8') as f:
+            f.write("# tampered\n")
+        index = MerkleIndex(tracker).refresh()
+        assert index.recomputed == len(children) + 1
+        problems = dict(index.problems())
+        assert problems[first] == "记录或内容文件被改动"
+        assert all(problems[m["mutation_id"]] == "祖先的哈希已变化" for m in children[1:])
+        assert problems[child] == "祖先的哈希已变化" and len(problems) == len(children) + 1
+
+
+def test_directory_sync_transfers_only_missing():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = _registry(tmp, "a", generations=4)
+        target = EvolutionTracker(str(Path(tmp) / "b"))
+        lineage = _lineage(source)
+        # 对方已有基础页面与第一代
+        for m in lineage[:2]:
+            Replica(target).receive(Replica(source).fetch([m["mutation_id"]]))
+
+        absent, conflicts = missing(Replica(source), Replica(target))
+        assert absent == sorted(m["mutation_id"] for m in lineage[2:]) and conflicts == []
+        result = sync(open_peer(str(source.registry)), Replica(target))
+        assert sorted(result["added"]) == absent and result["rejected"] == {}
+
+        # 内容文件与哈希都一致，再同步没有可传的
+        for m in lineage:
+            assert (target.registry / m["diff_url"]).read_bytes() == (source.registry / m["diff_url"]).read_bytes()
+        assert Replica(target).roots() == Replica(source).roots()
+        assert sync(Replica(source), Replica(target))["missing"] == []
+
+
+def test_http_peer_push_and_pull():
+    with tempfile.TemporaryDirectory() as tmp:
+        local = _registry(tmp, "a")
+        remote = EvolutionTracker(str(Path(tmp) / "b"))
+        server = make_server(Replica(remote), 0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            peer = open_peer(f"http://127.0.0.1:{server.server_address[1]}")
+            pushed = sync(Replica(local), peer)
+            assert len(pushed["added"]) == 4 and pushed["rejected"] == {}
+            assert peer.roots() == Replica(local).roots()
+            assert sync(peer, Replica(local))["missing"] == []
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert remote.has_mutation(_lineage(local)[-1]["mutation_id"])
+
+
+def test_receive_rejects_tampered_items():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = _registry(tmp, "a", generations=1)
+        target = Replica(EvolutionTracker(str(Path(tmp) / "b")))
+        base, child = Replica(source).fetch([m["mutation_id"] for m in _lineage(source)])
+
+        # 内容被改动：content_hash 校验失败，什么都不写
+        forged = dict(child, files=dict(child["files"]))
+        patch = next(rel for rel in forged["files"] if rel.startswith("patches/"))
+        forged["files"][patch] = base64.b64encode(b"rm -rf /\n").decode("ascii")
+        assert target.receive([base, forged])["rejected"] == {child["record"]["mutation_id"]: "content_hash 校验失败"}
+        assert not (target.tracker.registry / patch).exists()
+
+        # 越界路径
+        escape = dict(child, files={"../outside.txt": "eA=="})
+        reason = target.receive([escape])["rejected"][child["record"]["mutation_id"]]
+        assert reason.startswith("不允许的路径")
+        assert not (Path(tmp) / "outside.txt").exists()
+
+        assert target.receive([child]) == {"added": [child["record"]["mutation_id"]], "skipped": [], "rejected": {}}
+        assert target.receive([child])["skipped"] == [child["record"]["mutation_id"]]
+
+
+def main():
+    tests = [test_chain_hash_and_incremental_verify, test_directory_sync_transfers_only_missing,
+             test_http_peer_push_and_pull, test_receive_rejects_tampered_items]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
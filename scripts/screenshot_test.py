@@ -6,17 +6,24 @@
 
 import subprocess
 import json
+import os
+import sys
 from datetime import datetime
 
-def run_curl_test():
+from instrument import configure, traced
+
+BASE_URL = "https://perlinson.github.io/ThreeJSEvolution"
+
+@traced("screenshot.curl_test")
+def run_curl_test(base_url=BASE_URL):
     """使用 curl 测试页面"""
     print("🧪 页面功能测试")
     print("=" * 70)
     
     pages = [
-        ("主页", "https://perlinson.github.io/ThreeJSEvolution/"),
-        ("物理引擎 v1.1", "https://perlinson.github.io/ThreeJSEvolution/skills/threejs/v1_phys/index.html"),
-        ("动画系统 v1.2", "https://perlinson.github.io/ThreeJSEvolution/skills/threejs/v1_anim/index.html"),
+        ("主页", f"{base_url}/"),
+        ("物理引擎 v1.1", f"{base_url}/skills/threejs/v1_phys/index.html"),
+        ("动画系统 v1.2", f"{base_url}/skills/threejs/v1_anim/index.html"),
     ]
     
     results = {}
@@ -108,11 +115,22 @@ def run_curl_test():
     return passed_count == total_count
 
 if __name__ == "__main__":
+    sys.argv = configure(sys.argv)
     print("=" * 70)
     print("📸 ThreeJSEvolution 页面功能测试")
     print(f"🕐 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
     print()
     
-    success = run_curl_test()
+    # 离线模式: 本地预览服务器 + vendor 缓存，结果不依赖外网
+    if "--offline" in sys.argv or os.environ.get("EVOLUTION_OFFLINE") == "1":
+        from vendor_cache import start_preview
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        server, base_url = start_preview(root)
+        print(f"🔌 离线模式: {base_url}")
+        print()
+        success = run_curl_test(base_url)
+        server.shutdown()
+    else:
+        success = run_curl_test()
     exit(0 if success else 1)
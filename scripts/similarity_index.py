@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+🪞 ThreeJSEvolution 近似重复检测
+对 patch (或旧记录的完整页面) 做 MinHash 签名，用 LSH 分桶在亚线性时间内找出近似重复的 mutation
+
+签名：
+    shingle  增删行的词法 token (每行带 +/- 标记)，连续 SHINGLE_SIZE 个为一组；
+             旧记录 diff_url 指向完整页面时用页面全文，两类内容互不比较
+    MinHash  NUM_PERM 个 (a·x + b) mod 2^61-1 置换下的最小值，估计 Jaccard 相似度
+LSH：签名切成 BANDS 段，每段 ROWS 行的哈希作为桶键，至少一段相同的才是候选；
+候选再用完整签名估计相似度，达到阈值 (默认 0.8) 才算近似重复。
+Jaccard 0.8 的两条记录成为候选的概率 1-(1-0.8^4)^16 > 99.9%，0.3 时约 12%。
+
+索引 (logs/similarity_index.json)：entries {id: [类型, 签名]} 与 buckets {桶键: [id, ...]}；
+没有可比较内容的记录也占一个空条目 ["", ""]，不进任何桶，以免每次补索引都重新读取。
+log 时计算新记录的签名，相似的已有记录写入 near_duplicates；
+evaluate --pending 据此跳过与已评估或已排队记录重复的候选。
+经 sync、git pull 等途径到达的记录在 similar 查询前补入索引。
+
+Usage:
+    python3 scripts/evolution_tracker.py similar [mutation_id ...] [--threshold 0.8] [--rebuild] [--json]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import struct
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from evolution_tracker import EvolutionTracker, default_registry
+from instrument import configure, traced
+
+INDEX_FILE = "similarity_index.json"
+INDEX_VERSION = 1
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+# 写入记录的近似重复个数上限
+MAX_FLAGGED = 5
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_PACK = struct.Struct(f"<{NUM_PERM}I")
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+Signature = Tuple[int, ...]
+
+
+def patch_tokens(text: str) -> List[str]:
+    """patch 中增删行的 token，文件头与上下文行不参与"""
+    tokens = []
+    for line in text.splitlines():
+        if line.startswith(("+++", "---")) or line[:1] not in ("+", "-"):
+            continue
+        tokens.append(line[0])
+        tokens.extend(_TOKEN.findall(line[1:]))
+    return tokens
+
+
+def page_tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text)
+
+
+def shingles(tokens: List[str], size: int = SHINGLE_SIZE) -> set:
+    """token 序列 → 64 位 shingle 哈希集合"""
+    if not tokens:
+        return set()
+    grams = (" ".join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1)))
+    return {int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+            for g in grams}
+
+
+def minhash(hashes: Iterable[int]) -> Optional[Signature]:
+    """shingle 哈希 → MinHash 签名；没有内容时为 None"""
+    values = list(hashes)
+    if not values:
+        return None
+    return tuple(min((a * x + b) % _PRIME for x in values) & _MASK for a, b in _PERMUTATIONS)
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """签名中相同位置取值相等的比例 ≈ Jaccard 相似度"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def band_keys(kind: str, signature: Signature) -> List[str]:
+    packed = _PACK.pack(*signature)
+    keys = []
+    for band in range(BANDS):
+        rows = packed[band * ROWS * 4:(band + 1) * ROWS * 4]
+        keys.append(f"{kind}{band:02d}" + hashlib.blake2b(rows, digest_size=6).hexdigest())
+    return keys
+
+
+def encode(signature: Signature) -> str:
+    return base64.b64encode(_PACK.pack(*signature)).decode("ascii")
+
+
+def decode(text: str) -> Signature:
+    return _PACK.unpack(base64.b64decode(text))
+
+
+def mutation_content(tracker: EvolutionTracker, mutation: Dict) -> Tuple[Optional[str], List[str]]:
+    """(类型, token)：有 patch 时用 patch 的增删行，否则用 diff_url 指向的完整页面"""
+    patch = tracker.patches_dir / f"{mutation['mutation_id']}.patch"
+    if patch.exists():
+        return "p", patch_tokens(patch.read_text(encoding="utf-8", errors="replace"))
+    page = tracker.page_for(mutation)
+    if page is not None and page.exists():
+        return "h", page_tokens(page.read_text(encoding="utf-8", errors="replace"))
+    return None, []
+
+
+class SimilarityIndex:
+    """MinHash 签名与 LSH 桶"""
+
+    def __init__(self, tracker: EvolutionTracker):
+        self.tracker = tracker
+        self.path = tracker.logs_file.parent / INDEX_FILE
+        self.entries: Dict[str, List[str]] = {}
+        self.buckets: Dict[str, List[str]] = {}
+        self.loaded = False
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("params") == self.params():
+                self.entries = data["entries"]
+                self.buckets = data["buckets"]
+                self.loaded = True
+
+    @staticmethod
+    def params() -> Dict[str, int]:
+        return {"num_perm": NUM_PERM, "bands": BANDS, "shingle": SHINGLE_SIZE}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "params": self.params(), "count": len(self.entries),
+                       "entries": self.entries, "buckets": self.buckets},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        tmp.replace(self.path)
+        self.loaded = True
+
+    # 维护
+
+    def add(self, mutation_id: str, kind: str, signature: Signature):
+        self.remove(mutation_id)
+        self.entries[mutation_id] = [kind, encode(signature)]
+        for key in band_keys(kind, signature):
+            self.buckets.setdefault(key, []).append(mutation_id)
+
+    def remove(self, mutation_id: str) -> bool:
+        entry = self.entries.pop(mutation_id, None)
+        if entry is None:
+            return False
+        if not entry[0]:
+            return True
+        for key in band_keys(entry[0], decode(entry[1])):
+            ids = self.buckets.get(key, [])
+            if mutation_id in ids:
+                ids.remove(mutation_id)
+            if not ids:
+                self.buckets.pop(key, None)
+        return True
+
+    def index_mutation(self, mutation: Dict) -> Optional[Tuple[str, Signature]]:
+        """计算并加入一条记录的签名，没有可比较的内容时返回 None"""
+        kind, tokens = mutation_content(self.tracker, mutation)
+        signature = minhash(shingles(tokens))
+        if kind is None or signature is None:
+            self.remove(mutation["mutation_id"])
+            self.entries[mutation["mutation_id"]] = ["", ""]
+            return None
+        self.add(mutation["mutation_id"], kind, signature)
+        return kind, signature
+
+    @traced("similar.sync")
+    def sync(self) -> int:
+        """补入其他途径到达的记录、移除已删除的记录，返回变化的条数"""
+        # 磁盘上的 ID 索引同样可能落后 (git pull 带来的记录)，先从 mutations/ 与 pack 重建
+        ids = set(self.tracker.id_index.rebuild())
+        changed = 0
+        for mutation_id in [mid for mid in self.entries if mid not in ids]:
+            changed += self.remove(mutation_id)
+        for mutation_id in sorted(ids - set(self.entries)):
+            self.index_mutation(self.tracker.load_mutation(mutation_id))
+            changed += 1
+        return changed
+
+    @traced("similar.rebuild")
+    def rebuild(self) -> "SimilarityIndex":
+        self.entries, self.buckets = {}, {}
+        for mutation in self.tracker.iter_mutations():
+            self.index_mutation(mutation)
+        self.save()
+        return self
+
+    # 查询
+
+    def query(self, kind: str, signature: Signature, threshold: float = DEFAULT_THRESHOLD,
+              exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """与签名相似度不低于 threshold 的记录，按相似度从高到低"""
+        candidates = set()
+        for key in band_keys(kind, signature):
+            candidates.update(self.buckets.get(key, ()))
+        candidates.discard(exclude)
+        found = []
+        for mutation_id in candidates:
+            score = similarity(signature, decode(self.entries[mutation_id][1]))
+            if score >= threshold:
+                found.append((mutation_id, round(score, 3)))
+        return sorted(found, key=lambda item: (-item[1], item[0]))
+
+    def near(self, mutation_id: str, threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float]]:
+        entry = self.entries.get(mutation_id)
+        if entry is None or not entry[0]:
+            return []
+        return self.query(entry[0], decode(entry[1]), threshold, exclude=mutation_id)
+
+    def pairs(self, threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, str, float]]:
+        """全部近似重复对：只比较同桶的记录"""
+        seen = set()
+        found = []
+        for ids in self.buckets.values():
+            for i, a in enumerate(ids):
+                for b in ids[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in seen:
+                        continue
+                    seen.add(pair)
+                    score = similarity(decode(self.entries[a][1]), decode(self.entries[b][1]))
+                    if score >= threshold:
+                        found.append((pair[0], pair[1], round(score, 3)))
+        return sorted(found, key=lambda item: (-item[2], item[0], item[1]))
+
+
+def flag_new(tracker: EvolutionTracker, mutation: Dict) -> List[Dict]:
+    """log 时为新记录建立签名，返回相似的已有记录 (最多 MAX_FLAGGED 个)"""
+    index = tracker.similarity_index
+    if not index.loaded:
+        index.rebuild()
+    else:
+        index.sync()
+    indexed = index.index_mutation(mutation)
+    index.save()
+    if indexed is None:
+        return []
+    near = index.query(*indexed, exclude=mutation["mutation_id"])[:MAX_FLAGGED]
+    return [{"mutation_id": mutation_id, "similarity": score} for mutation_id, score in near]
+
+
+def main(argv: Optional[List[str]] = None, tracker: Optional[EvolutionTracker] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 近似重复检测")
+    parser.add_argument("mutation_ids", nargs="*", help="查询这些记录的近似重复 (默认列出全部重复对)")
+    parser.add_argument("--registry", default=default_registry())
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Jaccard 相似度阈值")
+    parser.add_argument("--rebuild", action="store_true", help="重新计算全部签名")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(configure(sys.argv[1:] if argv is None else argv))
+
+    tracker = tracker or EvolutionTracker(args.registry)
+    try:
+        ids = [tracker.resolve_id(text) for text in args.mutation_ids]
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    index = tracker.similarity_index
+    if args.rebuild:
+        index.rebuild()
+    elif index.sync():
+        index.save()
+
+    if ids:
+        result = {mutation_id: index.near(mutation_id, args.threshold) for mutation_id in ids}
+        if args.json:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+            return 0
+        for mutation_id, near in result.items():
+            print(f"🪞 {mutation_id}: {len(near)} 个近似重复")
+            for other, score in near:
+                print(f"   {score:.2f}  {other}")
+        return 0
+
+    pairs = index.pairs(args.threshold)
+    if args.json:
+        print(json.dumps([{"a": a, "b": b, "similarity": s} for a, b, s in pairs], indent=2))
+        return 0
+    print(f"🪞 {len(index.entries)} 条记录，{len(pairs)} 对相似度 ≥ {args.threshold:g}")
+    for a, b, score in pairs:
+        print(f"   {score:.2f}  {a} ↔ {b}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+🪞 ThreeJSEvolution 近似重复检测自检
+patch token 提取、MinHash 估计精度、LSH 查询与索引维护、log 时标记与 evaluate 去重、git pull 到达的记录
+"""
+
+import io
+import json
+import random
+import sys
+import tempfile
+
+from evaluate import skip_duplicates
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from materialize import diff_files
+from similarity_index import SimilarityIndex, minhash, patch_tokens, shingles, similarity
+
+PATCH = """diff --git a/index.html b/index.html
+--- a/index.html
++++ b/index.html
+@@ -1,3 +1,3 @@
+ <script>
+-let speed = 1;
++let speed = 2;
+ </script>
+"""
+
+
+def _page(seed: int, lines: int = 120) -> str:
+    rng = random.Random(seed)
+    words = ["mesh", "scene", "camera", "light", "update", "render", "velocity", "position"]
+    return "\n".join(f"const {rng.choice(words)}{n} = {rng.choice(words)}.{rng.choice(words)}({n});"
+                     for n in range(lines)) + "\n"
+
+
+def test_tokens_and_estimate():
+    assert patch_tokens(PATCH) == ["-", "let", "speed", "=", "1", ";", "+", "let", "speed", "=", "2", ";"]
+
+    base = _page(1).split("\n")
+    edited = list(base)
+    for n in range(0, len(edited), 20):
+        edited[n] = "// changed"
+    a = shingles(patch_tokens("\n".join("+" + line for line in base)))
+    b = shingles(patch_tokens("\n".join("+" + line for line in edited)))
+    jaccard = len(a & b) / len(a | b)
+    assert abs(similarity(minhash(a), minhash(b)) - jaccard) < 0.15
+    assert minhash([]) is None
+
+
+def test_index_query_and_maintenance():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        index = SimilarityIndex(tracker)
+        pages = {f"gen-v1-p{n}": _page(n) for n in range(20)}
+        for mutation_id, text in pages.items():
+            index.add(mutation_id, "p", minhash(shingles(patch_tokens("+" + text.replace("\n", "\n+")))))
+        near_copy = pages["gen-v1-p3"].replace("(7);", "(70);")
+        signature = minhash(shingles(patch_tokens("+" + near_copy.replace("\n", "\n+"))))
+
+        assert [mid for mid, _ in index.query("p", signature)] == ["gen-v1-p3"]
+        # 页面与 patch 的签名互不比较
+        assert index.query("h", signature) == []
+        assert index.pairs() == []
+
+        index.save()
+        reloaded = SimilarityIndex(tracker)
+        assert reloaded.loaded and reloaded.entries == index.entries
+        reloaded.remove("gen-v1-p3")
+        assert reloaded.query("p", signature) == []
+        assert not any("gen-v1-p3" in ids for ids in reloaded.buckets.values())
+
+        # sync：移除已不存在的记录 (余下 19 个只在索引中)、补入其他途径到达的记录；
+        # 没有内容的记录只记一次空条目
+        tracker.save_mutation({"mutation_id": "gen-v1-plan", "parent_id": "null", "diff_url": "notes.md"})
+        assert reloaded.sync() == 19 + 1
+        assert reloaded.entries["gen-v1-plan"] == ["", ""]
+        assert "gen-v1-p0" not in reloaded.entries
+        assert reloaded.sync() == 0
+
+
+def test_log_flags_and_evaluate_skips():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        page = _page(7)
+        tracker.save_mutation({"mutation_id": "gen-v1-base", "parent_id": "null", "target_skill": "t",
+                               "diff_url": "skills/t/v1_base/index.html", "performance_delta": "baseline"})
+        path = tracker.registry / "skills/t/v1_base/index.html"
+        path.parent.mkdir(parents=True)
+        path.write_text(page, encoding="utf-8")
+
+        first = page
+        for n in range(0, 120, 6):
+            first = first.replace(f"({n});", f"({n}); step({n});")
+        tracker.save_mutation({"mutation_id": "gen-v1-first", "parent_id": "gen-v1-base", "target_skill": "t",
+                               "diff_url": "patches/gen-v1-first.patch", "performance_delta": "+1%",
+                               "evaluation": {"status": "passed"}})
+        tracker.patches_dir.mkdir(parents=True)
+        (tracker.patches_dir / "gen-v1-first.patch").write_text(
+            diff_files({"index.html": page}, {"index.html": first}), encoding="utf-8")
+
+        # 另一个 agent 做了几乎相同的改动 (多改了一行)
+        again = first.replace("(50);", "(50); step(50);")
+        child = tracker.log_mutation("gen-v1-base", "tester", "t", "optimization", "同样的改动",
+                                     io.StringIO(diff_files({"index.html": page}, {"index.html": again})), "+1%")
+        mutation = tracker.load_mutation(child)
+        assert [d["mutation_id"] for d in mutation["near_duplicates"]] == ["gen-v1-first"]
+        assert mutation["near_duplicates"][0]["similarity"] >= 0.8
+        assert SimilarityIndex(tracker).near("gen-v1-first")[0][0] == child
+
+        # 相似记录已评估：跳过；尚未评估也不在队列中：照常评估
+        assert skip_duplicates(tracker, {child: mutation}, {child}) == {child: "gen-v1-first"}
+        first_record = tracker.load_mutation("gen-v1-first")
+        del first_record["evaluation"]
+        tracker.save_mutation(first_record)
+        assert skip_duplicates(tracker, {child: mutation}, {child}) == {}
+        assert skip_duplicates(tracker, {child: mutation}, {child, "gen-v1-first"}) == {child: "gen-v1-first"}
+
+
+def test_pulled_records_are_synced():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        page = _page(11)
+        tracker.save_mutation({"mutation_id": "gen-v1-base", "parent_id": "null", "target_skill": "t",
+                               "diff_url": "skills/t/v1_base/index.html", "performance_delta": "baseline"})
+        path = tracker.registry / "skills/t/v1_base/index.html"
+        path.parent.mkdir(parents=True)
+        path.write_text(page, encoding="utf-8")
+        edited = page
+        for n in range(0, 120, 6):
+            edited = edited.replace(f"({n});", f"({n}); step({n});")
+        patch = diff_files({"index.html": page}, {"index.html": edited})
+
+        # 索引与 ID 索引都已建立之后，git pull 直接带来记录文件与 patch
+        tracker.log_mutation("gen-v1-base", "tester", "t", "optimization", "无关的改动",
+                             io.StringIO(diff_files({"index.html": page}, {"index.html": _page(12)})), "+1%")
+        assert SimilarityIndex(tracker).loaded and len(tracker.id_index.ids) == 2
+        (tracker.patches_dir / "gen-v1-pulled.patch").write_text(patch, encoding="utf-8")
+        (tracker.mutations_dir / "gen-v1-pulled.json").write_text(json.dumps(
+            {"mutation_id": "gen-v1-pulled", "parent_id": "gen-v1-base", "target_skill": "t",
+             "diff_url": "patches/gen-v1-pulled.patch", "performance_delta": "+1%"}), encoding="utf-8")
+
+        # log 前先 sync：新记录与拉来的记录相似
+        child = tracker.log_mutation("gen-v1-base", "tester", "t", "optimization", "同样的改动",
+                                     io.StringIO(patch), "+1%")
+        assert [d["mutation_id"] for d in tracker.load_mutation(child)["near_duplicates"]] == ["gen-v1-pulled"]
+
+        # 查询前的 sync 不依赖过期的 ID 索引
+        (tracker.patches_dir / "gen-v1-pulled2.patch").write_text(patch, encoding="utf-8")
+        (tracker.mutations_dir / "gen-v1-pulled2.json").write_text(json.dumps(
+            {"mutation_id": "gen-v1-pulled2", "parent_id": "gen-v1-base", "target_skill": "t",
+             "diff_url": "patches/gen-v1-pulled2.patch", "performance_delta": "+1%"}), encoding="utf-8")
+        index = EvolutionTracker(tmp).similarity_index
+        assert index.sync() == 1
+        assert [mid for mid, _ in index.near("gen-v1-pulled2")] == sorted(["gen-v1-pulled", child])
+
+
+def main():
+    tests = [test_tokens_and_estimate, test_index_query_and_maintenance, test_log_flags_and_evaluate_skips,
+             test_pulled_records_are_synced]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
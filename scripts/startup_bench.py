@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+🚀 ThreeJSEvolution 启动开销基准
+agent 每轮会调用 CLI 成千上万次，启动成本直接决定反馈速度
+
+对常用的只读命令运行 python -X importtime：
+1. 统计 tracker 自身带来的导入耗时 (扣除解释器启动必需的模块)，超出预算即失败
+2. 只读路径不允许加载写入/网络才用得到的重模块 (subprocess、socket、hashlib ...)
+3. 在全新的 registry 上首次运行 (不预热) 只允许建立 LAZY_INDEXES 中的索引缓存，之后的运行不写入任何文件
+
+Usage:
+    python3 scripts/startup_bench.py [--runs 5] [--budget-ms 45]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+SCRIPT = Path(__file__).resolve().parent / "evolution_tracker.py"
+
+# 只读命令 (tree gen-tip 走 ID 前缀解析)
+COMMANDS = [
+    ["tree", "gen-b2"],
+    ["tree", "gen-tip"],
+    ["compare", "gen-b0", "gen-b2"],
+    ["query", "--agent", "bench", "--limit", "1"],
+]
+
+# 只读命令第一次运行时允许建立的索引缓存：query 的属性索引、前缀解析的 ID 索引
+LAZY_INDEXES = {"logs", "logs/query_index.json", "logs/id_index.txt"}
+
+# 只读路径上不该出现的模块
+FORBIDDEN = {"subprocess", "socket", "socketserver", "threading", "hashlib", "datetime",
+             "difflib", "tempfile", "copy"}
+
+# tracker 自身导入耗时的预算 (毫秒，取多次运行的中位数)
+DEFAULT_BUDGET_MS = 45.0
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict]:
+    """importtime 输出 → {模块: {self_us, cumulative_us, depth}}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        modules[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                                 "depth": depth}
+    return modules
+
+
+def _run(args: List[str], registry: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, EVOLUTION_REGISTRY=registry, EVOLUTION_DAEMON="0")
+    env.pop("EVOLUTION_PROFILE", None)
+    env.pop("EVOLUTION_CPROFILE", None)
+    return subprocess.run([sys.executable, "-X", "importtime"] + args, env=env,
+                          capture_output=True, text=True)
+
+
+def interpreter_modules() -> Set[str]:
+    """解释器启动本身就会导入的模块"""
+    return set(parse_importtime(_run(["-c", "pass"], ".").stderr))
+
+
+def import_cost_ms(modules: Dict[str, Dict], baseline: Set[str]) -> float:
+    """顶层导入中不属于解释器启动的部分"""
+    return sum(m["cumulative_us"] for name, m in modules.items()
+               if m["depth"] == 0 and name not in baseline) / 1000
+
+
+def make_registry(path: str, count: int = 3):
+    """基准用的小型 registry：gen-b0 … gen-b{count-1} 一条链，末端再接一条 gen-tip-bench"""
+    mutations = Path(path) / "mutations"
+    mutations.mkdir(parents=True)
+    ids = [f"gen-b{n}" for n in range(count)] + ["gen-tip-bench"]
+    for n, mutation_id in enumerate(ids):
+        record = {"mutation_id": mutation_id, "parent_id": ids[n - 1] if n else "null",
+                  "agent_id": "bench", "target_skill": "threejs-game", "change_type": "optimization",
+                  "timestamp": f"2026-01-0{n + 1}T00:00:00Z", "performance_delta": f"+{n}%",
+                  "changelog": [], "approved": True}
+        (mutations / f"{mutation_id}.json").write_text(json.dumps(record), encoding="utf-8")
+
+
+def _snapshot(path: str) -> Set[str]:
+    """registry 下的全部文件与目录"""
+    found = set()
+    for d, dirs, files in os.walk(path):
+        found.update(os.path.relpath(os.path.join(d, name), path) for name in dirs + files)
+    return found
+
+
+def benchmark(runs: int = 5, budget_ms: float = DEFAULT_BUDGET_MS) -> Dict:
+    # 先编译字节码，避免把 .py → .pyc 的编译时间算进去
+    import compileall
+    compileall.compile_dir(str(SCRIPT.parent), quiet=1)
+    baseline = interpreter_modules()
+
+    results = []
+    for command in COMMANDS:
+        args = [str(SCRIPT)] + command
+        # 每条命令一个全新的 registry：首次运行的写入不会被其他命令的预热掩盖
+        with tempfile.TemporaryDirectory() as registry:
+            make_registry(registry)
+            before = _snapshot(registry)
+            _run(args, registry)
+            created = _snapshot(registry) - before
+            before |= created
+            costs, walls, modules = [], [], {}
+            for _ in range(runs):
+                start = time.perf_counter()
+                proc = _run(args, registry)
+                walls.append((time.perf_counter() - start) * 1000)
+                if proc.returncode != 0:
+                    raise RuntimeError(f"{' '.join(command)} 失败: {proc.stdout}{proc.stderr[-500:]}")
+                modules = parse_importtime(proc.stderr)
+                costs.append(import_cost_ms(modules, baseline))
+            cost = statistics.median(costs)
+            results.append({
+                "command": " ".join(command),
+                "import_ms": round(cost, 1),
+                "wall_ms": round(statistics.median(walls), 1),
+                "modules": len(modules),
+                "forbidden": sorted(FORBIDDEN & set(modules)),
+                "lazy": sorted(created & LAZY_INDEXES),
+                "written": sorted((created - LAZY_INDEXES) | (_snapshot(registry) - before)),
+                "ok": cost <= budget_ms,
+            })
+    for r in results:
+        r["ok"] = r["ok"] and not r["forbidden"] and not r["written"]
+    return {"budget_ms": budget_ms, "runs": runs, "results": results,
+            "ok": all(r["ok"] for r in results)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 启动开销基准")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get("EVOLUTION_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args(argv)
+
+    report = benchmark(max(1, args.runs), args.budget_ms)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0 if report["ok"] else 1
+    print(f"🚀 启动开销 (中位数，{report['runs']} 次，预算 {report['budget_ms']:.0f} ms)")
+    for r in report["results"]:
+        mark = "✅" if r["ok"] else "❌"
+        print(f"{mark} {r['command']:<36} 导入 {r['import_ms']:6.1f} ms  总计 {r['wall_ms']:6.1f} ms  "
+              f"{r['modules']} 个模块")
+        if r["forbidden"]:
+            print(f"   ❗ 加载了不该加载的模块: {', '.join(r['forbidden'])}")
+        if r["lazy"]:
+            print(f"   📇 首次运行建立索引缓存: {', '.join(r['lazy'])}")
+        if r["written"]:
+            print(f"   ❗ 只读命令写入了文件: {', '.join(r['written'])}")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+🚀 ThreeJSEvolution 启动开销自检
+只读命令的导入耗时在预算内，不加载重模块，除索引缓存外不写 registry
+"""
+
+import sys
+
+from instrument import run_tests
+from startup_bench import benchmark, import_cost_ms, parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        900 | json
+import time:       500 |        600 |   json.decoder
+import time:       200 |        200 | site
+"""
+
+
+def test_parse_importtime():
+    modules = parse_importtime(SAMPLE)
+    assert modules["json"] == {"self_us": 300, "cumulative_us": 900, "depth": 0}
+    assert modules["json.decoder"]["depth"] == 1
+    assert import_cost_ms(modules, baseline={"site"}) == 0.9
+
+
+def test_read_path_budget():
+    report = benchmark(runs=3)
+    for r in report["results"]:
+        assert not r["forbidden"], f"{r['command']} 加载了 {r['forbidden']}"
+        assert not r["written"], f"{r['command']} 写入了 {r['written']}"
+        assert r["import_ms"] <= report["budget_ms"], f"{r['command']} 导入 {r['import_ms']} ms"
+    # 首次运行 (不预热) 的写入同样被检查：只有 query 与前缀解析建立索引缓存
+    lazy = {r["command"]: r["lazy"] for r in report["results"]}
+    assert lazy["query --agent bench --limit 1"] == ["logs", "logs/query_index.json"]
+    assert lazy["tree gen-tip"] == ["logs", "logs/id_index.txt"]
+    assert lazy["tree gen-b2"] == lazy["compare gen-b0 gen-b2"] == []
+
+
+def main():
+    tests = [test_parse_importtime, test_read_path_budget]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
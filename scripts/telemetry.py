@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+📡 ThreeJSEvolution 帧遥测
+在真实浏览器中采集技能页面的帧时间，聚合为直方图并写回 mutation metrics
+
+组成部分：
+1. 探针脚本 - serve/测试时注入页面，上报帧时间、长任务、物体数量
+2. 采集服务器 - 提供页面并接收上报，按页面聚合为 HDR 风格直方图
+3. 导出 - 将 p50/p95/p99 写入对应 mutation 的 metrics
+
+Usage:
+    python3 scripts/telemetry.py serve [--root .] [--port 8765]
+    python3 scripts/telemetry.py report [page]
+    python3 scripts/telemetry.py export <mutation_id> [--page path]
+"""
+
+import argparse
+import json
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from evolution_tracker import EvolutionTracker, default_registry
+
+DEFAULT_PORT = 8765
+TELEMETRY_ENDPOINT = "/__telemetry"
+
+# 探针: 包装 requestAnimationFrame 统计帧间隔，PerformanceObserver 统计长任务
+PROBE_JS = """
+<script data-evo-probe>
+(function () {
+    var endpoint = %(endpoint)s, interval = %(interval)d;
+    var frames = [], longTasks = [], last = 0;
+    var raf = window.requestAnimationFrame.bind(window);
+    window.requestAnimationFrame = function (cb) {
+        return raf(function (t) {
+            if (last && t > last && frames.length < 10000) { frames.push(t - last); }
+            last = t;
+            cb(t);
+        });
+    };
+    if (window.PerformanceObserver) {
+        try {
+            new PerformanceObserver(function (list) {
+                list.getEntries().forEach(function (e) { longTasks.push(e.duration); });
+            }).observe({ entryTypes: ['longtask'] });
+        } catch (e) {}
+    }
+    function countObjects() {
+        try { if (typeof objects !== 'undefined' && objects.length !== undefined) { return objects.length; } } catch (e) {}
+        try {
+            var n = 0;
+            if (typeof scene !== 'undefined' && scene && scene.traverse) { scene.traverse(function () { n++; }); }
+            return n;
+        } catch (e) { return 0; }
+    }
+    function flush() {
+        if (!frames.length && !longTasks.length) { return; }
+        var body = JSON.stringify({
+            page: location.pathname, frames: frames, long_tasks: longTasks,
+            objects: countObjects(), user_agent: navigator.userAgent
+        });
+        frames = []; longTasks = [];
+        if (navigator.sendBeacon) { navigator.sendBeacon(endpoint, body); }
+        else { fetch(endpoint, { method: 'POST', body: body, keepalive: true }); }
+    }
+    setInterval(flush, interval);
+    window.addEventListener('pagehide', flush);
+})();
+</script>
+"""
+
+
+def inject_probe(html: str, endpoint: str = TELEMETRY_ENDPOINT, interval_ms: int = 2000) -> str:
+    """在 </body> 前注入探针脚本"""
+    probe = PROBE_JS % {"endpoint": json.dumps(endpoint), "interval": interval_ms}
+    idx = html.lower().rfind("</body>")
+    if idx == -1:
+        return html + probe
+    return html[:idx] + probe + html[idx:]
+
+
+class HdrHistogram:
+    """HDR 风格对数-线性直方图 (微秒精度，有界内存)
+
+    小于 2^sub_bits 的值精确记录，更大的值按 2 的幂分段，每段 2^(sub_bits-1) 个子桶，
+    相对误差约 2^-(sub_bits-1)。超过 highest 的值截断到 highest。
+    """
+
+    def __init__(self, sub_bits: int = 7, highest: int = 60_000_000):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.half = self.sub_count >> 1
+        self.highest = highest
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.max_value = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half + ((value >> shift) - self.half)
+
+    def _value_at(self, index: int) -> int:
+        """桶的中点值"""
+        if index < self.sub_count:
+            return index
+        offset = index - self.sub_count
+        shift = offset // self.half + 1
+        low = (offset % self.half + self.half) << shift
+        return low + ((1 << shift) >> 1)
+
+    def record(self, value: float, count: int = 1):
+        value = min(max(int(value), 0), self.highest)
+        idx = self._index(value)
+        self.counts[idx] = self.counts.get(idx, 0) + count
+        self.total += count
+        self.max_value = max(self.max_value, value)
+
+    def record_ms(self, values: Iterable[float]):
+        """记录毫秒值 (内部以微秒存储)"""
+        for v in values:
+            self.record(float(v) * 1000)
+
+    def percentile(self, p: float) -> int:
+        if not self.total:
+            return 0
+        target = max(1, int(round(self.total * p / 100.0)))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= target:
+                return min(self._value_at(idx), self.max_value)
+        return self.max_value
+
+    def percentile_ms(self, p: float) -> float:
+        return round(self.percentile(p) / 1000.0, 2)
+
+    def merge(self, other: "HdrHistogram"):
+        for idx, c in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + c
+        self.total += other.total
+        self.max_value = max(self.max_value, other.max_value)
+
+    def to_dict(self) -> Dict:
+        return {
+            "sub_bits": self.sub_bits,
+            "highest": self.highest,
+            "max": self.max_value,
+            "counts": {str(k): v for k, v in sorted(self.counts.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HdrHistogram":
+        hist = cls(data.get("sub_bits", 7), data.get("highest", 60_000_000))
+        hist.counts = {int(k): v for k, v in data.get("counts", {}).items()}
+        hist.total = sum(hist.counts.values())
+        hist.max_value = data.get("max", 0)
+        return hist
+
+
+def page_key(path: str) -> str:
+    """统一页面标识: 去掉前导 / 与 query，目录补 index.html"""
+    path = path.split("?", 1)[0].split("#", 1)[0].lstrip("/")
+    if not path or path.endswith("/"):
+        path += "index.html"
+    return path
+
+
+class PageStats:
+    """单个页面的聚合统计"""
+
+    def __init__(self):
+        self.frames = HdrHistogram()
+        self.long_tasks = HdrHistogram()
+        self.reports = 0
+        self.max_objects = 0
+        self.last_objects = 0
+
+    def add_report(self, report: Dict):
+        self.frames.record_ms(report.get("frames", []))
+        self.long_tasks.record_ms(report.get("long_tasks", []))
+        objects = int(report.get("objects") or 0)
+        self.last_objects = objects
+        self.max_objects = max(self.max_objects, objects)
+        self.reports += 1
+
+    def summary(self) -> Dict:
+        p50 = self.frames.percentile_ms(50)
+        return {
+            "frame_ms": {
+                "p50": p50,
+                "p95": self.frames.percentile_ms(95),
+                "p99": self.frames.percentile_ms(99),
+                "max": round(self.frames.max_value / 1000.0, 2)
+            },
+            "frames": self.frames.total,
+            "long_tasks": self.long_tasks.total,
+            "long_task_p95_ms": self.long_tasks.percentile_ms(95),
+            "max_objects": self.max_objects,
+            "reports": self.reports,
+            "fps_p50": round(1000.0 / p50, 1) if p50 else 0
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "frames": self.frames.to_dict(),
+            "long_tasks": self.long_tasks.to_dict(),
+            "reports": self.reports,
+            "max_objects": self.max_objects,
+            "last_objects": self.last_objects
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PageStats":
+        stats = cls()
+        stats.frames = HdrHistogram.from_dict(data.get("frames", {}))
+        stats.long_tasks = HdrHistogram.from_dict(data.get("long_tasks", {}))
+        stats.reports = data.get("reports", 0)
+        stats.max_objects = data.get("max_objects", 0)
+        stats.last_objects = data.get("last_objects", 0)
+        return stats
+
+
+class TelemetryStore:
+    """按页面聚合的遥测数据，持久化到 registry/telemetry/"""
+
+    def __init__(self, tracker: EvolutionTracker):
+        self.dir = tracker.registry / "telemetry"
+        self.state_file = self.dir / "pages.json"
+        self.pages: Dict[str, PageStats] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.pages = {k: PageStats.from_dict(v) for k, v in data.items()}
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {k: v.to_dict() for k, v in self.pages.items()}
+        tmp = self.state_file.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        tmp.replace(self.state_file)
+
+    def add_report(self, report: Dict) -> str:
+        key = page_key(report.get("page", ""))
+        with self._lock:
+            self.pages.setdefault(key, PageStats()).add_report(report)
+        return key
+
+    def reset(self, page: str):
+        with self._lock:
+            self.pages.pop(page_key(page), None)
+
+    def summary(self, page: str) -> Optional[Dict]:
+        stats = self.pages.get(page_key(page))
+        return stats.summary() if stats else None
+
+
+def export_to_mutation(tracker: EvolutionTracker, store: TelemetryStore,
+                       mutation_id: str, page: Optional[str] = None) -> Dict:
+    """将页面实测百分位写入 mutation metrics"""
+    mutation = tracker.load_mutation(mutation_id)
+    if page is None:
+        page_path = tracker.page_for(mutation)
+        if page_path is None:
+            raise ValueError(f"{mutation_id} 没有对应的 HTML 页面，请用 --page 指定")
+        page = str(page_path.relative_to(tracker.registry))
+
+    summary = store.summary(page)
+    if not summary or not summary["frames"]:
+        raise ValueError(f"页面 {page_key(page)} 还没有遥测数据")
+
+    metrics = {"telemetry": dict(summary, page=page_key(page))}
+    if summary["fps_p50"]:
+        metrics["render_fps"] = int(round(summary["fps_p50"]))
+    tracker.update_metrics(mutation_id, metrics)
+    return metrics
+
+
+class TelemetryHandler(SimpleHTTPRequestHandler):
+    """提供页面 (注入探针) 并接收遥测上报"""
+
+    store: TelemetryStore = None
+    inject = True
+    persist = True
+    probe_interval_ms = 2000
+    vendor = None  # VendorCache: CDN 地址改写为本地缓存
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.store is None or self.path.split("?", 1)[0] != TELEMETRY_ENDPOINT:
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            report = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_error(400, "invalid JSON")
+            return
+        self.store.add_report(report)
+        if self.persist:
+            self.store.save()
+        self.send_response(204)
+        self.end_headers()
+
+    def send_html(self, html: str):
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_html(self, path: Path) -> str:
+        html = path.read_text(encoding="utf-8")
+        if self.vendor is not None:
+            html = self.vendor.rewrite_html(html)
+        return html
+
+    def do_GET(self):
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            path = path / "index.html"
+        if path.suffix == ".html" and path.is_file() and (self.inject or self.vendor is not None):
+            html = self.read_html(path)
+            if self.inject:
+                html = inject_probe(html, interval_ms=self.probe_interval_ms)
+            self.send_html(html)
+            return
+        super().do_GET()
+
+
+def make_server(tracker: Optional[EvolutionTracker], root: str = ".", port: int = DEFAULT_PORT,
+                handler: type = TelemetryHandler, inject: bool = True,
+                persist: bool = True, probe_interval_ms: int = 2000,
+                vendor=None, store: Optional[TelemetryStore] = None) -> ThreadingHTTPServer:
+    """创建采集服务器 (port=0 时随机端口，persist=False 时只在内存中聚合)
+
+    tracker 与 store 都为 None 时只提供页面，不接收上报，也不会触碰 registry。
+    """
+    if store is None and tracker is not None:
+        store = TelemetryStore(tracker)
+    directory = str(Path(root).resolve())
+
+    class Handler(handler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+    Handler.store = store
+    Handler.inject = inject
+    Handler.persist = persist
+    Handler.probe_interval_ms = probe_interval_ms
+    Handler.vendor = vendor
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.store = store
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 帧遥测")
+    parser.add_argument("--registry", default=default_registry(),
+                        help="mutation 所在 registry (默认 EVOLUTION_REGISTRY 或仓库根目录)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="启动采集服务器")
+    p_serve.add_argument("--root", help="页面根目录 (默认同 registry)")
+    p_serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    p_report = sub.add_parser("report", help="查看聚合结果")
+    p_report.add_argument("page", nargs="?")
+
+    p_export = sub.add_parser("export", help="写入 mutation metrics")
+    p_export.add_argument("mutation_id")
+    p_export.add_argument("--page")
+
+    args = parser.parse_args()
+    tracker = EvolutionTracker(args.registry)
+
+    if args.command == "serve":
+        root = args.root or args.registry
+        server = make_server(tracker, root, args.port)
+        print(f"📡 遥测采集服务器: http://127.0.0.1:{server.server_address[1]}/")
+        print(f"📁 页面目录: {Path(root).resolve()}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.store.save()
+            server.server_close()
+
+    elif args.command == "report":
+        store = TelemetryStore(tracker)
+        pages = [page_key(args.page)] if args.page else sorted(store.pages)
+        result = {p: store.summary(p) for p in pages}
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    elif args.command == "export":
+        store = TelemetryStore(tracker)
+        try:
+            args.mutation_id = tracker.resolve_id(args.mutation_id)
+            metrics = export_to_mutation(tracker, store, args.mutation_id, args.page)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"📊 已写入 {args.mutation_id}:")
+        print(json.dumps(metrics, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
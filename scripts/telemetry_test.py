@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+📡 ThreeJSEvolution 遥测自检
+HdrHistogram 分桶、分位数精度与序列化，探针注入位置
+"""
+
+import random
+import sys
+
+from instrument import run_tests
+from telemetry import HdrHistogram, inject_probe
+
+
+def test_index_buckets():
+    hist = HdrHistogram(sub_bits=7)
+    # 小于 128 的值各占一个桶
+    assert [hist._index(v) for v in (0, 1, 127)] == [0, 1, 127]
+    # 之后每个 2 的幂区间 64 个子桶，索引单调且连续
+    assert hist._index(128) == 128 and hist._index(129) == 128 and hist._index(130) == 129
+    assert hist._index(256) == 192
+    last = -1
+    for v in range(0, 100_000, 7):
+        idx = hist._index(v)
+        assert idx >= last
+        assert abs(hist._value_at(idx) - v) <= max(1, v / 64)
+        last = idx
+
+
+def test_percentile_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(2.8, 0.4) for _ in range(20_000)]
+    hist = HdrHistogram()
+    hist.record_ms(values)
+    ordered = sorted(values)
+    for p in (50, 95, 99):
+        exact = ordered[int(len(ordered) * p / 100) - 1]
+        assert abs(hist.percentile_ms(p) - exact) / exact < 0.02, p
+    assert abs(hist.percentile(100) - hist.max_value) <= hist.max_value / 64
+    assert HdrHistogram().percentile(50) == 0
+
+
+def test_merge_and_round_trip():
+    a, b = HdrHistogram(), HdrHistogram()
+    a.record_ms([16.7] * 90)
+    b.record_ms([33.4] * 10)
+    a.merge(b)
+    assert a.total == 100
+    assert abs(a.percentile_ms(50) - 16.7) < 0.2 and abs(a.percentile_ms(95) - 33.4) < 0.3
+    restored = HdrHistogram.from_dict(a.to_dict())
+    assert restored.counts == a.counts and restored.total == 100
+    assert restored.percentile(95) == a.percentile(95)
+
+
+def test_inject_probe():
+    html = inject_probe("<html><body><p>x</p></BODY></html>", interval_ms=500)
+    assert html.index("navigator.sendBeacon") < html.index("</BODY>")
+    assert "500" in html
+    assert inject_probe("<p>x</p>").startswith("<p>x</p>")
+
+
+def main():
+    tests = [test_index_buckets, test_percentile_accuracy, test_merge_and_round_trip,
+             test_inject_probe]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+🛰️ ThreeJSEvolution 常驻 tracker 服务
+在一个进程里保持 registry 与各索引常驻内存，经 Unix socket 回答 log/tree/compare/query 请求
+
+协议：每行一个 JSON 请求，每行一个 JSON 响应
+    {"op": "ping"}                                   → {"ok": true, "pid": ..., "registry": ...}
+    {"op": "run", "argv": ["tree"], "stdin": ""}     → {"ok": true, "code": 0, "output": "..."}
+run 请求执行与命令行完全相同的代码路径，输出原样返回；所有请求串行执行，写入不会互相覆盖。
+
+服务运行时，evolution_tracker.py 的 log/tree/compare/query 会自动转发给它
+(EVOLUTION_DAEMON=0 可关闭转发)。socket 默认位于 <registry>/logs/tracker.sock，
+可用 EVOLUTION_SOCKET 或 serve --socket 指定。
+
+Usage:
+    python3 scripts/evolution_tracker.py serve [--socket PATH]
+"""
+
+import copy
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from evolution_tracker import EvolutionTracker, daemon_socket
+
+# 可以转发的命令 (gate 耗时长、checkout 等依赖调用方的工作目录，仍在本地执行)
+FORWARD_COMMANDS = {"log", "tree", "compare", "query"}
+
+
+def socket_path(registry: str) -> Path:
+    return Path(daemon_socket(registry))
+
+
+class CachedTracker(EvolutionTracker):
+    """常驻进程用的 tracker：全部记录读入内存，自身写入或目录变化时重新加载
+
+    直接改写已有记录文件 (不经过服务) 不会改变目录时间戳，需要重启服务。
+    """
+
+    def __init__(self, registry_path: str):
+        super().__init__(registry_path)
+        self._records: Optional[Dict[str, Dict]] = None
+        self._compact: Optional[Dict] = None
+        self._stamp = None
+
+    def _current_stamp(self):
+        stamp = []
+        for path in (self.mutations_dir, self.pack.index_file):
+            try:
+                stamp.append(path.stat().st_mtime_ns)
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _loaded(self) -> Dict[str, Dict]:
+        stamp = self._current_stamp()
+        if self._records is None or stamp != self._stamp:
+            self.pack.close()
+            self._records = {m['mutation_id']: m for m in super().iter_mutations()}
+            self._compact = None
+            # 其他进程 (如 watch) 可能也更新了磁盘上的索引
+            self._query_index = None
+            self._id_index = None
+            self._similarity_index = None
+            self._stamp = stamp
+        return self._records
+
+    def iter_mutations(self):
+        return iter(list(self._loaded().values()))
+
+    def get_records(self) -> Dict:
+        records = self._loaded()
+        if self._compact is None:
+            from mutation_record import compact_tree
+            self._compact = compact_tree(records.values(), self.load_mutation)
+        return self._compact
+
+    def load_mutation(self, mutation_id: str) -> Dict:
+        records = self._loaded()
+        if mutation_id not in records:
+            raise ValueError(f"未知 mutation ID: {mutation_id}")
+        return copy.deepcopy(records[mutation_id])
+
+    def has_mutation(self, mutation_id: str) -> bool:
+        return mutation_id in self._loaded()
+
+    def save_mutation(self, mutation: Dict):
+        super().save_mutation(mutation)
+        if self._records is not None:
+            self._records[mutation['mutation_id']] = copy.deepcopy(mutation)
+            self._compact = None
+            self._stamp = self._current_stamp()
+
+
+class TrackerService:
+    """串行执行请求的服务对象"""
+
+    def __init__(self, tracker: EvolutionTracker):
+        self.tracker = tracker
+        self.lock = threading.Lock()
+
+    def handle(self, request: Dict) -> Dict:
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "registry": str(self.tracker.registry)}
+        if op != "run":
+            return {"ok": False, "error": f"未知操作: {op}"}
+
+        argv = request.get("argv") or []
+        if not argv or argv[0] not in FORWARD_COMMANDS:
+            return {"ok": False, "error": f"不支持转发的命令: {' '.join(argv)}"}
+
+        from evolution_tracker import main
+        out = io.StringIO()
+        code = 0
+        with self.lock, redirect_stdout(out):
+            stdin, sys.stdin = sys.stdin, io.StringIO(request.get("stdin", ""))
+            try:
+                main(["evolution_tracker.py"] + argv, self.tracker)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception as e:  # 单个请求出错不能拖垮服务
+                print(f"❌ {type(e).__name__}: {e}")
+                code = 1
+            finally:
+                sys.stdin = stdin
+        return {"ok": True, "code": code, "output": out.getvalue()}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.service.handle(json.loads(line))
+            except ValueError as e:
+                response = {"ok": False, "error": f"无效请求: {e}"}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def connect(path: Path, timeout: float = 30.0) -> Optional[socket.socket]:
+    """连接服务，未运行 (或遗留的 socket 文件) 时返回 None"""
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request(sock: socket.socket, payload: Dict) -> Dict:
+    sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+    with sock.makefile("rb") as f:
+        line = f.readline()
+    if not line:
+        raise ConnectionError("服务端关闭了连接")
+    return json.loads(line)
+
+
+def forward(registry: str, args: List[str]) -> Optional[int]:
+    """把命令转发给运行中的服务，返回退出码；无法转发时返回 None 由调用方本地执行"""
+    if not args or args[0] not in FORWARD_COMMANDS or os.environ.get("EVOLUTION_DAEMON") == "0":
+        return None
+    sock = connect(socket_path(registry))
+    if sock is None:
+        return None
+    # 连接成功后才读取标准输入，否则本地执行时 diff 内容已被读走
+    stdin = sys.stdin.read() if args[0] == "log" and not sys.stdin.isatty() else ""
+    try:
+        with sock:
+            response = request(sock, {"op": "run", "argv": args, "stdin": stdin})
+    except (OSError, ValueError) as e:
+        print(f"❌ tracker 服务无响应: {e}")
+        return 1
+    if not response.get("ok"):
+        print(f"❌ {response.get('error')}")
+        return 1
+    print(response["output"], end="")
+    return response["code"]
+
+
+def serve(tracker: EvolutionTracker, path: Optional[str] = None):
+    """前台运行服务，Ctrl+C 退出"""
+    sock_path = Path(path) if path else socket_path(str(tracker.registry))
+    if sock_path.exists():
+        alive = connect(sock_path, timeout=1.0)
+        if alive is not None:
+            alive.close()
+            print(f"❌ 已有 tracker 服务在运行: {sock_path}")
+            sys.exit(1)
+        sock_path.unlink()
+    sock_path.parent.mkdir(parents=True, exist_ok=True)
+
+    service = TrackerService(CachedTracker(str(tracker.registry)))
+    server = socketserver.ThreadingUnixStreamServer(str(sock_path), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"🛰️ tracker 服务已启动: {sock_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if sock_path.exists():
+            sock_path.unlink()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+🛰️ ThreeJSEvolution 常驻服务自检
+在线程里启动服务，经 socket 执行命令并检查转发与缓存失效
+"""
+
+import io
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from tracker_daemon import CachedTracker, TrackerService, _Handler, connect, forward, request, socket_path
+
+
+def _mutation(n: int):
+    return {"mutation_id": f"gen-t{n}", "parent_id": f"gen-t{n - 1}" if n else "null",
+            "timestamp": f"2026-01-0{n + 1}T00:00:00Z", "target_skill": "threejs-game",
+            "change_type": "optimization", "agent_id": "tester", "performance_delta": f"+{n}%",
+            "approved": False, "changelog": [], "description": f"第 {n} 代"}
+
+
+def test_run_and_forward():
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = EvolutionTracker(tmp)
+        for n in range(3):
+            writer.save_mutation(_mutation(n))
+
+        sock_path = Path(tmp) / "logs" / "tracker.sock"
+        sock_path.parent.mkdir(exist_ok=True)
+        server = socketserver.ThreadingUnixStreamServer(str(sock_path), _Handler)
+        server.daemon_threads = True
+        server.service = TrackerService(CachedTracker(tmp))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with connect(sock_path) as sock:
+                assert request(sock, {"op": "ping"})["pid"] == os.getpid()
+            with connect(sock_path) as sock:
+                response = request(sock, {"op": "run", "argv": ["tree", "gen-t2"]})
+            assert response["code"] == 0 and "gen-t1" in response["output"]
+            with connect(sock_path) as sock:
+                assert not request(sock, {"op": "run", "argv": ["gate", "gen-t2"]})["ok"]
+
+            # 服务外写入的新记录：目录时间戳变化后重新加载
+            writer.save_mutation(_mutation(3))
+            os.environ["EVOLUTION_SOCKET"] = str(sock_path)
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = forward(tmp, ["query", "--agent", "tester"])
+            assert code == 0 and "共 4 条" in out.getvalue()
+            with redirect_stdout(io.StringIO()):
+                assert forward(tmp, ["tree", "gen-zz"]) == 1
+                assert forward(tmp, ["checkout", "gen-t1"]) is None
+        finally:
+            os.environ.pop("EVOLUTION_SOCKET", None)
+            server.shutdown()
+            server.server_close()
+
+        # 遗留的 socket 文件：连接失败，回退到本地执行
+        assert sock_path.exists() and connect(sock_path) is None
+        assert forward(tmp, ["tree"]) is None
+        assert socket_path(tmp) == sock_path
+
+
+def main():
+    tests = [test_run_and_forward]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+📦 ThreeJSEvolution 第三方库缓存
+把技能页面引用的 CDN 库 (three.min.js, cannon.min.js ...) 缓存到本地，并用 sha256/SRI 校验
+
+核心功能：
+1. sync - 扫描页面中的 CDN 地址，下载缺失的库并写入 vendor/vendor-lock.json
+2. verify - 校验缓存文件与锁文件中的哈希一致
+3. pin - 把库的 SRI 哈希写入 mutation metrics (external_libs_lock)
+4. serve - 本地预览服务器，CDN 地址改写为本地缓存，无需联网
+
+Usage:
+    python3 scripts/vendor_cache.py sync [--root .]
+    python3 scripts/vendor_cache.py add <url> <file>
+    python3 scripts/vendor_cache.py verify
+    python3 scripts/vendor_cache.py pin
+    python3 scripts/vendor_cache.py serve [--port 8765] [--no-probe]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import re
+import sys
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from evolution_tracker import EvolutionTracker, default_registry
+
+VENDOR_DIR = "vendor"
+LOCK_FILE = "vendor-lock.json"
+PAGE_GLOBS = ["index.html", "skills/**/*.html"]
+
+_CDN_SRC = re.compile(r"""<script\b[^>]*?\bsrc\s*=\s*["'](https?://[^"']+)["']""", re.I)
+
+
+def find_cdn_urls(html: str) -> List[str]:
+    """页面中引用的外部脚本地址"""
+    return _CDN_SRC.findall(html)
+
+
+def sri_hash(data: bytes) -> str:
+    """Subresource Integrity 值 (sha384)"""
+    return "sha384-" + base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+
+def _local_name(url: str) -> str:
+    """cdn.jsdelivr.net/npm/three@0.128.0/build/three.min.js → three@0.128.0/three.min.js"""
+    parts = [p for p in urlparse(url).path.split("/") if p]
+    package = next((p for p in parts if "@" in p), urlparse(url).netloc)
+    return f"{package}/{parts[-1]}" if parts else package
+
+
+class VendorCache:
+    """以 URL 为键、按内容哈希校验的本地库缓存"""
+
+    def __init__(self, root: str = "."):
+        self.root = Path(root)
+        self.dir = self.root / VENDOR_DIR
+        self.lock_file = self.dir / LOCK_FILE
+        self.lock: Dict[str, Dict] = {}
+        self._verified: Dict[str, bool] = {}
+        if self.lock_file.exists():
+            with open(self.lock_file, 'r', encoding='utf-8') as f:
+                self.lock = json.load(f)
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, 'w', encoding='utf-8') as f:
+            json.dump(self.lock, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    def add(self, url: str, data: bytes) -> Dict:
+        """把库内容加入缓存；锁文件已有记录时要求字节完全一致"""
+        entry = self.lock.get(url)
+        digest = hashlib.sha256(data).hexdigest()
+        if entry and entry["sha256"] != digest:
+            raise ValueError(f"{url} 内容与锁文件不一致 (期望 {entry['sha256'][:12]}, 实际 {digest[:12]})")
+
+        name = entry["file"] if entry else _local_name(url)
+        path = self.dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+        self.lock[url] = {
+            "file": name,
+            "sha256": digest,
+            "integrity": sri_hash(data),
+            "size": len(data)
+        }
+        self._verified[url] = True
+        return self.lock[url]
+
+    def fetch(self, url: str, timeout: float = 30) -> Dict:
+        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return self.add(url, response.read())
+
+    def path_for(self, url: str) -> Optional[Path]:
+        entry = self.lock.get(url)
+        return self.dir / entry["file"] if entry else None
+
+    def verify_entry(self, url: str) -> bool:
+        """校验单个缓存文件 (结果按进程缓存)"""
+        if url not in self._verified:
+            path = self.path_for(url)
+            ok = bool(path and path.exists()
+                      and hashlib.sha256(path.read_bytes()).hexdigest() == self.lock[url]["sha256"])
+            self._verified[url] = ok
+        return self._verified[url]
+
+    def resolve(self, url: str) -> Optional[Path]:
+        """CDN 地址 → 已校验的本地文件，未缓存或校验失败时返回 None"""
+        if url in self.lock and self.verify_entry(url):
+            return self.path_for(url)
+        return None
+
+    def read(self, url: str) -> Optional[bytes]:
+        path = self.resolve(url)
+        return path.read_bytes() if path else None
+
+    def verify(self) -> Dict[str, bool]:
+        self._verified.clear()
+        return {url: self.verify_entry(url) for url in sorted(self.lock)}
+
+    def rewrite_html(self, html: str, prefix: str = "/" + VENDOR_DIR) -> str:
+        """把已缓存的 CDN 地址改写为本地路径，未缓存的保持不变"""
+        def replace(m):
+            url = m.group(1)
+            if self.resolve(url) is None:
+                return m.group(0)
+            return m.group(0).replace(url, f"{prefix}/{self.lock[url]['file']}")
+        return _CDN_SRC.sub(replace, html)
+
+    def missing(self, html: str) -> List[str]:
+        return [url for url in find_cdn_urls(html) if self.resolve(url) is None]
+
+
+def scan_pages(root: Path) -> Dict[str, List[str]]:
+    """页面 → 引用的 CDN 地址"""
+    pages = {}
+    for pattern in PAGE_GLOBS:
+        for path in sorted(root.glob(pattern)):
+            if VENDOR_DIR in path.relative_to(root).parts[:1]:
+                continue
+            urls = find_cdn_urls(path.read_text(encoding="utf-8"))
+            if urls:
+                pages[path.relative_to(root).as_posix()] = urls
+    return pages
+
+
+def pin_mutations(tracker: EvolutionTracker, cache: VendorCache) -> Dict[str, Dict]:
+    """把页面依赖的 SRI 哈希写入 mutation metrics.external_libs_lock"""
+    pinned = {}
+    for mutation in tracker.get_evolution_tree().values():
+        page = tracker.page_for(mutation)
+        if page is None or not page.exists():
+            continue
+        urls = find_cdn_urls(page.read_text(encoding="utf-8"))
+        lock = {url: cache.lock[url]["integrity"] for url in urls if url in cache.lock}
+        if lock and mutation.get("metrics", {}).get("external_libs_lock") != lock:
+            tracker.update_metrics(mutation["mutation_id"], {"external_libs_lock": lock})
+            pinned[mutation["mutation_id"]] = lock
+    return pinned
+
+
+def start_preview(root: str = ".", port: int = 0, inject: bool = False,
+                  registry: Optional[str] = None) -> Tuple[object, str]:
+    """后台启动离线预览服务器，返回 (server, base_url)
+
+    不注入探针时不需要 registry，也就不会在 root 下创建 mutations/ 等目录。
+    """
+    from telemetry import make_server
+
+    tracker = EvolutionTracker(registry or root) if inject else None
+    server = make_server(tracker, root, port, inject=inject, persist=inject,
+                         vendor=VendorCache(root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 第三方库缓存")
+    parser.add_argument("--root", default=default_registry(),
+                        help="站点根目录 (默认 EVOLUTION_REGISTRY 或仓库根目录)")
+    parser.add_argument("--registry", help="mutation 所在 registry (默认同 root)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("sync", help="下载页面引用但未缓存的库")
+    p_add = sub.add_parser("add", help="从本地文件导入库")
+    p_add.add_argument("url")
+    p_add.add_argument("file")
+    sub.add_parser("verify", help="校验缓存完整性")
+    sub.add_parser("pin", help="把 SRI 哈希写入 mutation metrics")
+    p_serve = sub.add_parser("serve", help="离线预览服务器")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--no-probe", action="store_true", help="不注入遥测探针")
+
+    args = parser.parse_args(argv)
+    cache = VendorCache(args.root)
+
+    if args.command == "sync":
+        failed = 0
+        for page, urls in scan_pages(Path(args.root)).items():
+            for url in urls:
+                if cache.resolve(url):
+                    continue
+                try:
+                    entry = cache.fetch(url)
+                    print(f"   ✅ {url} → {VENDOR_DIR}/{entry['file']} ({entry['size']:,} bytes)")
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    print(f"   ❌ {url} ({page}): {e}")
+        cache.save()
+        print(f"📦 已缓存 {len(cache.lock)} 个库")
+        return 1 if failed else 0
+
+    if args.command == "add":
+        entry = cache.add(args.url, Path(args.file).read_bytes())
+        cache.save()
+        print(f"✅ {args.url} → {VENDOR_DIR}/{entry['file']} ({entry['integrity']})")
+        return 0
+
+    if args.command == "verify":
+        results = cache.verify()
+        for url, ok in results.items():
+            print(f"   {'✅' if ok else '❌'} {url}")
+        missing = sorted({u for urls in scan_pages(Path(args.root)).values() for u in urls} - set(results))
+        for url in missing:
+            print(f"   ⚠️ 未缓存: {url}")
+        return 0 if all(results.values()) and not missing else 1
+
+    if args.command == "pin":
+        tracker = EvolutionTracker(args.registry or args.root)
+        for mutation_id, lock in pin_mutations(tracker, cache).items():
+            print(f"📌 {mutation_id}: {len(lock)} 个库已锁定")
+        return 0
+
+    if args.command == "serve":
+        server, base = start_preview(args.root, args.port, inject=not args.no_probe,
+                                     registry=args.registry)
+        print(f"🌐 离线预览: {base}/")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+        return 0
+
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
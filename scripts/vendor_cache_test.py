@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+📦 ThreeJSEvolution 第三方库缓存自检
+加入缓存与校验、篡改检测、CDN 地址解析与页面改写 (全部离线)
+"""
+
+import sys
+import tempfile
+
+from instrument import run_tests
+from vendor_cache import VendorCache, find_cdn_urls, sri_hash
+
+THREE = "https://cdn.jsdelivr.net/npm/three@0.128.0/build/three.min.js"
+CANNON = "https://cdn.jsdelivr.net/npm/cannon@0.6.2/build/cannon.min.js"
+DATA = b"var THREE = { REVISION: '128' };\n"
+
+PAGE = f"""<!DOCTYPE html>
+<html><head>
+<script src="{THREE}"></script>
+<script defer src='{CANNON}'></script>
+<script src="main.js"></script>
+</head><body></body></html>
+"""
+
+
+def test_add_then_verify():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = VendorCache(tmp)
+        entry = cache.add(THREE, DATA)
+        assert entry["file"] == "three@0.128.0/three.min.js"
+        assert entry["size"] == len(DATA) and entry["integrity"] == sri_hash(DATA)
+        cache.save()
+
+        # 新进程读取锁文件后重新校验
+        reloaded = VendorCache(tmp)
+        assert reloaded.lock == cache.lock
+        assert reloaded.verify() == {THREE: True}
+        # 锁文件已有记录时，字节必须完全一致
+        try:
+            reloaded.add(THREE, DATA + b"//")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("内容不同的库被接受")
+
+
+def test_tampered_file_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = VendorCache(tmp)
+        cache.add(THREE, DATA)
+        cache.save()
+        (cache.dir / "three@0.128.0/three.min.js").write_bytes(DATA.replace(b"128", b"666"))
+
+        reloaded = VendorCache(tmp)
+        assert reloaded.verify() == {THREE: False}
+        assert reloaded.resolve(THREE) is None and reloaded.read(THREE) is None
+        # 缓存文件丢失同样视为未缓存
+        (cache.dir / "three@0.128.0/three.min.js").unlink()
+        assert VendorCache(tmp).verify() == {THREE: False}
+
+
+def test_resolve_and_rewrite_html():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = VendorCache(tmp)
+        assert find_cdn_urls(PAGE) == [THREE, CANNON]
+        assert cache.resolve(THREE) is None and cache.missing(PAGE) == [THREE, CANNON]
+
+        cache.add(THREE, DATA)
+        assert cache.resolve(THREE) == cache.dir / "three@0.128.0/three.min.js"
+        assert cache.read(THREE) == DATA
+
+        # 只改写已缓存的库，属性与未缓存的地址保持不变
+        html = cache.rewrite_html(PAGE)
+        assert '<script src="/vendor/three@0.128.0/three.min.js"></script>' in html
+        assert f"<script defer src='{CANNON}'></script>" in html
+        assert '<script src="main.js"></script>' in html
+        assert cache.missing(html) == [CANNON]
+        assert THREE not in cache.rewrite_html(PAGE, prefix="/assets")
+
+
+def main():
+    tests = [test_add_then_verify, test_tampered_file_rejected, test_resolve_and_rewrite_html]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
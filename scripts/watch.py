@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+👀 ThreeJSEvolution 监视模式
+轮询 mutations/、patches/、skills/ (以及 pack 索引)，只处理发生变化的部分：
+
+1. mutation 记录新增/修改/删除 → 增量更新查询索引与 ID 索引中对应的条目
+2. 技能页面内容哈希变化 → 只对这些页面重跑检查 (HTML 结构、内联脚本语法)
+3. agent 连续写入的一串文件在安静 debounce 秒后合并成一批处理
+
+页面哈希与检查结果保存在 logs/watch_state.json，重启后只检查期间改过的页面。
+标准库没有 inotify 接口，这里用 stat 轮询；几百个文件的扫描在毫秒级。
+
+Usage:
+    python3 scripts/evolution_tracker.py watch [--interval 0.5] [--debounce 0.3] [--no-checks] [--once]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from evolution_tracker import EvolutionTracker, default_registry
+from instrument import configure, traced
+from js_complexity import inline_scripts
+
+WATCH_DIRS = ("mutations", "patches", "skills")
+STATE_FILE = "watch_state.json"
+
+# 编辑器与原子写入留下的临时文件
+_IGNORED = re.compile(r"(^\.|~$|\.swp$|\.tmp$)")
+
+Check = Tuple[str, bool, str]
+
+
+def scan(registry: Path) -> Dict[str, Tuple[int, int]]:
+    """相对路径 → (mtime_ns, size)"""
+    files = {}
+    roots = [registry / d for d in WATCH_DIRS] + [registry / "packs"]
+    for root in roots:
+        if not root.is_dir():
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if _IGNORED.search(name):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[os.path.relpath(path, registry)] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def check_page(path: Path) -> List[Check]:
+    """单个页面的离线检查：HTML 结构 + 内联脚本语法 (需要 node)"""
+    content = path.read_text(encoding="utf-8", errors="replace")
+    results: List[Check] = [
+        ("DOCTYPE", "<!doctype html>" in content.lower(), ""),
+        ("HTML 标签", "<html" in content and "</html>" in content, ""),
+        ("HEAD 标签", "<head" in content and "</head>" in content, ""),
+        ("BODY 标签", "<body" in content and "</body>" in content, ""),
+        ("字符编码", re.search(r"charset=[\"']?utf-8", content, re.IGNORECASE) is not None, ""),
+    ]
+
+    node = shutil.which("node")
+    if node is None:
+        results.append(("JavaScript 语法", True, "未安装 node，跳过"))
+        return results
+    for n, (attrs, code) in enumerate(inline_scripts(content), 1):
+        suffix = ".mjs" if "module" in attrs else ".js"
+        with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8") as f:
+            f.write(code)
+        try:
+            result = subprocess.run([node, "--check", f.name], capture_output=True, text=True)
+        finally:
+            os.unlink(f.name)
+        error = ""
+        if result.returncode != 0:
+            lines = [l for l in result.stderr.splitlines() if "Error" in l]
+            error = (lines[0] if lines else result.stderr.strip())[:100]
+        results.append((f"JavaScript 语法 (脚本 {n})", result.returncode == 0, error))
+    return results
+
+
+class Watcher:
+    """增量维护索引与页面检查"""
+
+    def __init__(self, tracker: EvolutionTracker, interval: float = 0.5, debounce: float = 0.3,
+                 max_wait: float = 5.0, checks: bool = True):
+        self.tracker = tracker
+        self.interval = interval
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.checks = checks
+        self.state_file = tracker.logs_file.parent / STATE_FILE
+        self.state = {"pages": {}}
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        self.files = scan(tracker.registry)
+        # 写到一半的记录 (JSON 不完整)，下一批再试
+        self.pending: Set[str] = set()
+
+    def save_state(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        tmp.replace(self.state_file)
+
+    def poll(self) -> Set[str]:
+        """自上次扫描以来新增、修改或删除的文件"""
+        current = scan(self.tracker.registry)
+        touched = {p for p, st in current.items() if self.files.get(p) != st}
+        touched.update(p for p in self.files if p not in current)
+        self.files = current
+        return touched
+
+    def wait_for_batch(self) -> Set[str]:
+        """阻塞到有变化，并等待写入停歇 debounce 秒 (最多 max_wait 秒) 后返回整批路径"""
+        touched = set(self.pending)
+        first = last = time.monotonic() if touched else None
+        while True:
+            changed = self.poll()
+            now = time.monotonic()
+            if changed:
+                touched |= changed
+                first = first or now
+                last = now
+            if touched and (now - last >= self.debounce or now - first >= self.max_wait):
+                return touched
+            time.sleep(min(self.interval, self.debounce / 2) if touched else self.interval)
+
+    def reindex(self, ids: Set[str]) -> Dict[str, List[str]]:
+        """重新索引指定 ID，未能读取的记录留到下一批"""
+        query_index, id_index = self.tracker.query_index, self.tracker.id_index
+        if not query_index.loaded:
+            query_index.rebuild()
+        summary: Dict[str, List[str]] = {"updated": [], "removed": [], "pending": []}
+        for mutation_id in sorted(ids):
+            if self.tracker.has_mutation(mutation_id):
+                try:
+                    mutation = self.tracker.load_mutation(mutation_id)
+                except ValueError:
+                    self.pending.add(f"mutations/{mutation_id}.json")
+                    summary["pending"].append(mutation_id)
+                    continue
+                changed = query_index.update(mutation, save=False)
+                if id_index.add(mutation_id, save=False) or changed:
+                    summary["updated"].append(mutation_id)
+            elif query_index.remove(mutation_id, save=False) | id_index.remove(mutation_id, save=False):
+                summary["removed"].append(mutation_id)
+        if summary["updated"] or summary["removed"]:
+            query_index.save()
+            id_index.save()
+        return summary
+
+    def check_pages(self, pages: List[str]) -> Dict[str, List[Check]]:
+        """只检查内容哈希与上次记录不同的页面"""
+        results = {}
+        known = self.state["pages"]
+        dirty = False
+        for rel in sorted(pages):
+            path = self.tracker.registry / rel
+            if not path.exists():
+                dirty |= known.pop(rel, None) is not None
+                continue
+            digest = _sha256(path)
+            if known.get(rel, {}).get("sha256") == digest:
+                continue
+            checks = check_page(path)
+            known[rel] = {"sha256": digest, "ok": all(ok for _, ok, _ in checks)}
+            results[rel] = checks
+        if results or dirty:
+            self.save_state()
+        return results
+
+    @traced("watch.batch")
+    def process(self, touched: Set[str]) -> Dict:
+        self.pending.clear()
+        ids, pages = set(), []
+        for rel in touched:
+            parts = Path(rel).parts
+            if parts[0] == "mutations" and rel.endswith(".json"):
+                ids.add(Path(rel).stem)
+            elif parts[0] == "patches" and rel.endswith(".patch"):
+                # patch 变化会影响 diff 结果，记录本身需要存在才处理
+                self.tracker._diff_cache.clear()
+                if self.tracker.has_mutation(Path(rel).stem):
+                    ids.add(Path(rel).stem)
+            elif parts[0] == "packs":
+                # pack 被重写：重新映射，并按 pack 里的 ID 核对索引
+                self.tracker.pack.close()
+                ids.update(self.tracker.pack.ids())
+            elif parts[0] == "skills" and rel.endswith(".html"):
+                pages.append(rel)
+
+        result = {"files": len(touched), **self.reindex(ids)}
+        result["pages"] = self.check_pages(pages) if self.checks else {}
+        return result
+
+    def startup(self) -> Dict:
+        """启动时：补上索引之后写入的记录，检查自上次运行以来改过的页面"""
+        query_index = self.tracker.query_index
+        if not query_index.loaded or not self.tracker.id_index.path.exists():
+            query_index.rebuild()
+            self.tracker.id_index.rebuild()
+        since = query_index.path.stat().st_mtime_ns
+        ids = {Path(p).stem for p, (mtime, _) in self.files.items()
+               if p.startswith("mutations") and p.endswith(".json") and mtime > since}
+
+        pages = [p for p in self.files if p.startswith("skills") and p.endswith(".html")]
+        pages += [p for p in self.state["pages"] if p not in self.files]
+        result = {"files": len(self.files), **self.reindex(ids)}
+        result["pages"] = self.check_pages(pages) if self.checks else {}
+        return result
+
+    def run(self, once: bool = False):
+        start = time.perf_counter()
+        report(self.startup(), time.perf_counter() - start, "个文件已同步")
+        if once:
+            return
+        while True:
+            touched = self.wait_for_batch()
+            start = time.perf_counter()
+            report(self.process(touched), time.perf_counter() - start)
+
+
+def report(result: Dict, elapsed: float, label: str = "个文件变化"):
+    stamp = time.strftime("%H:%M:%S")
+    print(f"👀 [{stamp}] {result['files']} {label}，用时 {elapsed * 1000:.0f} ms")
+    if result["updated"]:
+        print(f"   🗂️ 已更新索引: {', '.join(result['updated'])}")
+    if result["removed"]:
+        print(f"   🗑️ 已移出索引: {', '.join(result['removed'])}")
+    if result["pending"]:
+        print(f"   ⏳ 记录尚未写完，稍后重试: {', '.join(result['pending'])}")
+    for page, checks in result["pages"].items():
+        failed = [(name, msg) for name, ok, msg in checks if not ok]
+        if failed:
+            print(f"   ❌ {page}")
+            for name, msg in failed:
+                print(f"      - {name}{': ' + msg if msg else ''}")
+        else:
+            print(f"   ✅ {page} ({len(checks)} 项检查通过)")
+    sys.stdout.flush()
+
+
+def main(argv: Optional[List[str]] = None, tracker: Optional[EvolutionTracker] = None) -> int:
+    parser = argparse.ArgumentParser(description="ThreeJSEvolution 监视模式")
+    parser.add_argument("--registry", default=default_registry())
+    parser.add_argument("--interval", type=float, default=0.5, help="轮询间隔 (秒)")
+    parser.add_argument("--debounce", type=float, default=0.3, help="写入停歇多久后处理一批 (秒)")
+    parser.add_argument("--no-checks", action="store_true", help="只维护索引，不检查页面")
+    parser.add_argument("--once", action="store_true", help="同步一次后退出")
+    args = parser.parse_args(configure(sys.argv[1:] if argv is None else argv))
+
+    watcher = Watcher(tracker or EvolutionTracker(args.registry), args.interval, args.debounce,
+                      checks=not args.no_checks)
+    print(f"👀 监视 {args.registry} ({', '.join(WATCH_DIRS)})，Ctrl+C 退出")
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
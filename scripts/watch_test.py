@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+👀 ThreeJSEvolution 监视模式自检
+增量索引、写到一半的记录、按内容哈希重跑页面检查
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from evolution_tracker import EvolutionTracker
+from instrument import run_tests
+from watch import Watcher
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>t</title></head>
+<body><script>let n = 1;</script></body></html>
+"""
+
+
+def _mutation(n: int, agent: str = "tester"):
+    return {"mutation_id": f"gen-t{n}", "parent_id": f"gen-t{n - 1}" if n else "null",
+            "timestamp": f"2026-01-0{n + 1}T00:00:00Z", "target_skill": "threejs-game",
+            "change_type": "optimization", "agent_id": agent, "approved": False}
+
+
+def _write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_incremental_reindex():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = EvolutionTracker(tmp)
+        tracker.save_mutation(_mutation(0))
+        watcher = Watcher(tracker, checks=False)
+        watcher.startup()
+        assert tracker.query_index.search(agent="tester") == ["gen-t0"]
+
+        mutations = Path(tmp) / "mutations"
+        _write(mutations / "gen-t1.json", json.dumps(_mutation(1)))
+        _write(mutations / "gen-t2.json", '{"mutation_id": "gen-')
+        _write(mutations / "gen-t0.json", json.dumps(_mutation(0, agent="other")))
+        result = watcher.process(watcher.poll())
+        assert result["updated"] == ["gen-t0", "gen-t1"] and result["pending"] == ["gen-t2"]
+        assert tracker.query_index.search(agent="tester") == ["gen-t1"]
+
+        # 写完之后，挂起的记录随下一批处理；删除的记录移出索引
+        _write(mutations / "gen-t2.json", json.dumps(_mutation(2)))
+        (mutations / "gen-t1.json").unlink()
+        result = watcher.process(watcher.poll() | watcher.pending)
+        assert result["updated"] == ["gen-t2"] and result["removed"] == ["gen-t1"]
+
+        fresh = EvolutionTracker(tmp)
+        assert fresh.query_index.search(agent="tester") == ["gen-t2"]
+        assert fresh.id_index.ids == ["gen-t0", "gen-t2"]
+
+
+def test_checks_follow_content_hash():
+    with tempfile.TemporaryDirectory() as tmp:
+        page = Path(tmp) / "skills" / "demo" / "index.html"
+        _write(page, PAGE)
+        watcher = Watcher(EvolutionTracker(tmp))
+        assert list(watcher.startup()["pages"]) == ["skills/demo/index.html"]
+
+        # 内容不变 (只是重新写入) 不重跑；重启后也不重跑
+        _write(page, PAGE)
+        assert watcher.process(watcher.poll())["pages"] == {}
+        assert Watcher(EvolutionTracker(tmp)).startup()["pages"] == {}
+
+        _write(page, PAGE.replace("<!DOCTYPE html>", ""))
+        checks = watcher.process(watcher.poll())["pages"]["skills/demo/index.html"]
+        assert ("DOCTYPE", False, "") in checks
+        if shutil.which("node"):
+            _write(page, PAGE.replace("let n = 1;", "let n = ;"))
+            checks = watcher.process(watcher.poll())["pages"]["skills/demo/index.html"]
+            assert not all(ok for _, ok, _ in checks)
+
+
+def main():
+    tests = [test_incremental_reindex, test_checks_follow_content_hash]
+    return run_tests(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(main())